@@ -1,9 +1,12 @@
 """Application module."""
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 
 from .container import Container
-from .endpoints import router
+from .endpoints import report_match_times, router
 
 
 def create_app() -> FastAPI:
@@ -11,8 +14,55 @@ def create_app() -> FastAPI:
     container.config.redis_host.from_env("REDIS_HOST", "localhost")
     container.config.redis_password.from_env("REDIS_PASSWORD", "password")
     container.config.project_id.from_env("FIRESTORE_PROJECT_ID", "dummy-project-id")
+    container.config.comparison_bit_backend.from_env("COMPARISON_BIT_BACKEND", "redis")
+    container.config.score_backend.from_env("SCORE_BACKEND", "none")
+    container.config.http_limit.from_env("HTTP_LIMIT", 200, as_=int)
+    container.config.http_limit_per_host.from_env("HTTP_LIMIT_PER_HOST", 20, as_=int)
+    container.config.http_keepalive_timeout.from_env("HTTP_KEEPALIVE_TIMEOUT", 30, as_=float)
+    container.config.http_dns_cache_ttl.from_env("HTTP_DNS_CACHE_TTL", 300, as_=int)
+    container.config.http_total_timeout.from_env("HTTP_TOTAL_TIMEOUT", 2, as_=float)
+    container.config.http_connect_timeout.from_env("HTTP_CONNECT_TIMEOUT", 1, as_=float)
+    container.config.scheduler_max_concurrency.from_env("SCHEDULER_MAX_CONCURRENCY", 50, as_=int)
+    container.config.report_cache_seconds.from_env("REPORT_CACHE_SECONDS", 5, as_=float)
+    container.config.report_queue_max_size.from_env("REPORT_QUEUE_MAX_SIZE", 10000, as_=int)
+    container.config.report_max_concurrency_per_destination.from_env(
+        "REPORT_MAX_CONCURRENCY_PER_DESTINATION", 4, as_=int
+    )
+    container.config.report_max_attempts.from_env("REPORT_MAX_ATTEMPTS", 5, as_=int)
+    container.config.report_skip_unchanged.from_env(
+        "REPORT_SKIP_UNCHANGED", "false", as_=lambda value: str(value).lower() in ("1", "true", "yes")
+    )
+    container.config.pi_notation_score_buffer_max_size.from_env("PI_NOTATION_SCORE_BUFFER_MAX_SIZE", 10000, as_=int)
+    container.config.batch_max_concurrency.from_env("BATCH_MAX_CONCURRENCY", 50, as_=int)
+    container.config.compute_policy.from_env("COMPUTE_POLICY", "auto")
+    container.config.compute_inline_max_cost.from_env("COMPUTE_INLINE_MAX_COST", 100, as_=int)
+    container.config.compute_process_pool_size.from_env("COMPUTE_PROCESS_POOL_SIZE", 0, as_=int)
+    container.config.compute_process_min_cost.from_env("COMPUTE_PROCESS_MIN_COST", 10000, as_=int)
+    container.config.shard_member_id.from_env("SHARD_MEMBER_ID", "local")
+    container.config.shard_members.from_env("SHARD_MEMBERS", "")
+    container.config.snapshot_path.from_env("SNAPSHOT_PATH", "")
+    container.config.snapshot_interval_seconds.from_env("SNAPSHOT_INTERVAL_SECONDS", 60, as_=float)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        if container.config.snapshot_path():
+            await container.snapshot_service.init()  # restore the snapshot before the first tick
+        container.scheduler_service().start(report_match_times)
+        yield
+        await container.scheduler_service().close()
+        # snapshot the last ticks, then deliver queued reports and flush buffered pi notation scores before the
+        # HTTP session goes away
+        for resource in (
+            container.snapshot_service,
+            container.report_queue,
+            container.pi_notation_score_write_buffer,
+            container.http_session,
+            container.compute_executor,
+        ):
+            if resource.initialized:
+                await resource.shutdown()
 
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
     app.container = container
     app.include_router(router)
     return app
@@ -0,0 +1,229 @@
+"""Offline replay of a recorded day of frames.
+
+Runs the ``/report`` pipeline over a file of concatenated frames in vectorized batches and writes one
+``ReportInfo`` per recorded second as JSON lines::
+
+    python -m app.backfill frames.bin --source channel --threshold 100 --start-timestamp 1700000000 \
+        --output reports.jsonl
+"""
+
+import argparse
+import heapq
+import sys
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import FrameFormat, ReportInfo
+from .repository.comparison_bit_index import ComparisonBitIndex
+from .repository.match_tracker import SortKey
+from .repository.score_window import ScoreWindow
+from .service.bit_service import BitService
+from .service.pi_notation_score_service import PiNotationScoreService
+from .service.score_service import ScoreService, compute_scores
+from .service.time_service import TimeService
+
+
+def load_frames(
+    path: str,
+    start_timestamp: Optional[int] = None,
+    timestamps_path: Optional[str] = None,
+    frame_format: FrameFormat = BitService.frame_format,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Memory-map the frames of ``path`` with their timestamps, from ``start_timestamp`` or a ``.npy`` sidecar."""
+    frames = np.memmap(path, dtype=np.uint8, mode="r")
+    frames = frames.reshape(-1, frame_format.byte_length)
+    if timestamps_path is not None:
+        timestamps = np.load(timestamps_path, mmap_mode="r").astype(np.int64)
+    elif start_timestamp is not None:
+        timestamps = np.arange(start_timestamp, start_timestamp + len(frames), dtype=np.int64)
+    else:
+        raise ValueError("Either a start timestamp or a timestamps file is required")
+    if len(timestamps) != len(frames):
+        raise ValueError(f"Got {len(timestamps)} timestamps for {len(frames)} frames")
+    if np.any(np.diff(timestamps) <= 0):
+        raise ValueError("Timestamps must be strictly increasing")
+    return timestamps, frames
+
+
+def compute_comparison_values(timestamps: np.ndarray, frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """C_t = frame_t XOR frame_{t-1}, for every t whose previous second was recorded."""
+    consecutive = np.flatnonzero(np.diff(timestamps) == BitService.timestamp_interval) + 1
+    return timestamps[consecutive], frames[consecutive] ^ frames[consecutive - 1]
+
+
+def compute_diagonal_scores(
+    timestamps: np.ndarray,
+    comparison_values: np.ndarray,
+    floor: Optional[float] = None,
+    frame_format: FrameFormat = ScoreService.frame_format,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Timestamps, lags ``t - d`` and scores ``s_{t,d}`` of every pair within a day sharing the exact-match prefix.
+
+    Scores that cannot exceed ``floor`` are pruned to 0, see ``ScoreService.get_score_floor``.
+    """
+    prefix_length = frame_format.prefix_byte_length
+    _, groups = np.unique(comparison_values[:, :prefix_length], axis=0, return_inverse=True)
+    order = np.lexsort((timestamps, groups.ravel()))
+    group_starts = np.searchsorted(groups.ravel()[order], groups.ravel()[order], side="left")
+
+    the_timestamps: List[np.ndarray] = []
+    lags: List[np.ndarray] = []
+    scores: List[np.ndarray] = []
+    sorted_timestamps = timestamps[order]
+    for position, index in enumerate(order):
+        group_start = group_starts[position]
+        if group_start == position:
+            continue
+        # candidates are the earlier members of the group within the last day, oldest first
+        earliest = np.searchsorted(
+            sorted_timestamps[group_start:position],
+            timestamps[index] - ComparisonBitIndex.expiration_seconds,
+            side="left",
+        )
+        candidates = order[group_start + earliest : position]
+        if not candidates.size:
+            continue
+        the_timestamps.append(np.full(candidates.size, timestamps[index], dtype=np.int64))
+        lags.append(timestamps[index] - timestamps[candidates])
+        scores.append(
+            compute_scores(
+                comparison_values[index].tobytes(),
+                comparison_values[candidates],
+                frame_format.prefix_bits,
+                frame_format.frame_bits,
+                floor,
+            )
+        )
+    if not scores:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(the_timestamps), np.concatenate(lags), np.concatenate(scores)
+
+
+def compute_pi_notation_scores(
+    timestamps: np.ndarray, lags: np.ndarray, scores: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """S_{t,d} of every diagonal with 5 consecutive non-zero scores, multiplied in the order of ``ScoreWindow``."""
+    order = np.lexsort((timestamps, lags))
+    timestamps, lags, scores = timestamps[order], lags[order], scores[order]
+    length = ScoreWindow.window_length
+    if len(scores) < length:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+    # row i of the window holds s_{t-i, d-i}; (t, lag) pairs are unique, so a full diagonal is 5 adjacent entries
+    current = slice(length - 1, None)
+    complete = np.ones(len(scores) - length + 1, dtype=bool)
+    for i in range(1, length):
+        previous = slice(length - 1 - i, len(scores) - i)
+        complete &= (lags[previous] == lags[current]) & (timestamps[previous] == timestamps[current] - i)
+    products = scores[current].copy()
+    for i in range(length - 1, 0, -1):
+        products *= scores[length - 1 - i : len(scores) - i]
+    kept = complete & (products != 0)
+    return timestamps[current][kept], lags[current][kept], products[kept]
+
+
+def merge_top(first: List[SortKey], second: List[SortKey]) -> List[SortKey]:
+    return list(islice(heapq.merge(first, second), PiNotationScoreService.match_times_length))
+
+
+def iter_report_infos(
+    source: str,
+    threshold: float,
+    frame_timestamps: np.ndarray,
+    timestamps: np.ndarray,
+    lags: np.ndarray,
+    pi_notation_scores: np.ndarray,
+) -> Iterator[ReportInfo]:
+    """The ``ReportInfo`` that ``/report`` would have answered at every recorded second.
+
+    Matches are ordered like ``MatchTracker``. A score outside the top of its own second never reaches the top
+    of a window, so the top of every second is merged into running tops of fixed one-day blocks: every window
+    is the tail of the previous block followed by the head of the current one.
+    """
+    length = PiNotationScoreService.match_times_length
+    above_threshold = pi_notation_scores > threshold
+    timestamps, lags, pi_notation_scores = (
+        timestamps[above_threshold],
+        lags[above_threshold],
+        pi_notation_scores[above_threshold],
+    )
+    matched_timestamps = timestamps - lags
+    order = np.lexsort((matched_timestamps, -pi_notation_scores, timestamps))
+    starts = np.searchsorted(timestamps[order], frame_timestamps, side="left")
+    ends = np.searchsorted(timestamps[order], frame_timestamps, side="right")
+    seconds_tops: List[List[SortKey]] = [
+        [
+            (-float(pi_notation_scores[index]), -int(timestamps[index]), int(matched_timestamps[index]))
+            for index in order[start : min(end, start + length)]
+        ]
+        for start, end in zip(starts.tolist(), ends.tolist(), strict=True)
+    ]
+
+    window = TimeService.timestamp_interval
+    blocks = (frame_timestamps - frame_timestamps[0]) // window
+    window_starts = np.searchsorted(frame_timestamps, frame_timestamps - window, side="right")
+    previous_tails: List[List[SortKey]] = []
+    head: List[SortKey] = []
+    for position, frame_timestamp in enumerate(frame_timestamps.tolist()):
+        if position == 0 or blocks[position] != blocks[position - 1]:
+            # running tops of the previous block from every second to its end
+            block_start = int(np.searchsorted(blocks, blocks[position] - 1, side="left"))
+            previous_tails = [[] for _ in range(position - block_start + 1)]
+            for offset in range(position - block_start - 1, -1, -1):
+                previous_tails[offset] = merge_top(seconds_tops[block_start + offset], previous_tails[offset + 1])
+            previous_tails = [[]] * block_start + previous_tails
+            head = []
+        head = merge_top(head, seconds_tops[position])
+        top = (
+            head
+            if blocks[window_starts[position]] == blocks[position]
+            else merge_top(previous_tails[window_starts[position]], head)
+        )
+        yield ReportInfo(channel=source, time=frame_timestamp, match_times=[sort_key[2] for sort_key in top])
+
+
+def backfill(
+    source: str,
+    threshold: float,
+    frame_timestamps: np.ndarray,
+    frames: np.ndarray,
+    frame_format: FrameFormat = ScoreService.frame_format,
+) -> Iterator[ReportInfo]:
+    timestamps, comparison_values = compute_comparison_values(frame_timestamps, frames)
+    diagonal_scores = compute_diagonal_scores(
+        timestamps, comparison_values, ScoreService.get_score_floor(threshold, frame_format), frame_format
+    )
+    return iter_report_infos(source, threshold, frame_timestamps, *compute_pi_notation_scores(*diagonal_scores))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded day of frames and write its match reports.")
+    parser.add_argument("frames", help="file of concatenated frames of --frame-bits, one per recorded second")
+    parser.add_argument("--source", required=True)
+    parser.add_argument("--threshold", required=True, type=float)
+    timestamps = parser.add_mutually_exclusive_group(required=True)
+    timestamps.add_argument("--start-timestamp", type=int, help="timestamp of the first frame, one frame per second")
+    timestamps.add_argument("--timestamps", help=".npy file of the int64 timestamp of every frame")
+    parser.add_argument("--frame-bits", type=int, choices=(1024, 2048, 4096), default=1024)
+    parser.add_argument("--prefix-bits", type=int, default=256, help="exact-match prefix, a multiple of 64 bits")
+    parser.add_argument("--output", help="JSON lines file of the reports, standard output by default")
+    args = parser.parse_args(argv)
+
+    try:
+        frame_format = FrameFormat(args.frame_bits, args.prefix_bits)
+    except ValueError as e:
+        parser.error(str(e))
+    frame_timestamps, frames = load_frames(args.frames, args.start_timestamp, args.timestamps, frame_format)
+    output = sys.stdout if args.output is None else open(args.output, "w")
+    try:
+        for report_info in backfill(args.source, args.threshold, frame_timestamps, frames, frame_format):
+            output.write(report_info.model_dump_json() + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,32 @@
 from dependency_injector import containers, providers
 
-from .database import init_firestore_client, init_redis_pool
+from .database import init_binary_redis_pool, init_firestore_client, init_redis_pool
 from .repository.bit_repository import BitRepository
+from .repository.blob_comparison_bit_repository import BlobComparisonBitRepository
+from .repository.comparison_bit_index import ComparisonBitIndex
 from .repository.comparison_bit_repository import ComparisonBitRepository
+from .repository.match_tracker import MatchTracker
+from .repository.packed_score_repository import PackedScoreRepository
 from .repository.pi_notation_score_repository import PiNotationScoreRepository
+from .repository.pi_notation_score_write_buffer import init_pi_notation_score_write_buffer
+from .repository.redis_unit_of_work import RedisUnitOfWork
 from .repository.score_repository import ScoreRepository
+from .repository.score_window import ScoreWindow
+from .repository.source_registry import SourceRegistry
 from .service.bit_service import BitService
 from .service.comparison_bit_service import ComparisonBitService
-from .service.egress_request_service import EgressRequestService
+from .service.compute_executor import init_compute_executor
+from .service.egress_request_service import EgressRequestService, init_http_session
+from .service.metrics_service import MetricsService
 from .service.pi_notation_score_service import PiNotationScoreService
+from .service.report_queue import init_report_queue
+from .service.scheduler_service import SchedulerService
 from .service.score_service import ScoreService
+from .service.shard_service import ShardService, parse_members
+from .service.snapshot_service import init_snapshot_service
+from .service.source_pipeline import SourcePipeline, SourcePipelines
+from .service.source_state_service import SourceStateService
+from .service.tick_coalescer import TickCoalescer
 from .service.time_service import TimeService
 
 
@@ -24,31 +41,153 @@ class Container(containers.DeclarativeContainer):
         password=config.redis_password,
     )
 
+    binary_redis_pool = providers.Resource(
+        init_binary_redis_pool,
+        host=config.redis_host,
+        password=config.redis_password,
+    )
+
     firestore_db = providers.Singleton(
         init_firestore_client,
         project_id=config.project_id,
     )
 
-    bit_repository = providers.Factory(BitRepository, redis=redis_pool)
+    redis_unit_of_work = providers.Factory(RedisUnitOfWork, redis=binary_redis_pool)
+
+    bit_repository = providers.Factory(BitRepository, redis=binary_redis_pool)
 
-    comparison_bit_repository = providers.Factory(ComparisonBitRepository, redis=redis_pool)
+    comparison_bit_repository = providers.Selector(
+        config.comparison_bit_backend,
+        redis=providers.Factory(ComparisonBitRepository, redis=binary_redis_pool),
+        blob=providers.Factory(BlobComparisonBitRepository, redis=binary_redis_pool),
+    )
+
+    comparison_bit_index = providers.Singleton(ComparisonBitIndex)
+
+    score_repository = providers.Selector(
+        config.score_backend,
+        none=providers.Object(None),
+        redis=providers.Factory(ScoreRepository, redis=redis_pool),
+        packed=providers.Factory(PackedScoreRepository, redis=binary_redis_pool),
+    )
 
-    score_repository = providers.Factory(ScoreRepository, redis=redis_pool)
+    score_window = providers.Singleton(ScoreWindow)
 
     pi_notation_score_repository = providers.Factory(PiNotationScoreRepository, firestore_db=firestore_db)
 
-    time_service = providers.Factory(TimeService)
+    match_tracker = providers.Singleton(MatchTracker)
 
-    egress_request_service = providers.Factory(EgressRequestService)
+    pi_notation_score_write_buffer = providers.Resource(
+        init_pi_notation_score_write_buffer,
+        pi_notation_score_repository=pi_notation_score_repository,
+        max_pending=config.pi_notation_score_buffer_max_size,
+    )
+
+    compute_executor = providers.Resource(
+        init_compute_executor,
+        policy=config.compute_policy,
+        inline_max_cost=config.compute_inline_max_cost,
+        process_pool_size=config.compute_process_pool_size,
+        process_min_cost=config.compute_process_min_cost,
+    )
+
+    time_service = providers.Factory(TimeService, compute_executor=compute_executor)
+
+    http_session = providers.Resource(
+        init_http_session,
+        limit=config.http_limit,
+        limit_per_host=config.http_limit_per_host,
+        keepalive_timeout=config.http_keepalive_timeout,
+        dns_cache_ttl=config.http_dns_cache_ttl,
+        total_timeout=config.http_total_timeout,
+        connect_timeout=config.http_connect_timeout,
+    )
+
+    metrics_service = providers.Singleton(MetricsService)
+
+    tick_coalescer = providers.Singleton(
+        TickCoalescer, cache_seconds=config.report_cache_seconds, metrics_service=metrics_service
+    )
+
+    egress_request_service = providers.Factory(
+        EgressRequestService, http_session=http_session, metrics_service=metrics_service
+    )
+
+    report_queue = providers.Resource(
+        init_report_queue,
+        egress_request_service=egress_request_service,
+        metrics_service=metrics_service,
+        max_size=config.report_queue_max_size,
+        max_concurrency_per_destination=config.report_max_concurrency_per_destination,
+        max_attempts=config.report_max_attempts,
+        skip_unchanged=config.report_skip_unchanged,
+    )
 
     bit_service = providers.Factory(BitService, bit_repository=bit_repository)
 
     comparison_bit_service = providers.Factory(
-        ComparisonBitService, comparison_bit_repository=comparison_bit_repository
+        ComparisonBitService,
+        comparison_bit_repository=comparison_bit_repository,
+        comparison_bit_index=comparison_bit_index,
+        compute_executor=compute_executor,
     )
 
-    score_service = providers.Factory(ScoreService, score_repository=score_repository)
+    score_service = providers.Factory(
+        ScoreService, score_repository=score_repository, score_window=score_window, compute_executor=compute_executor
+    )
 
     pi_notation_score_service = providers.Factory(
-        PiNotationScoreService, pi_notation_score_repository=pi_notation_score_repository
+        PiNotationScoreService,
+        pi_notation_score_repository=pi_notation_score_repository,
+        match_tracker=match_tracker,
+        write_buffer=pi_notation_score_write_buffer,
+        compute_executor=compute_executor,
+    )
+
+    source_pipeline = providers.Factory(
+        SourcePipeline,
+        egress_request_service=egress_request_service,
+        bit_service=bit_service,
+        comparison_bit_service=comparison_bit_service,
+        score_service=score_service,
+        pi_notation_score_service=pi_notation_score_service,
+        redis=binary_redis_pool,
+        metrics_service=metrics_service,
+        tick_coalescer=tick_coalescer,
+        report_queue=report_queue,
+    )
+
+    source_pipelines = providers.Singleton(SourcePipelines, pipeline_factory=source_pipeline.provider)
+
+    source_registry = providers.Singleton(SourceRegistry)
+
+    scheduler_service = providers.Singleton(
+        SchedulerService,
+        source_registry=source_registry,
+        max_concurrency=config.scheduler_max_concurrency,
+        metrics_service=metrics_service,
+    )
+
+    shard_service = providers.Singleton(
+        ShardService,
+        member_id=config.shard_member_id,
+        members=providers.Callable(parse_members, config.shard_members),
+    )
+
+    source_state_service = providers.Singleton(
+        SourceStateService,
+        source_registry=source_registry,
+        score_window=score_window,
+        match_tracker=match_tracker,
+        comparison_bit_index=comparison_bit_index,
+        write_buffer=pi_notation_score_write_buffer,
+        source_pipelines=source_pipelines,
+        tick_coalescer=tick_coalescer,
+    )
+
+    snapshot_service = providers.Resource(
+        init_snapshot_service,
+        source_state_service=source_state_service,
+        path=config.snapshot_path,
+        interval_seconds=config.snapshot_interval_seconds,
     )
@@ -15,5 +15,13 @@ async def init_redis_pool(host: str, password: str) -> AsyncIterator[Redis]:
     await session.wait_closed()
 
 
+async def init_binary_redis_pool(host: str, password: str) -> AsyncIterator[Redis]:
+    """Bytes-mode connection for raw frames and packed scores, which are not valid UTF-8."""
+    session = from_url(f"redis://{host}", password=password, decode_responses=False)
+    yield session
+    session.close()
+    await session.wait_closed()
+
+
 def init_firestore_client(project_id: str) -> firestore.AsyncClient:
     return firestore.AsyncClient(project_id)
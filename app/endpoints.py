@@ -1,18 +1,50 @@
 """Endpoints module."""
 
 import asyncio
-from typing import List, Optional
+import logging
+from typing import Dict, List, Optional, Tuple
 
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
 
 from .container import Container
-from .models import Bit, ReportInfo, ReportRequestBody, Score
+from .models import (
+    BatchReportItem,
+    BatchReportRequestBody,
+    Bit,
+    FrameBits,
+    FrameFormat,
+    ReportInfo,
+    ReportRequestBody,
+    Score,
+    ShardMembers,
+    ShardOwner,
+    SourceState,
+)
+from .repository.comparison_bit_index import ComparisonBitIndex
+from .repository.redis_unit_of_work import RedisUnitOfWork
+from .repository.source_registry import SourceRegistry
 from .service.bit_service import BitService
 from .service.comparison_bit_service import ComparisonBitService
 from .service.egress_request_service import EgressRequestService
+from .service.metrics_service import MetricsService
 from .service.pi_notation_score_service import PiNotationScoreService
+from .service.report_queue import ReportQueue
 from .service.score_service import ScoreService
+from .service.shard_service import ShardService
+from .service.source_pipeline import SourcePipeline, SourcePipelines
+from .service.source_state_service import SourceStateService
+from .service.tick_coalescer import TickCoalescer
 from .service.time_service import TimeService
 
 router = APIRouter()
@@ -22,36 +54,343 @@ router = APIRouter()
 @inject
 async def report_match_times(
     request_body: ReportRequestBody,
+    request: Request = None,
+    shard_service: ShardService = Depends(Provide[Container.shard_service]),
+    time_service: TimeService = Depends(Provide[Container.time_service]),
+    source_pipelines: SourcePipelines = Depends(Provide[Container.source_pipelines]),
+) -> ReportInfo:
+    redirect_to_owner(request_body.source, request, shard_service)
+    current_timestamp: int
+    previous_day_timestamp: int
+    current_timestamp, previous_day_timestamp = await asyncio.gather(
+        time_service.get_current_timestamp(), time_service.get_previous_day_timestamp()
+    )
+    pipeline: SourcePipeline = await source_pipelines.get(request_body)
+    # duplicate calls of the same second share one tick and one report
+    return await pipeline.tick_coalescer.run(
+        request_body.source,
+        current_timestamp,
+        lambda: tick_pipeline(pipeline, current_timestamp, previous_day_timestamp),
+    )
+
+
+@router.post("/report/batch")
+@inject
+async def report_many_match_times(
+    request_body: BatchReportRequestBody,
+    shard_service: ShardService = Depends(Provide[Container.shard_service]),
     time_service: TimeService = Depends(Provide[Container.time_service]),
     egress_request_service: EgressRequestService = Depends(Provide[Container.egress_request_service]),
     bit_service: BitService = Depends(Provide[Container.bit_service]),
     comparison_bit_service: ComparisonBitService = Depends(Provide[Container.comparison_bit_service]),
     score_service: ScoreService = Depends(Provide[Container.score_service]),
     pi_notation_score_service: PiNotationScoreService = Depends(Provide[Container.pi_notation_score_service]),
-) -> ReportInfo:
+    unit_of_work: RedisUnitOfWork = Depends(Provide[Container.redis_unit_of_work]),
+    metrics_service: MetricsService = Depends(Provide[Container.metrics_service]),
+    max_concurrency: int = Depends(Provide[Container.config.batch_max_concurrency]),
+    report_queue: ReportQueue = Depends(Provide[Container.report_queue]),
+) -> List[BatchReportItem]:
     current_timestamp: int
     previous_day_timestamp: int
     current_timestamp, previous_day_timestamp = await asyncio.gather(
         time_service.get_current_timestamp(), time_service.get_previous_day_timestamp()
     )
 
-    await asyncio.gather(
-        pi_notation_score_service.remove_expired_pi_notation_scores(request_body.source, previous_day_timestamp),
-        process_bits_and_scores(
-            current_timestamp=current_timestamp,
-            request_body=request_body,
-            egress_request_service=egress_request_service,
-            bit_service=bit_service,
-            comparison_bit_service=comparison_bit_service,
-            score_service=score_service,
-            pi_notation_score_service=pi_notation_score_service,
+    items: List[BatchReportItem] = [BatchReportItem(source=source.source) for source in request_body.sources]
+    request_bodies: List[ReportRequestBody] = []
+    indexes: List[int] = []
+    for index, source in enumerate(request_body.sources):
+        if source.source in {the_request_body.source for the_request_body in request_bodies}:
+            items[index].error = f"Duplicate source {source.source} in batch"
+            continue
+        if not shard_service.is_owner(source.source):
+            items[index].error = f"Source {source.source} is owned by {shard_service.get_owner(source.source)[1]}"
+            continue
+        request_bodies.append(source)
+        indexes.append(index)
+
+    errors: List[Optional[Exception]] = await process_many_bits_and_scores(
+        current_timestamp=current_timestamp,
+        request_bodies=request_bodies,
+        egress_request_service=egress_request_service,
+        bit_service=bit_service,
+        comparison_bit_service=comparison_bit_service,
+        score_service=score_service,
+        pi_notation_score_service=pi_notation_score_service,
+        unit_of_work=unit_of_work,
+        max_concurrency=max_concurrency,
+        metrics_service=metrics_service,
+    )
+
+    async def report(index: int, the_request_body: ReportRequestBody) -> None:
+        await remove_expired_pi_notation_scores(
+            the_request_body.source, previous_day_timestamp, pi_notation_score_service, metrics_service
+        )
+        with metrics_service.time_stage("match_times", the_request_body.source):
+            match_times = await pi_notation_score_service.get_match_times(
+                the_request_body.threshold, the_request_body.source
+            )
+        report_info = ReportInfo(channel=the_request_body.source, time=current_timestamp, match_times=match_times)
+        await send_report(the_request_body.reporting_url, report_info, report_queue, metrics_service)
+        items[index].report_info = report_info
+
+    # every source is reported on its own, so a failing one only fails its own item
+    reported = await asyncio.gather(
+        *(
+            report(index, the_request_body)
+            for index, the_request_body, error in zip(indexes, request_bodies, errors, strict=True)
+            if error is None
         ),
+        return_exceptions=True,
     )
+    report_errors = iter(reported)
+    for index, error in zip(indexes, errors, strict=True):
+        if error is None:
+            error = next(report_errors)
+        if error is not None:
+            items[index].error = str(error)
+    return items
+
+
+@router.websocket("/ingest/{source}")
+@inject
+async def ingest_frames(
+    websocket: WebSocket,
+    source: str,
+    threshold: float,
+    reporting_url: str,
+    max_prefix_distance: int = Query(default=0, ge=0, le=ComparisonBitIndex.max_prefix_distance),
+    frame_bits: FrameBits = 1024,
+    prefix_bits: int = Query(default=256, gt=0, multiple_of=64),
+    shard_service: ShardService = Depends(Provide[Container.shard_service]),
+    bit_service: BitService = Depends(Provide[Container.bit_service]),
+    comparison_bit_service: ComparisonBitService = Depends(Provide[Container.comparison_bit_service]),
+    score_service: ScoreService = Depends(Provide[Container.score_service]),
+    pi_notation_score_service: PiNotationScoreService = Depends(Provide[Container.pi_notation_score_service]),
+    unit_of_work: RedisUnitOfWork = Depends(Provide[Container.redis_unit_of_work]),
+    metrics_service: MetricsService = Depends(Provide[Container.metrics_service]),
+    report_queue: ReportQueue = Depends(Provide[Container.report_queue]),
+) -> None:
+    """Score a stream of binary messages of ``(timestamp, frame)`` records pushed by ``source``, oldest first.
+
+    Every frame is a tick of ``source``: its ``ReportInfo`` is sent back on the socket and delivered to
+    ``reporting_url`` in the background, so a slow reporting service never holds up the stream.
+    """
+    if not shard_service.is_owner(source):
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason=f"Source {source} is owned by {shard_service.get_owner(source)[1]}",
+        )
+        return
+    try:
+        frame_format = FrameFormat(frame_bits, prefix_bits)
+    except ValueError as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e))
+        return
+    await websocket.accept()
+    last_timestamp: Optional[int] = None
+    try:
+        while True:
+            try:
+                frames: List[Tuple[int, bytes]] = bit_service.split_timestamped_frames(
+                    await websocket.receive_bytes(), frame_format
+                )
+            except ValueError as e:
+                await websocket.close(code=status.WS_1007_INVALID_FRAME_PAYLOAD_DATA, reason=str(e))
+                break
+            for current_timestamp, current_bytes_value in frames:
+                # a repeated or earlier second would replace the newer seconds of the score window
+                if last_timestamp is not None and current_timestamp <= last_timestamp:
+                    await websocket.close(
+                        code=status.WS_1007_INVALID_FRAME_PAYLOAD_DATA,
+                        reason=f"Timestamp {current_timestamp} is not after {last_timestamp}",
+                    )
+                    return
+                last_timestamp = current_timestamp
+                try:
+                    (error,) = await process_many_frames(
+                        current_timestamp=current_timestamp,
+                        sources=[source],
+                        current_bytes_values=[current_bytes_value],
+                        bit_service=bit_service,
+                        comparison_bit_service=comparison_bit_service,
+                        score_service=score_service,
+                        pi_notation_score_service=pi_notation_score_service,
+                        unit_of_work=unit_of_work,
+                        metrics_service=metrics_service,
+                        thresholds=[threshold],
+                        max_prefix_distances=[max_prefix_distance],
+                        frame_formats=[frame_format],
+                    )
+                    if error is not None:
+                        raise error
+                    await remove_expired_pi_notation_scores(
+                        source,
+                        current_timestamp - TimeService.timestamp_interval,
+                        pi_notation_score_service,
+                        metrics_service,
+                    )
+                    with metrics_service.time_stage("match_times", source):
+                        match_times = await pi_notation_score_service.get_match_times(threshold, source)
+                    report_info = ReportInfo(channel=source, time=current_timestamp, match_times=match_times)
+                    await send_report(reporting_url, report_info, report_queue, metrics_service)
+                except Exception as e:
+                    logging.critical(f"Failed to ingest the frame of {source} at {current_timestamp}: Error: {e}")
+                    await websocket.close(
+                        code=status.WS_1011_INTERNAL_ERROR,
+                        # a close reason is at most 123 bytes
+                        reason=f"Failed to score the frame at {current_timestamp}: {e}".encode()[:123].decode(
+                            errors="ignore"
+                        ),
+                    )
+                    return
+                await websocket.send_json(report_info.model_dump())
+    except WebSocketDisconnect:
+        pass
+
+
+@router.post("/sources")
+@inject
+async def register_source(
+    request_body: ReportRequestBody,
+    request: Request,
+    source_registry: SourceRegistry = Depends(Provide[Container.source_registry]),
+    shard_service: ShardService = Depends(Provide[Container.shard_service]),
+) -> ReportRequestBody:
+    redirect_to_owner(request_body.source, request, shard_service)
+    source_registry.register(request_body)
+    return request_body
+
+
+@router.get("/sources")
+@inject
+async def get_sources(
+    source_registry: SourceRegistry = Depends(Provide[Container.source_registry]),
+) -> List[ReportRequestBody]:
+    return source_registry.get_all()
+
+
+@router.delete("/sources/{source}")
+@inject
+async def unregister_source(
+    source: str,
+    source_registry: SourceRegistry = Depends(Provide[Container.source_registry]),
+    source_pipelines: SourcePipelines = Depends(Provide[Container.source_pipelines]),
+    tick_coalescer: TickCoalescer = Depends(Provide[Container.tick_coalescer]),
+) -> ReportRequestBody:
+    source_pipelines.remove(source)
+    tick_coalescer.remove_source(source)
+    request_body: Optional[ReportRequestBody] = source_registry.unregister(source)
+    if request_body is None:
+        raise HTTPException(status_code=404, detail=f"Source {source} is not registered")
+    return request_body
+
+
+@router.get("/shards/owner/{source}")
+@inject
+async def get_shard_owner(
+    source: str,
+    shard_service: ShardService = Depends(Provide[Container.shard_service]),
+) -> ShardOwner:
+    member_id, url = shard_service.get_owner(source)
+    return ShardOwner(source=source, member_id=member_id, url=url)
+
+
+@router.put("/shards/members")
+@inject
+async def set_shard_members(
+    request_body: ShardMembers,
+    shard_service: ShardService = Depends(Provide[Container.shard_service]),
+    source_state_service: SourceStateService = Depends(Provide[Container.source_state_service]),
+    egress_request_service: EgressRequestService = Depends(Provide[Container.egress_request_service]),
+) -> List[str]:
+    """Apply a new membership and return the sources handed off to their new owners."""
+    try:
+        shard_service.set_members(request_body.members)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    return await source_state_service.hand_off(shard_service, egress_request_service)
+
+
+@router.post("/shards/handoff")
+@inject
+async def receive_source_state(
+    request_body: SourceState,
+    source_state_service: SourceStateService = Depends(Provide[Container.source_state_service]),
+) -> None:
+    source_state_service.import_source(request_body)
 
-    match_times = await pi_notation_score_service.get_match_times(request_body.threshold, request_body.source)
-    report_info = ReportInfo(channel=request_body.source, time=current_timestamp, match_times=match_times)
-    await egress_request_service.send_report(request_body.reporting_url, report_info)
 
+@router.get("/metrics")
+@inject
+async def get_metrics(
+    metrics_service: MetricsService = Depends(Provide[Container.metrics_service]),
+) -> Response:
+    return Response(content=metrics_service.export(), media_type=metrics_service.content_type)
+
+
+def redirect_to_owner(source: str, request: Optional[Request], shard_service: ShardService) -> None:
+    """Redirect a request for a source owned by another member to the same path on that member."""
+    if shard_service.is_owner(source):
+        return
+    member_id, url = shard_service.get_owner(source)
+    location = url if request is None else f"{url}{request.url.path}"
+    raise HTTPException(
+        status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+        detail=f"Source {source} is owned by {member_id}",
+        headers={"Location": location, "X-Shard-Owner": member_id},
+    )
+
+
+async def remove_expired_pi_notation_scores(
+    source: str,
+    previous_day_timestamp: int,
+    pi_notation_score_service: PiNotationScoreService,
+    metrics_service: MetricsService,
+) -> None:
+    with metrics_service.time_stage("expire", source):
+        await pi_notation_score_service.remove_expired_pi_notation_scores(source, previous_day_timestamp)
+
+
+async def send_report(
+    reporting_url: str,
+    report_info: ReportInfo,
+    report_queue: ReportQueue,
+    metrics_service: MetricsService,
+) -> None:
+    """Queue ``report_info`` for delivery; this only waits while the queue is full."""
+    with metrics_service.time_stage("report", report_info.channel):
+        await report_queue.put(reporting_url, report_info)
+
+
+async def tick_pipeline(pipeline: SourcePipeline, current_timestamp: int, previous_day_timestamp: int) -> ReportInfo:
+    """One tick of the source of ``pipeline``, from fetching its frame to queueing its report."""
+    request_body = pipeline.request_body
+    metrics_service = pipeline.metrics_service
+    with metrics_service.time_stage("tick", request_body.source):
+        await asyncio.gather(
+            remove_expired_pi_notation_scores(
+                request_body.source, previous_day_timestamp, pipeline.pi_notation_score_service, metrics_service
+            ),
+            process_bits_and_scores(
+                current_timestamp=current_timestamp,
+                request_body=request_body,
+                egress_request_service=pipeline.egress_request_service,
+                bit_service=pipeline.bit_service,
+                comparison_bit_service=pipeline.comparison_bit_service,
+                score_service=pipeline.score_service,
+                pi_notation_score_service=pipeline.pi_notation_score_service,
+                unit_of_work=pipeline.new_unit_of_work(),
+                metrics_service=metrics_service,
+            ),
+        )
+
+        with metrics_service.time_stage("match_times", request_body.source):
+            match_times = await pipeline.pi_notation_score_service.get_match_times(
+                request_body.threshold, request_body.source
+            )
+        report_info = ReportInfo(channel=request_body.source, time=current_timestamp, match_times=match_times)
+        await send_report(request_body.reporting_url, report_info, pipeline.report_queue, metrics_service)
     return report_info
 
 
@@ -63,29 +402,254 @@ async def process_bits_and_scores(
     comparison_bit_service: ComparisonBitService,
     score_service: ScoreService,
     pi_notation_score_service: PiNotationScoreService,
+    unit_of_work: RedisUnitOfWork,
+    metrics_service: Optional[MetricsService] = None,
 ):
-    current_bit: Optional[Bit] = None
-    current_comparison_bit: Optional[Bit] = None
-    current_score: Optional[Score] = None
-    current_bytes_value: Optional[bytes] = await egress_request_service.fetch_current_bytes(request_body.source_url)
-    if current_bytes_value:
-        current_bit: Bit = await bit_service.save_bit(current_bytes_value, current_timestamp, request_body.source)
-
-    if current_bit and await bit_service.previous_bit_exists(current_bit):
-        previous_bit: Bit = await bit_service.get_previous_bit(current_bit)
-        comparison_value: bytes = await comparison_bit_service.compute_comparison_value(current_bit, previous_bit)
-        current_comparison_bit: Bit = await comparison_bit_service.save_bit(
-            comparison_value, current_timestamp, request_body.source
+    (error,) = await process_many_bits_and_scores(
+        current_timestamp=current_timestamp,
+        request_bodies=[request_body],
+        egress_request_service=egress_request_service,
+        bit_service=bit_service,
+        comparison_bit_service=comparison_bit_service,
+        score_service=score_service,
+        pi_notation_score_service=pi_notation_score_service,
+        unit_of_work=unit_of_work,
+        metrics_service=metrics_service,
+    )
+    if error is not None:
+        raise error
+
+
+async def process_many_bits_and_scores(
+    current_timestamp: int,
+    request_bodies: List[ReportRequestBody],
+    egress_request_service: EgressRequestService,
+    bit_service: BitService,
+    comparison_bit_service: ComparisonBitService,
+    score_service: ScoreService,
+    pi_notation_score_service: PiNotationScoreService,
+    unit_of_work: RedisUnitOfWork,
+    max_concurrency: Optional[int] = None,
+    metrics_service: Optional[MetricsService] = None,
+) -> List[Optional[Exception]]:
+    """Process one tick of many sources, sharing Redis round trips and one scoring step, and return their errors."""
+    metrics_service = metrics_service or MetricsService()
+    semaphore = asyncio.Semaphore(max_concurrency or max(len(request_bodies), 1))
+
+    async def fetch_current_bytes(request_body: ReportRequestBody) -> Optional[bytes]:
+        async with semaphore:
+            with metrics_service.time_stage("fetch", request_body.source):
+                return await egress_request_service.fetch_current_bytes(request_body.source_url)
+
+    current_bytes_values: List[Optional[bytes]] = await asyncio.gather(
+        *(fetch_current_bytes(request_body) for request_body in request_bodies)
+    )
+    return await process_many_frames(
+        current_timestamp=current_timestamp,
+        sources=[request_body.source for request_body in request_bodies],
+        current_bytes_values=current_bytes_values,
+        bit_service=bit_service,
+        comparison_bit_service=comparison_bit_service,
+        score_service=score_service,
+        pi_notation_score_service=pi_notation_score_service,
+        unit_of_work=unit_of_work,
+        metrics_service=metrics_service,
+        thresholds=[request_body.threshold for request_body in request_bodies],
+        max_prefix_distances=[request_body.max_prefix_distance for request_body in request_bodies],
+        frame_formats=[request_body.frame_format for request_body in request_bodies],
+    )
+
+
+async def process_many_frames(
+    current_timestamp: int,
+    sources: List[str],
+    current_bytes_values: List[Optional[bytes]],
+    bit_service: BitService,
+    comparison_bit_service: ComparisonBitService,
+    score_service: ScoreService,
+    pi_notation_score_service: PiNotationScoreService,
+    unit_of_work: RedisUnitOfWork,
+    metrics_service: Optional[MetricsService] = None,
+    thresholds: Optional[List[float]] = None,
+    max_prefix_distances: Optional[List[int]] = None,
+    frame_formats: Optional[List[FrameFormat]] = None,
+) -> List[Optional[Exception]]:
+    """Run the frames of one tick, ``None`` for a missing frame, through the scoring pipeline and return their errors.
+
+    With the ``thresholds`` of the sources, scores and pi notation scores that can no longer be reported are
+    pruned instead of being saved. ``max_prefix_distances`` switch sources to tolerant prefix matching, and
+    ``frame_formats`` set the width of their frames and prefix.
+    """
+    max_prefix_distances = max_prefix_distances or [0] * len(sources)
+    frame_formats = frame_formats or [bit_service.frame_format] * len(sources)
+    metrics_service = metrics_service or MetricsService()
+    errors: List[Optional[Exception]] = [None] * len(sources)
+
+    # first round trip: write the current bits and read the previous ones
+    current_bits: Dict[int, Tuple[Bit, asyncio.Future]] = {}
+    for index, current_bytes_value in enumerate(current_bytes_values):
+        if not current_bytes_value:
+            metrics_service.count_dropped_frame(sources[index])
+            continue
+        try:
+            current_bit: Bit = await bit_service.save_bit(
+                current_bytes_value, current_timestamp, sources[index], unit_of_work, frame_formats[index]
+            )
+        except ValueError as e:
+            errors[index] = e
+            continue
+        current_bits[index] = (current_bit, bit_service.queue_previous_bit(current_bit, unit_of_work))
+    with metrics_service.time_stage("bit_round_trip", *(sources[index] for index in current_bits)):
+        try:
+            await unit_of_work.commit()
+        except Exception as e:  # the round trip is shared, so it fails every source in it
+            for index in current_bits:
+                errors[index] = e
+            return errors
+
+    # second round trip: write the comparison values and their scores
+    current_comparison_bits: Dict[int, Bit] = {}
+    candidate_bits: Dict[int, List[Bit]] = {}
+    for index, (current_bit, previous_bit_future) in current_bits.items():
+        try:
+            previous_bit: Optional[Bit] = await previous_bit_future
+            # a previous frame of another width was sent before the format of the source changed
+            if previous_bit is None or len(previous_bit.bytes) != len(current_bit.bytes):
+                metrics_service.count_broken_chain(sources[index], "previous_bit")
+                continue
+            with metrics_service.time_stage("comparison", sources[index]):
+                comparison_value: bytes = await comparison_bit_service.compute_comparison_value(
+                    current_bit, previous_bit
+                )
+                current_comparison_bit = await comparison_bit_service.save_bit(
+                    comparison_value, current_timestamp, sources[index], unit_of_work, frame_formats[index]
+                )
+            with metrics_service.time_stage("candidates", sources[index]):
+                candidate_bits[index] = await comparison_bit_service.get_candidate_bits(
+                    current_comparison_bit, max_prefix_distances[index]
+                )
+        except Exception as e:
+            errors[index] = e
+            continue
+        current_comparison_bits[index] = current_comparison_bit
+    scored_sources = [sources[index] for index in current_comparison_bits]
+    with metrics_service.time_stage("score", *scored_sources):
+        score_values, score_errors = await compute_scores_per_source(
+            score_service,
+            {index: (current_comparison_bits[index], candidate_bits[index]) for index in current_comparison_bits},
+            None if thresholds is None else {index: thresholds[index] for index in current_comparison_bits},
+            max_prefix_distances,
+            frame_formats,
         )
+    for index, error in score_errors.items():
+        errors[index] = error
+    for index, the_score_values in score_values.items():
+        matched_timestamps = [candidate_bit.timestamp for candidate_bit in candidate_bits[index]]
+        if thresholds is not None:
+            # a score of 0 zeroes every diagonal through it, as does a missing one
+            kept = [position for position, score_value in enumerate(the_score_values) if score_value]
+            metrics_service.count_pruning(
+                sources[index], "score", len(the_score_values), len(the_score_values) - len(kept)
+            )
+            the_score_values = [the_score_values[position] for position in kept]
+            matched_timestamps = [matched_timestamps[position] for position in kept]
+        try:
+            await score_service.save_scores(
+                the_score_values, current_timestamp, sources[index], matched_timestamps, unit_of_work
+            )
+        except Exception as e:
+            errors[index] = e
+    scored_indexes = [index for index in score_values if errors[index] is None]
+    scored_sources = [sources[index] for index in scored_indexes]
+    with metrics_service.time_stage("score_round_trip", *scored_sources):
+        try:
+            await unit_of_work.commit()
+        except Exception as e:
+            for index in scored_indexes:
+                errors[index] = e
+            return errors
+
+    # after a restart or a hand-off, the missing seconds of a window are read back from Redis when stored packed
+    incomplete_indexes = [
+        index for index in scored_indexes if not score_service.has_full_window(current_timestamp, sources[index])
+    ]
+    restored = await asyncio.gather(
+        *(score_service.restore_window(current_timestamp, sources[index]) for index in incomplete_indexes),
+        return_exceptions=True,
+    )
+    for index, is_complete in zip(incomplete_indexes, restored, strict=True):
+        if isinstance(is_complete, Exception):
+            errors[index] = is_complete
+        elif not is_complete:
+            metrics_service.count_broken_chain(sources[index], "previous_scores")
+    pi_notation_scores: Dict[int, List[Score]] = {}
+    for index in scored_indexes:
+        if errors[index] is not None:
+            continue
+        the_pi_notation_scores = score_service.get_rolling_pi_notation_scores(current_timestamp, sources[index])
+        if thresholds is not None:
+            evaluated = len(the_pi_notation_scores)
+            the_pi_notation_scores = pi_notation_score_service.get_best_scores(
+                the_pi_notation_scores, thresholds[index]
+            )
+            metrics_service.count_pruning(
+                sources[index], "pi_notation_score", evaluated, evaluated - len(the_pi_notation_scores)
+            )
+        pi_notation_scores[index] = the_pi_notation_scores
 
-    if current_comparison_bit and await comparison_bit_service.previous_bit_exists(current_comparison_bit):
-        previous_comparison_bit: Bit = await comparison_bit_service.get_previous_bit(current_comparison_bit)
-        score_value: float = await score_service.compute_score(current_comparison_bit, previous_comparison_bit)
-        current_score: Score = await score_service.save_score(score_value, current_timestamp, request_body.source)
+    async def save_pi_notation_scores(the_pi_notation_scores: List[Score]) -> None:
+        for pi_notation_score in the_pi_notation_scores:
+            await pi_notation_score_service.save_score(
+                pi_notation_score.score,
+                pi_notation_score.timestamp,
+                pi_notation_score.source,
+                pi_notation_score.matched_timestamp,
+            )
 
-    if current_score and await score_service.previous_4_scores_exists(current_score):
-        previous_n_scores: List[Score] = await score_service.get_previous_4_scores(current_score)
-        pi_notation_score_value: float = await pi_notation_score_service.compute_pi_notation_score(
-            [current_score] + previous_n_scores
+    with metrics_service.time_stage("pi_notation_score", *(sources[index] for index in pi_notation_scores)):
+        saved = await asyncio.gather(
+            *(
+                save_pi_notation_scores(the_pi_notation_scores)
+                for the_pi_notation_scores in pi_notation_scores.values()
+            ),
+            return_exceptions=True,
         )
-        await pi_notation_score_service.save_score(pi_notation_score_value, current_timestamp, request_body.source)
+    for index, error in zip(pi_notation_scores, saved, strict=True):
+        if isinstance(error, Exception):
+            errors[index] = error
+    return errors
+
+
+async def compute_scores_per_source(
+    score_service: ScoreService,
+    batches: Dict[int, Tuple[Bit, List[Bit]]],
+    thresholds: Optional[Dict[int, float]],
+    max_prefix_distances: List[int],
+    frame_formats: List[FrameFormat],
+) -> Tuple[Dict[int, List[float]], Dict[int, Exception]]:
+    """Scores of every batch in one scoring step, and the errors of the batches that failed, by source index.
+
+    When the shared step fails, each batch is scored on its own, so that only the failing sources get an error.
+    """
+
+    async def compute(indexes: List[int]) -> List[List[float]]:
+        return await score_service.compute_scores_many(
+            [batches[index] for index in indexes],
+            None if thresholds is None else [thresholds[index] for index in indexes],
+            [max_prefix_distances[index] for index in indexes],
+            [frame_formats[index] for index in indexes],
+        )
+
+    try:
+        return dict(zip(batches, await compute(list(batches)), strict=True)), {}
+    except Exception as e:
+        if len(batches) == 1:
+            return {}, {index: e for index in batches}
+    score_values: Dict[int, List[float]] = {}
+    errors: Dict[int, Exception] = {}
+    for index in batches:
+        try:
+            (score_values[index],) = await compute([index])
+        except Exception as e:
+            errors[index] = e
+    return score_values, errors
@@ -1,8 +1,42 @@
 """Models module."""
 
-from typing import List
+from dataclasses import dataclass
+from typing import ClassVar, Dict, List, Literal, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+FrameBits = Literal[1024, 2048, 4096]
+
+
+@dataclass(frozen=True, slots=True)
+class FrameFormat:
+    """Width of the frames of a source and of their exact-match prefix, in bits.
+
+    The prefix is split into ``block_count`` blocks of whole bytes for the near-prefix lookup of ComparisonBitIndex,
+    so it is a multiple of ``prefix_bits_step`` bits, and a prefix distance is below ``block_count``.
+    """
+
+    block_count: ClassVar[int] = 8
+    max_prefix_distance: ClassVar[int] = block_count - 1
+    prefix_bits_step: ClassVar[int] = 8 * block_count
+
+    frame_bits: int = 1024
+    prefix_bits: int = 256
+
+    def __post_init__(self) -> None:
+        if self.prefix_bits <= 0 or self.prefix_bits % self.prefix_bits_step or self.prefix_bits >= self.frame_bits:
+            raise ValueError(
+                f"prefix_bits {self.prefix_bits} must be a positive multiple of {self.prefix_bits_step} "
+                f"below frame_bits {self.frame_bits}"
+            )
+
+    @property
+    def byte_length(self) -> int:
+        return self.frame_bits // 8
+
+    @property
+    def prefix_byte_length(self) -> int:
+        return self.prefix_bits // 8
 
 
 class ReportRequestBody(BaseModel):
@@ -10,6 +44,19 @@ class ReportRequestBody(BaseModel):
     source_url: str
     threshold: float
     reporting_url: str
+    # flipped bits tolerated in the exact-match prefix, below the block count of ComparisonBitIndex
+    max_prefix_distance: int = Field(default=0, ge=0, le=FrameFormat.max_prefix_distance)
+    frame_bits: FrameBits = 1024
+    prefix_bits: int = Field(default=256, gt=0, multiple_of=FrameFormat.prefix_bits_step)
+
+    @model_validator(mode="after")
+    def check_frame_format(self) -> "ReportRequestBody":
+        FrameFormat(self.frame_bits, self.prefix_bits)
+        return self
+
+    @property
+    def frame_format(self) -> FrameFormat:
+        return FrameFormat(self.frame_bits, self.prefix_bits)
 
 
 class ReportInfo(BaseModel):
@@ -18,13 +65,53 @@ class ReportInfo(BaseModel):
     match_times: List[int]
 
 
-class Bit(BaseModel):
+class BatchReportRequestBody(BaseModel):
+    sources: List[ReportRequestBody]
+
+
+class BatchReportItem(BaseModel):
+    source: str
+    report_info: Optional[ReportInfo] = None
+    error: Optional[str] = None
+
+
+# Bit and Score are built for every frame and candidate of every tick, so they are plain slotted dataclasses:
+# nothing validates them, the code creating them passes the right types.
+@dataclass(slots=True)
+class Bit:
     bytes: bytes
     timestamp: int
     source: str
 
 
-class Score(BaseModel):
+@dataclass(slots=True)
+class Score:
     score: float
     timestamp: int
     source: str
+    matched_timestamp: Optional[int] = None
+
+
+class ShardMembers(BaseModel):
+    members: Dict[str, str]  # member id -> base URL
+
+
+class ShardOwner(BaseModel):
+    source: str
+    member_id: str
+    url: str
+
+
+class SourceState(BaseModel):
+    """In-memory state of one source, handed off to its new owner when shard membership changes."""
+
+    model_config = ConfigDict(ser_json_bytes="base64", val_json_bytes="base64")
+
+    source: str
+    request_body: Optional[ReportRequestBody] = None
+    score_vectors: List[Tuple[int, Dict[int, float]]] = []
+    match_scores: List[Score] = []
+    comparison_timestamps: List[int] = []
+    comparison_values: bytes = b""  # concatenated comparison values of ``comparison_timestamps``
+    frame_bits: int = 1024  # format of the comparison values
+    prefix_bits: int = 256
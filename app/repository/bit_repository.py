@@ -1,7 +1,11 @@
+import asyncio
+from typing import Optional
+
 from aioredis import Redis
 
 from ..models import Bit
 from . import NotFoundError
+from .redis_unit_of_work import RedisUnitOfWork
 
 
 class BitRepository:
@@ -11,13 +15,24 @@ class BitRepository:
     def __init__(self, redis: Redis) -> None:
         self._redis = redis
 
-    async def add(self, bit: Bit) -> None:
-        await self._redis.setex(
-            name=self.entity_name + str(bit.timestamp) + bit.source, time=self.expiration_seconds, value=bit.bytes
-        )
+    async def add(self, bit: Bit, unit_of_work: Optional[RedisUnitOfWork] = None) -> None:
+        name = self.entity_name + str(bit.timestamp) + bit.source
+        if unit_of_work is not None:
+            unit_of_work.setex(name=name, time=self.expiration_seconds, value=bit.bytes)
+            return
+        await self._redis.setex(name=name, time=self.expiration_seconds, value=bit.bytes)
 
     async def get_bit_by_timestamp_and_source(self, timestamp: int, source: str) -> Bit:
         the_bytes = await self._redis.get(self.entity_name + str(timestamp) + source)
         if the_bytes is None:
             raise NotFoundError({"entity_name": self.entity_name, "timestamp": timestamp, "source": source})
         return Bit(bytes=the_bytes, source=source, timestamp=timestamp)
+
+    def queue_get_bit(self, timestamp: int, source: str, unit_of_work: RedisUnitOfWork) -> asyncio.Future:
+        """Queue a read in ``unit_of_work``, the future resolves to the bit or ``None`` if it does not exist."""
+        return unit_of_work.get(
+            self.entity_name + str(timestamp) + source,
+            parse=lambda the_bytes: (
+                None if the_bytes is None else Bit(bytes=the_bytes, source=source, timestamp=timestamp)
+            ),
+        )
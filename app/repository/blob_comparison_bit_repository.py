@@ -0,0 +1,92 @@
+import struct
+from typing import List, Optional
+
+from ..models import Bit, FrameFormat
+from . import NotFoundError
+from .comparison_bit_repository import ComparisonBitRepository
+from .redis_unit_of_work import RedisUnitOfWork
+
+
+class BlobComparisonBitRepository(ComparisonBitRepository):
+    """Comparison values of the last day stored as one binary blob per source.
+
+    Slot ``timestamp % slot_count`` lives at a fixed offset and holds the packed timestamp followed by the
+    bytes of the value, written with SETRANGE and read back with GETRANGE. Values of every width have their own
+    blob, with slots sized to that width; reads default to the width of ``FrameFormat``. This needs a
+    connection created with ``decode_responses=False``.
+    """
+
+    entity_name = "ComparisonBitBlob"
+    slot_count = 60 * 60 * 24  # one slot per second of the day
+    byte_length = FrameFormat().byte_length
+    timestamp_format = struct.Struct(">q")
+
+    def _key(self, source: str, byte_length: int) -> str:
+        return self.entity_name + str(byte_length * 8) + source
+
+    def _slot_length(self, byte_length: int) -> int:
+        return self.timestamp_format.size + byte_length
+
+    def _offset(self, timestamp: int, byte_length: int) -> int:
+        return timestamp % self.slot_count * self._slot_length(byte_length)
+
+    async def add(self, bit: Bit, unit_of_work: Optional[RedisUnitOfWork] = None) -> None:
+        the_unit_of_work = unit_of_work or RedisUnitOfWork(self._redis)
+        key = self._key(bit.source, len(bit.bytes))
+        the_unit_of_work.queue(
+            "setrange",
+            key,
+            self._offset(bit.timestamp, len(bit.bytes)),
+            self.timestamp_format.pack(bit.timestamp) + bit.bytes,
+        )
+        the_unit_of_work.queue("expire", key, self.expiration_seconds)
+        if unit_of_work is None:
+            await the_unit_of_work.commit()
+
+    def _parse_slots(self, the_bytes: bytes, source: str, start: int, end: int, byte_length: int) -> List[Bit]:
+        bits = []
+        slot_length = self._slot_length(byte_length)
+        for offset in range(0, len(the_bytes) - slot_length + 1, slot_length):
+            (timestamp,) = self.timestamp_format.unpack_from(the_bytes, offset)
+            if start <= timestamp < end:
+                the_bit_bytes = the_bytes[offset + self.timestamp_format.size : offset + slot_length]
+                bits.append(Bit(bytes=the_bit_bytes, timestamp=timestamp, source=source))
+        return bits
+
+    async def get_bit_by_timestamp_and_source(
+        self, timestamp: int, source: str, byte_length: Optional[int] = None
+    ) -> Bit:
+        byte_length = byte_length or self.byte_length
+        offset = self._offset(timestamp, byte_length)
+        the_bytes = await self._redis.getrange(
+            self._key(source, byte_length), offset, offset + self._slot_length(byte_length) - 1
+        )
+        bits = self._parse_slots(the_bytes, source, timestamp, timestamp + 1, byte_length)
+        if not bits:
+            raise NotFoundError({"entity_name": self.entity_name, "timestamp": timestamp, "source": source})
+        return bits[0]
+
+    async def get_bits_between_timestamps(
+        self, start: int, end: int, source: str, byte_length: Optional[int] = None
+    ) -> List[Bit]:
+        """Bits with ``start <= timestamp < end``, oldest first, in one GETRANGE per contiguous run of slots."""
+        byte_length = byte_length or self.byte_length
+        slot_length = self._slot_length(byte_length)
+        start = max(start, end - self.slot_count)
+        if start >= end:
+            return []
+        first_slot, last_slot = start % self.slot_count, (end - 1) % self.slot_count
+        if first_slot <= last_slot:
+            ranges = [(first_slot, last_slot)]
+        else:
+            ranges = [(first_slot, self.slot_count - 1), (0, last_slot)]
+
+        unit_of_work = RedisUnitOfWork(self._redis)
+        futures = [
+            unit_of_work.queue(
+                "getrange", self._key(source, byte_length), from_slot * slot_length, (to_slot + 1) * slot_length - 1
+            )
+            for from_slot, to_slot in ranges
+        ]
+        await unit_of_work.commit()
+        return [bit for future in futures for bit in self._parse_slots(await future, source, start, end, byte_length)]
@@ -0,0 +1,209 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ..models import Bit, FrameFormat
+
+
+class ComparisonBitIndex:
+    """In-memory index of comparison values keyed on their exact-match prefix.
+
+    The day of every source is held in one preallocated ``slot_count`` x frame bytes array, indexed by
+    ``timestamp % slot_count``, next to the timestamp held in each slot. Prefix buckets map timestamps to slots,
+    so adding a value writes into its slot instead of allocating it.
+
+    A score is only non-zero when the prefix of ``FrameFormat.prefix_bits`` matches exactly, so the candidates for
+    a comparison value are the entries of its own prefix bucket within the last day. Every source has its own
+    ``FrameFormat``, ``frame_format`` until ``set_frame_format`` is called.
+
+    Candidates whose prefix is within a Hamming distance of the current one are found by multi-index hashing:
+    the prefixes are also indexed by each of their ``block_count`` blocks, and a prefix at a distance below
+    ``block_count`` equals the current one on at least one block. The block indexes of a source are built on
+    its first tolerant lookup.
+    """
+
+    expiration_seconds = 60 * 60 * 24  # 1 day window
+    slot_count = expiration_seconds + 1  # a value stays a candidate until exactly one day after it
+    empty_timestamp = -1
+    eviction_scan_length = 64
+    frame_format = FrameFormat()
+    block_count = FrameFormat.block_count
+    max_prefix_distance = FrameFormat.max_prefix_distance
+
+    def __init__(self) -> None:
+        self._values: Dict[str, np.ndarray] = {}
+        self._timestamps: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[str, Dict[bytes, Dict[int, int]]] = defaultdict(dict)
+        self._evicted_until: Dict[str, int] = {}
+        self._blocks: Dict[str, List[Dict[bytes, Set[bytes]]]] = {}
+        self._frame_formats: Dict[str, FrameFormat] = {}
+
+    def get_frame_format(self, source: str) -> FrameFormat:
+        return self._frame_formats.get(source, self.frame_format)
+
+    def set_frame_format(self, source: str, frame_format: FrameFormat) -> None:
+        """Index ``source`` on the prefix of ``frame_format``; its values of another format are dropped."""
+        if frame_format == self.get_frame_format(source):
+            return
+        self.remove_source(source)
+        self._frame_formats[source] = frame_format
+
+    def add(self, bit: Bit) -> None:
+        self.evict_before_timestamp(bit.source, bit.timestamp - self.expiration_seconds)
+        values, timestamps = self._get_slots(bit.source)
+        slot = bit.timestamp % self.slot_count
+        if timestamps[slot] > bit.timestamp:  # a value older than the day of the one in its slot
+            return
+        self._discard(bit.source, slot)
+        values[slot] = np.frombuffer(bit.bytes, dtype=np.uint8)
+        timestamps[slot] = bit.timestamp
+        self._evicted_until.setdefault(bit.source, bit.timestamp - self.expiration_seconds)
+        self._add_to_bucket(
+            bit.source, bit.bytes[: self.get_frame_format(bit.source).prefix_byte_length], bit.timestamp
+        )
+
+    def get_candidate_bits(self, bit: Bit, max_prefix_distance: int = 0) -> List[Bit]:
+        """Entries of the last day whose prefix differs from the one of ``bit`` in at most ``max_prefix_distance`` bits."""
+        values = self._values.get(bit.source)
+        if values is None:
+            return []
+        prefix = bit.bytes[: self.get_frame_format(bit.source).prefix_byte_length]
+        if max_prefix_distance:
+            prefixes = self._get_near_prefixes(bit.source, prefix, max_prefix_distance)
+        else:
+            prefixes = [prefix]
+        earliest_timestamp = bit.timestamp - self.expiration_seconds
+        timestamps: List[int] = []
+        slots: List[int] = []
+        for the_prefix in prefixes:
+            for timestamp, slot in self._buckets[bit.source].get(the_prefix, {}).items():
+                if earliest_timestamp <= timestamp < bit.timestamp:
+                    timestamps.append(timestamp)
+                    slots.append(slot)
+        if not slots:
+            return []
+        # one gather of the candidate rows, sliced into the bytes of every candidate
+        byte_length = values.shape[1]
+        the_bytes = values.take(slots, axis=0).tobytes()
+        return [
+            Bit(bytes=the_bytes[start : start + byte_length], timestamp=timestamp, source=bit.source)
+            for start, timestamp in zip(range(0, len(the_bytes), byte_length), timestamps)
+        ]
+
+    def evict_before_timestamp(self, source: str, timestamp: int) -> None:
+        evicted_until = self._evicted_until.get(source)
+        if evicted_until is None or timestamp <= evicted_until:
+            return
+        self._evicted_until[source] = timestamp
+        timestamps = self._timestamps[source]
+        if timestamp - evicted_until > self.eviction_scan_length:  # after a gap, scan every slot at once
+            stale = (timestamps != self.empty_timestamp) & (timestamps < timestamp)
+            for slot in np.flatnonzero(stale).tolist():
+                self._discard(source, slot)
+            return
+        for the_timestamp in range(evicted_until, timestamp):
+            slot = the_timestamp % self.slot_count
+            if timestamps[slot] == the_timestamp:
+                self._discard(source, slot)
+
+    def get_sources(self) -> List[str]:
+        return [source for source, buckets in self._buckets.items() if buckets]
+
+    def export_source(self, source: str) -> Tuple[List[int], bytes]:
+        """Timestamps of the comparison values of ``source``, oldest first, and the values concatenated in that order."""
+        if source not in self._values:
+            return [], b""
+        timestamps = self._timestamps[source]
+        slots = np.flatnonzero(timestamps != self.empty_timestamp)
+        slots = slots[np.argsort(timestamps[slots], kind="stable")]
+        return timestamps[slots].tolist(), self._values[source][slots].tobytes()
+
+    def import_source(
+        self, source: str, timestamps: List[int], values: bytes, frame_format: Optional[FrameFormat] = None
+    ) -> None:
+        """Replace the comparison values of ``source`` by those of ``export_source``, without a ``Bit`` per value."""
+        self.remove_source(source)
+        if frame_format is not None:
+            self._frame_formats[source] = frame_format
+        if not timestamps:
+            return
+        the_values, the_timestamps = self._get_slots(source)
+        slots = np.asarray(timestamps, dtype=np.int64) % self.slot_count
+        rows = np.frombuffer(values, dtype=np.uint8).reshape(len(timestamps), -1)
+        the_values[slots] = rows
+        the_timestamps[slots] = timestamps
+        self._evicted_until[source] = min(timestamps)
+        prefix_byte_length = self.get_frame_format(source).prefix_byte_length
+        for timestamp, prefix in zip(timestamps, rows[:, :prefix_byte_length], strict=True):
+            self._add_to_bucket(source, prefix.tobytes(), timestamp)
+
+    def remove_source(self, source: str) -> None:
+        self._values.pop(source, None)
+        self._timestamps.pop(source, None)
+        self._buckets.pop(source, None)
+        self._evicted_until.pop(source, None)
+        self._blocks.pop(source, None)
+        self._frame_formats.pop(source, None)
+
+    def bucket_size(self, bit: Bit) -> int:
+        prefix = bit.bytes[: self.get_frame_format(bit.source).prefix_byte_length]
+        return len(self._buckets[bit.source].get(prefix, {}))
+
+    def _get_slots(self, source: str) -> Tuple[np.ndarray, np.ndarray]:
+        """The value and the timestamp of every slot of ``source``, allocated once for a whole day."""
+        if source not in self._values:
+            self._values[source] = np.zeros((self.slot_count, self.get_frame_format(source).byte_length), np.uint8)
+            self._timestamps[source] = np.full(self.slot_count, self.empty_timestamp, dtype=np.int64)
+        return self._values[source], self._timestamps[source]
+
+    def _add_to_bucket(self, source: str, prefix: bytes, timestamp: int) -> None:
+        if prefix not in self._buckets[source] and source in self._blocks:
+            self._add_blocks(source, prefix)
+        self._buckets[source].setdefault(prefix, {})[timestamp] = timestamp % self.slot_count
+
+    def _discard(self, source: str, slot: int) -> None:
+        timestamps = self._timestamps[source]
+        timestamp = int(timestamps[slot])
+        if timestamp == self.empty_timestamp:
+            return
+        timestamps[slot] = self.empty_timestamp
+        prefix = self._values[source][slot, : self.get_frame_format(source).prefix_byte_length].tobytes()
+        bucket = self._buckets[source][prefix]
+        bucket.pop(timestamp, None)
+        if not bucket:
+            del self._buckets[source][prefix]
+            if source in self._blocks:
+                self._remove_blocks(source, prefix)
+
+    def _split_blocks(self, prefix: bytes) -> List[bytes]:
+        block_byte_length = len(prefix) // self.block_count
+        return [prefix[start : start + block_byte_length] for start in range(0, len(prefix), block_byte_length)]
+
+    def _add_blocks(self, source: str, prefix: bytes) -> None:
+        for block_index, block in zip(self._blocks[source], self._split_blocks(prefix), strict=True):
+            block_index.setdefault(block, set()).add(prefix)
+
+    def _remove_blocks(self, source: str, prefix: bytes) -> None:
+        for block_index, block in zip(self._blocks[source], self._split_blocks(prefix), strict=True):
+            prefixes = block_index[block]
+            prefixes.discard(prefix)
+            if not prefixes:
+                del block_index[block]
+
+    def _get_near_prefixes(self, source: str, prefix: bytes, max_prefix_distance: int) -> List[bytes]:
+        if max_prefix_distance > self.max_prefix_distance:
+            raise ValueError(f"Prefix distance {max_prefix_distance} is above {self.max_prefix_distance}")
+        if source not in self._blocks:
+            self._blocks[source] = [{} for _ in range(self.block_count)]
+            for the_prefix in self._buckets[source]:
+                self._add_blocks(source, the_prefix)
+        the_prefixes: Set[bytes] = set()
+        for block_index, block in zip(self._blocks[source], self._split_blocks(prefix), strict=True):
+            the_prefixes.update(block_index.get(block, ()))
+        value = int.from_bytes(prefix, "big")
+        return [
+            the_prefix
+            for the_prefix in the_prefixes
+            if (int.from_bytes(the_prefix, "big") ^ value).bit_count() <= max_prefix_distance
+        ]
@@ -0,0 +1,86 @@
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+from ..models import Score
+
+SortKey = Tuple[float, int, int]
+
+
+class MatchTracker:
+    """In-memory pi notation scores of the last day, kept ordered per source by score then timestamp, descending.
+
+    Scores arrive in timestamp order, so expiry pops from the front of an arrival queue instead of scanning, and
+    the top scores above a threshold are the first entries of the ordered list. The ordered list is a
+    ``SortedList``, so adding or expiring a score is O(log n) and reading the top ``k`` is O(log n + k).
+    """
+
+    no_matched_timestamp = -1
+
+    def __init__(self) -> None:
+        self._ordered: Dict[str, SortedList] = defaultdict(SortedList)
+        self._arrivals: Dict[str, Deque[SortKey]] = defaultdict(deque)
+
+    @classmethod
+    def sort_key(cls, score: Score) -> SortKey:
+        matched_timestamp = cls.no_matched_timestamp if score.matched_timestamp is None else score.matched_timestamp
+        return -score.score, -score.timestamp, matched_timestamp
+
+    def add(self, score: Score) -> None:
+        sort_key = self.sort_key(score)
+        ordered = self._ordered[score.source]
+        if sort_key in ordered:
+            return
+        ordered.add(sort_key)
+        self._arrivals[score.source].append(sort_key)
+
+    def remove_before_timestamp(self, source: str, timestamp: int) -> None:
+        """Drop the scores with ``score.timestamp <= timestamp``."""
+        arrivals = self._arrivals[source]
+        ordered = self._ordered[source]
+        while arrivals and -arrivals[0][1] <= timestamp:
+            ordered.discard(arrivals.popleft())
+
+    def get_scores_larger_than_threshold(self, threshold: float, source: str, limit: int) -> List[Score]:
+        scores = []
+        for negative_score, negative_timestamp, matched_timestamp in self._ordered[source]:
+            if len(scores) >= limit or -negative_score <= threshold:
+                break
+            scores.append(
+                Score(
+                    score=-negative_score,
+                    timestamp=-negative_timestamp,
+                    source=source,
+                    matched_timestamp=self._matched_timestamp(matched_timestamp),
+                )
+            )
+        return scores
+
+    @classmethod
+    def _matched_timestamp(cls, matched_timestamp: int) -> Optional[int]:
+        return None if matched_timestamp == cls.no_matched_timestamp else matched_timestamp
+
+    def get_sources(self) -> List[str]:
+        return [source for source, ordered in self._ordered.items() if ordered]
+
+    def export_source(self, source: str) -> List[Score]:
+        """The scores of ``source`` in arrival order."""
+        return [
+            Score(
+                score=-negative_score,
+                timestamp=-negative_timestamp,
+                source=source,
+                matched_timestamp=self._matched_timestamp(matched_timestamp),
+            )
+            for negative_score, negative_timestamp, matched_timestamp in self._arrivals.get(source, ())
+        ]
+
+    def import_source(self, source: str, scores: List[Score]) -> None:
+        self.remove_source(source)
+        for score in scores:
+            self.add(score)
+
+    def remove_source(self, source: str) -> None:
+        self._ordered.pop(source, None)
+        self._arrivals.pop(source, None)
@@ -0,0 +1,91 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..models import Score
+from . import NotFoundError
+from .redis_unit_of_work import RedisUnitOfWork
+from .score_repository import ScoreRepository
+
+
+class PackedScoreRepository(ScoreRepository):
+    """Scores of one second stored as a single packed array of (matched timestamp, float32 score) records.
+
+    Scores of frames of up to 4096 bits are multiples of 1/4096 below 2048, so float32 holds them exactly. This
+    needs a connection created with ``decode_responses=False``.
+    """
+
+    entity_name = "ScoreVector"
+    record_dtype = np.dtype([("matched_timestamp", "<i8"), ("score", "<f4")])
+    no_matched_timestamp = -1
+
+    def _vector_key(self, timestamp: int, source: str) -> str:
+        return self.entity_name + str(timestamp) + source
+
+    def _pack(self, scores: List[Score]) -> bytes:
+        records = np.empty(len(scores), dtype=self.record_dtype)
+        records["matched_timestamp"] = [
+            self.no_matched_timestamp if score.matched_timestamp is None else score.matched_timestamp
+            for score in scores
+        ]
+        records["score"] = [score.score for score in scores]
+        return records.tobytes()
+
+    def _unpack(self, the_bytes: Optional[bytes], timestamp: int, source: str) -> List[Score]:
+        records = np.frombuffer(the_bytes or b"", dtype=self.record_dtype)
+        return [
+            Score(
+                score=float(score),
+                timestamp=timestamp,
+                source=source,
+                matched_timestamp=None if matched_timestamp == self.no_matched_timestamp else int(matched_timestamp),
+            )
+            for matched_timestamp, score in records.tolist()
+        ]
+
+    async def add(self, score: Score, unit_of_work: Optional[RedisUnitOfWork] = None) -> None:
+        await self.add_many([score], unit_of_work)
+
+    async def add_many(self, scores: List[Score], unit_of_work: Optional[RedisUnitOfWork] = None) -> None:
+        """Write the scores of every second as one packed value, replacing what was stored for that second."""
+        the_unit_of_work = unit_of_work or RedisUnitOfWork(self._redis)
+        vectors: Dict[Tuple[int, str], List[Score]] = defaultdict(list)
+        for score in scores:
+            vectors[(score.timestamp, score.source)].append(score)
+        for (timestamp, source), the_scores in vectors.items():
+            the_unit_of_work.setex(
+                name=self._vector_key(timestamp, source), time=self.expiration_seconds, value=self._pack(the_scores)
+            )
+        if unit_of_work is None:
+            await the_unit_of_work.commit()
+
+    async def get_scores_by_timestamp_and_source(self, timestamp: int, source: str) -> List[Score]:
+        return self._unpack(await self._redis.get(self._vector_key(timestamp, source)), timestamp, source)
+
+    async def get_score_by_timestamp_and_source(
+        self, timestamp: int, source: str, matched_timestamp: Optional[int] = None
+    ) -> Score:
+        for score in reversed(await self.get_scores_by_timestamp_and_source(timestamp, source)):
+            if score.matched_timestamp == matched_timestamp:
+                return score
+        raise NotFoundError(
+            {
+                "entity_name": self.entity_name,
+                "timestamp": timestamp,
+                "matched_timestamp": matched_timestamp,
+                "source": source,
+            }
+        )
+
+    async def get_scores_between_timestamps(self, start: int, end: int, source: str) -> Dict[int, List[Score]]:
+        """Score vectors of every second with ``start <= timestamp < end`` in one MGET."""
+        timestamps = list(range(start, end))
+        if not timestamps:
+            return {}
+        vectors = await self._redis.mget([self._vector_key(timestamp, source) for timestamp in timestamps])
+        return {
+            timestamp: self._unpack(the_bytes, timestamp, source)
+            for timestamp, the_bytes in zip(timestamps, vectors, strict=True)
+            if the_bytes is not None
+        }
@@ -1,4 +1,5 @@
 import asyncio
+from dataclasses import asdict
 from typing import List
 
 from google.cloud import firestore
@@ -9,13 +10,48 @@ from ..models import Score
 class PiNotationScoreRepository:
     expiration_seconds = 60 * 60 * 24  # 1 days
     match_times_length = 10
+    max_batch_size = 500  # Firestore limit of operations per WriteBatch
 
     def __init__(self, firestore_db: firestore.AsyncClient) -> None:
         self._db: firestore.AsyncClient = firestore_db
 
+    @staticmethod
+    def _document_id(score: Score) -> str:
+        if score.matched_timestamp is None:
+            return str(score.timestamp)
+        return f"{score.timestamp}-{score.matched_timestamp}"
+
     async def add(self, score: Score) -> None:
-        doc_ref = self._db.collection(score.source).document(str(score.timestamp))
-        await doc_ref.set(score.model_dump())
+        doc_ref = self._db.collection(score.source).document(self._document_id(score))
+        await doc_ref.set(asdict(score))
+
+    async def add_many(self, scores: List[Score]) -> None:
+        for start in range(0, len(scores), self.max_batch_size):
+            batch = self._db.batch()
+            for score in scores[start : start + self.max_batch_size]:
+                batch.set(self._db.collection(score.source).document(self._document_id(score)), asdict(score))
+            await batch.commit()
+
+    async def delete_scores_before_timestamp_in_batches(self, source: str, timestamp: int) -> int:
+        """Delete the expired scores ``max_batch_size`` at a time, one WriteBatch each, and return how many."""
+        deleted = 0
+        while True:
+            doc_snapshots = [
+                doc_snapshot
+                async for doc_snapshot in self._db.collection(source)
+                .where("timestamp", "<=", timestamp)
+                .limit(self.max_batch_size)
+                .stream()
+            ]
+            if not doc_snapshots:
+                return deleted
+            batch = self._db.batch()
+            for doc_snapshot in doc_snapshots:
+                batch.delete(self._db.collection(source).document(doc_snapshot.id))
+            await batch.commit()
+            deleted += len(doc_snapshots)
+            if len(doc_snapshots) < self.max_batch_size:
+                return deleted
 
     async def delete_scores_before_timestamp(self, source: str, timestamp: int) -> None:
         doc_snapshots = [
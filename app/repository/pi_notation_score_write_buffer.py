@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+
+from ..models import Score
+from .pi_notation_score_repository import PiNotationScoreRepository
+
+
+class PiNotationScoreWriteBuffer:
+    """Write-behind buffer in front of ``PiNotationScoreRepository``.
+
+    Scores are written in WriteBatch commits of up to ``max_batch_size`` operations, every
+    ``flush_interval_seconds`` or as soon as a full batch is pending. Expired scores are deleted in batches by a
+    sweep every ``sweep_interval_seconds``. Nothing of this runs on the request path, unless ``max_pending``
+    scores are buffered: the next ``add`` then flushes inline, so ticks slow down when Firestore falls behind and
+    fail while it is down, instead of the buffer growing without bound.
+    """
+
+    flush_interval_seconds = 1
+    sweep_interval_seconds = 60
+
+    def __init__(self, pi_notation_score_repository: PiNotationScoreRepository, max_pending: int = 10000) -> None:
+        self._repository: PiNotationScoreRepository = pi_notation_score_repository
+        self._max_pending: int = max_pending
+        self._pending: List[Score] = []
+        self._expired_before: Dict[str, int] = {}
+        self._full_batch = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def add(self, score: Score) -> None:
+        if len(self._pending) >= self._max_pending:
+            await self.flush()
+        self._pending.append(score)
+        if len(self._pending) >= self._repository.max_batch_size:
+            self._full_batch.set()
+
+    def expire(self, source: str, timestamp: int) -> None:
+        """Mark the scores of ``source`` with ``score.timestamp <= timestamp`` for the next sweep."""
+        self._expired_before[source] = max(timestamp, self._expired_before.get(source, timestamp))
+
+    async def flush(self) -> None:
+        while self._pending:
+            scores, self._pending = self._pending, []
+            self._full_batch.clear()
+            try:
+                await self._repository.add_many(scores)
+            except Exception:
+                self._pending = scores + self._pending
+                raise
+
+    async def sweep(self) -> None:
+        expired_before, self._expired_before = self._expired_before, {}
+        for source, timestamp in expired_before.items():
+            await self._repository.delete_scores_before_timestamp_in_batches(source, timestamp)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """Stop the background loop and write whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        await self.sweep()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_sweep = loop.time() + self.sweep_interval_seconds
+        while True:
+            try:
+                await asyncio.wait_for(self._full_batch.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+                if loop.time() >= next_sweep:
+                    next_sweep = loop.time() + self.sweep_interval_seconds
+                    await self.sweep()
+            except Exception as e:
+                logging.critical(f"Failed to write pi notation scores to Firestore: Error: {e}")
+
+
+async def init_pi_notation_score_write_buffer(
+    pi_notation_score_repository: PiNotationScoreRepository,
+    max_pending: int = 10000,
+) -> AsyncIterator[PiNotationScoreWriteBuffer]:
+    write_buffer = PiNotationScoreWriteBuffer(pi_notation_score_repository, max_pending)
+    write_buffer.start()
+    yield write_buffer
+    await write_buffer.close()
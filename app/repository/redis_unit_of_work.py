@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any, Callable, List, Optional, Tuple
+
+from aioredis import Redis
+
+
+class RedisUnitOfWork:
+    """Queues Redis commands from several repositories and sends them in one pipelined round trip on ``commit``.
+
+    Reads return a future which is resolved, through its ``parse`` function, once the pipeline is executed.
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self._pipeline = redis.pipeline(transaction=False)
+        self._pending: List[Tuple[asyncio.Future, Optional[Callable[[Any], Any]]]] = []
+        self.round_trips = 0
+
+    def queue(
+        self, command: str, *args: Any, parse: Optional[Callable[[Any], Any]] = None, **kwargs: Any
+    ) -> asyncio.Future:
+        """Queue any pipeline ``command``, e.g. ``queue("setrange", name, offset, value)``."""
+        getattr(self._pipeline, command)(*args, **kwargs)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((future, parse))
+        return future
+
+    def setex(self, name: str, time: int, value: Any) -> asyncio.Future:
+        return self.queue("setex", name=name, time=time, value=value)
+
+    def get(self, name: str, parse: Optional[Callable[[Any], Any]] = None) -> asyncio.Future:
+        return self.queue("get", name, parse=parse)
+
+    async def commit(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            results = await self._pipeline.execute()
+        except Exception:
+            for future, _ in pending:
+                future.cancel()
+            raise
+        finally:
+            self.round_trips += 1
+        for (future, parse), result in zip(pending, results, strict=True):
+            future.set_result(result if parse is None else parse(result))
@@ -1,7 +1,10 @@
+from typing import List, Optional
+
 from aioredis import Redis
 
 from ..models import Score
 from . import NotFoundError
+from .redis_unit_of_work import RedisUnitOfWork
 
 
 class ScoreRepository:
@@ -11,13 +14,37 @@ class ScoreRepository:
     def __init__(self, redis: Redis) -> None:
         self._redis = redis
 
-    async def add(self, score: Score) -> None:
-        await self._redis.setex(
-            name=self.entity_name + str(score.timestamp) + score.source, time=self.expiration_seconds, value=score.score
-        )
+    def _key(self, timestamp: int, source: str, matched_timestamp: Optional[int] = None) -> str:
+        if matched_timestamp is None:
+            return self.entity_name + str(timestamp) + source
+        return self.entity_name + str(timestamp) + ":" + str(matched_timestamp) + source
+
+    async def add(self, score: Score, unit_of_work: Optional[RedisUnitOfWork] = None) -> None:
+        name = self._key(score.timestamp, score.source, score.matched_timestamp)
+        if unit_of_work is not None:
+            unit_of_work.setex(name=name, time=self.expiration_seconds, value=score.score)
+            return
+        await self._redis.setex(name=name, time=self.expiration_seconds, value=score.score)
+
+    async def add_many(self, scores: List[Score], unit_of_work: Optional[RedisUnitOfWork] = None) -> None:
+        """Write ``scores`` in one round trip, or queue them in ``unit_of_work`` when given."""
+        the_unit_of_work = unit_of_work or RedisUnitOfWork(self._redis)
+        for score in scores:
+            await self.add(score, the_unit_of_work)
+        if unit_of_work is None:
+            await the_unit_of_work.commit()
 
-    async def get_score_by_timestamp_and_source(self, timestamp: int, source: str) -> Score:
-        the_score = await self._redis.get(self.entity_name + str(timestamp) + source)
+    async def get_score_by_timestamp_and_source(
+        self, timestamp: int, source: str, matched_timestamp: Optional[int] = None
+    ) -> Score:
+        the_score = await self._redis.get(self._key(timestamp, source, matched_timestamp))
         if the_score is None:
-            raise NotFoundError({"entity_name": self.entity_name, "timestamp": timestamp, "source": source})
-        return Score(score=the_score, source=source, timestamp=timestamp)
+            raise NotFoundError(
+                {
+                    "entity_name": self.entity_name,
+                    "timestamp": timestamp,
+                    "matched_timestamp": matched_timestamp,
+                    "source": source,
+                }
+            )
+        return Score(score=float(the_score), source=source, timestamp=timestamp, matched_timestamp=matched_timestamp)
@@ -0,0 +1,67 @@
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Tuple
+
+
+class ScoreWindow:
+    """In-memory window of the last score vectors of every source.
+
+    A score vector maps the lag ``t - d`` of each scored candidate to ``s_{t,d}``, so the scores of one diagonal
+    ``(t - i, d - i)`` share the same key across consecutive vectors.
+    """
+
+    window_length = 5  # current score and previous 4
+
+    def __init__(self) -> None:
+        self._vectors: Dict[str, Deque[Tuple[int, Dict[int, float]]]] = defaultdict(
+            lambda: deque(maxlen=self.window_length)
+        )
+
+    def add(self, source: str, timestamp: int, scores: Dict[int, float]) -> None:
+        """Store the score vector of ``timestamp``; ``get_products`` multiplies its complete diagonals.
+
+        The vector of the last second is replaced, one of an earlier second is refused instead of dropping the newer
+        ones.
+        """
+        vectors = self._vectors[source]
+        if vectors and vectors[-1][0] > timestamp:
+            raise ValueError(f"Score vector of {timestamp} is older than the last one, of {vectors[-1][0]}")
+        if vectors and vectors[-1][0] == timestamp:
+            vectors.pop()
+        vectors.append((timestamp, scores))
+
+    def is_complete(self, source: str, timestamp: int) -> bool:
+        """Whether the window holds the score vectors of the last ``window_length`` seconds up to ``timestamp``."""
+        vectors = self._vectors[source]
+        if len(vectors) < self.window_length or vectors[-1][0] != timestamp:
+            return False
+        return vectors[0][0] == timestamp - self.window_length + 1  # a gap in the last seconds breaks every diagonal
+
+    def get_products(self, source: str, timestamp: int) -> Dict[int, float]:
+        if not self.is_complete(source, timestamp):
+            return {}
+
+        vectors = self._vectors[source]
+        current_scores = vectors[-1][1]
+        previous_vectors = [vectors[i][1] for i in range(self.window_length - 1)]
+        products: Dict[int, float] = {}
+        for lag, score in current_scores.items():
+            product = score
+            for previous_scores in previous_vectors:
+                product *= previous_scores.get(lag, 0)
+                if not product:
+                    break
+            if product:
+                products[lag] = product
+        return products
+
+    def get_sources(self) -> List[str]:
+        return [source for source, vectors in self._vectors.items() if vectors]
+
+    def export_source(self, source: str) -> List[Tuple[int, Dict[int, float]]]:
+        return list(self._vectors.get(source, ()))
+
+    def import_source(self, source: str, vectors: List[Tuple[int, Dict[int, float]]]) -> None:
+        self._vectors[source] = deque(vectors, maxlen=self.window_length)
+
+    def remove_source(self, source: str) -> None:
+        self._vectors.pop(source, None)
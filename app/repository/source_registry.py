@@ -0,0 +1,22 @@
+from typing import Dict, List, Optional
+
+from ..models import ReportRequestBody
+
+
+class SourceRegistry:
+    """In-memory registry of the sources ticked by the scheduler."""
+
+    def __init__(self) -> None:
+        self._sources: Dict[str, ReportRequestBody] = {}
+
+    def register(self, request_body: ReportRequestBody) -> None:
+        self._sources[request_body.source] = request_body
+
+    def unregister(self, source: str) -> Optional[ReportRequestBody]:
+        return self._sources.pop(source, None)
+
+    def get(self, source: str) -> Optional[ReportRequestBody]:
+        return self._sources.get(source)
+
+    def get_all(self) -> List[ReportRequestBody]:
+        return list(self._sources.values())
@@ -0,0 +1,74 @@
+import mmap
+import os
+import struct
+from typing import List
+
+import numpy as np
+
+from ..models import SourceState
+
+
+class SourceStateSnapshot:
+    """Binary file of the in-memory state of many sources.
+
+    After a ``header``, every source is a ``record_header`` followed by the JSON of its small state (registration,
+    score window, matches), the int64 timestamps of its comparison values and the raw comparison values. The
+    file is read through a memory map, so the day window of a source is sliced out without being parsed.
+    """
+
+    magic = b"SRCSTAT1"
+    header = struct.Struct("<8sI")  # magic, number of sources
+    record_header = struct.Struct("<IQQ")  # JSON state length, number of comparison values, their total length
+    timestamp_dtype = np.dtype("<i8")
+
+    def __init__(self, path: str) -> None:
+        self._path: str = path
+
+    def save(self, states: List[SourceState]) -> None:
+        """Write ``states`` to a temporary file moved over the snapshot, so a crash never leaves half a snapshot."""
+        temporary_path = self._path + ".tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(self.header.pack(self.magic, len(states)))
+            for state in states:
+                the_json = state.model_dump_json(exclude={"comparison_timestamps", "comparison_values"}).encode()
+                file.write(
+                    self.record_header.pack(
+                        len(the_json), len(state.comparison_timestamps), len(state.comparison_values)
+                    )
+                )
+                file.write(the_json)
+                file.write(np.asarray(state.comparison_timestamps, dtype=self.timestamp_dtype).tobytes())
+                file.write(state.comparison_values)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self._path)
+
+    def load(self) -> List[SourceState]:
+        """The states of the snapshot, none when there is no snapshot yet."""
+        if not os.path.exists(self._path) or not os.path.getsize(self._path):
+            return []
+        with open(self._path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as the_mmap:
+            try:
+                magic, count = self.header.unpack_from(the_mmap, 0)
+                if magic != self.magic:
+                    raise ValueError(f"{self._path} is not a source state snapshot")
+                offset = self.header.size
+                states: List[SourceState] = []
+                for _ in range(count):
+                    json_length, value_count, values_length = self.record_header.unpack_from(the_mmap, offset)
+                    offset += self.record_header.size
+                    timestamps_offset = offset + json_length
+                    values_offset = timestamps_offset + value_count * self.timestamp_dtype.itemsize
+                    end = values_offset + values_length
+                    if end > len(the_mmap):
+                        raise ValueError(f"{self._path} is truncated")
+                    state = SourceState.model_validate_json(the_mmap[offset:timestamps_offset])
+                    state.comparison_timestamps = np.frombuffer(
+                        the_mmap[timestamps_offset:values_offset], dtype=self.timestamp_dtype
+                    ).tolist()
+                    state.comparison_values = the_mmap[values_offset:end]
+                    states.append(state)
+                    offset = end
+            except struct.error as e:
+                raise ValueError(f"{self._path} is truncated") from e
+            return states
@@ -1,22 +1,52 @@
-from ..models import Bit
+import asyncio
+import struct
+from typing import List, Optional, Tuple
+
+from ..models import Bit, FrameFormat
 from ..repository import NotFoundError
 from ..repository.bit_repository import BitRepository
+from ..repository.redis_unit_of_work import RedisUnitOfWork
 
 
 class BitService:
     timestamp_interval = 1  # one second
-    byte_length = 1024 / 8
+    frame_format = FrameFormat()
+    timestamp_header = struct.Struct(">q")  # big-endian timestamp in front of every streamed frame
 
     def __init__(self, bit_repository: BitRepository) -> None:
         self._repository: BitRepository = bit_repository
 
-    async def save_bit(self, bytes: bytes, timestamp: int, source: str) -> Bit:
-        if len(bytes) != self.byte_length:
-            raise ValueError(f"Incorrect byte length {len(bytes)}. Correct byte length {self.byte_length}")
+    async def save_bit(
+        self,
+        bytes: bytes,
+        timestamp: int,
+        source: str,
+        unit_of_work: Optional[RedisUnitOfWork] = None,
+        frame_format: Optional[FrameFormat] = None,
+    ) -> Bit:
+        byte_length = (frame_format or self.frame_format).byte_length
+        if len(bytes) != byte_length:
+            raise ValueError(f"Incorrect byte length {len(bytes)}. Correct byte length {byte_length}")
         the_bit = Bit(bytes=bytes, timestamp=timestamp, source=source)
-        await self._repository.add(the_bit)
+        await self._repository.add(the_bit, unit_of_work)
         return the_bit
 
+    @classmethod
+    def split_timestamped_frames(
+        cls, payload: bytes, frame_format: Optional[FrameFormat] = None
+    ) -> List[Tuple[int, bytes]]:
+        """Split ``payload`` of concatenated ``(timestamp, frame)`` records into ``(timestamp, frame)`` pairs."""
+        record_length = cls.timestamp_header.size + (frame_format or cls.frame_format).byte_length
+        if not payload or len(payload) % record_length:
+            raise ValueError(f"Incorrect payload length {len(payload)}. Correct length a multiple of {record_length}")
+        return [
+            (
+                cls.timestamp_header.unpack_from(payload, offset)[0],
+                payload[offset + cls.timestamp_header.size : offset + record_length],
+            )
+            for offset in range(0, len(payload), record_length)
+        ]
+
     async def previous_bit_exists(self, current_bit: Bit) -> bool:
         previous_timestamp = current_bit.timestamp - self.timestamp_interval
         source = current_bit.source
@@ -26,6 +56,11 @@ class BitService:
             return False
         return True
 
+    def queue_previous_bit(self, current_bit: Bit, unit_of_work: RedisUnitOfWork) -> asyncio.Future:
+        """Queue the read of the previous bit in ``unit_of_work``, resolving to ``None`` if it does not exist."""
+        previous_timestamp = current_bit.timestamp - self.timestamp_interval
+        return self._repository.queue_get_bit(previous_timestamp, current_bit.source, unit_of_work)
+
     async def get_previous_bit(self, current_bit: Bit) -> Bit:
         previous_timestamp = current_bit.timestamp - self.timestamp_interval
         source = current_bit.source
@@ -1,10 +1,13 @@
-import asyncio
+from typing import List, Optional
 
 from bitarray import bitarray
 
-from ..models import Bit
+from ..models import Bit, FrameFormat
+from ..repository.comparison_bit_index import ComparisonBitIndex
 from ..repository.comparison_bit_repository import ComparisonBitRepository
+from ..repository.redis_unit_of_work import RedisUnitOfWork
 from .bit_service import BitService
+from .compute_executor import ComputeExecutor
 
 
 def bytes_to_bitarray(the_bytes: bytes) -> bitarray:
@@ -22,9 +25,36 @@ def xor_bytes(byte1: bytes, byte2: bytes) -> bytes:
 class ComparisonBitService(BitService):
     timestamp_interval = 60 * 60 * 24  # total seconds of one day
 
-    @staticmethod
-    async def compute_comparison_value(current_bit: Bit, previous_bit: Bit) -> bytes:
-        return await asyncio.to_thread(xor_bytes, current_bit.bytes, previous_bit.bytes)
+    async def compute_comparison_value(self, current_bit: Bit, previous_bit: Bit) -> bytes:
+        return await self._executor.run(xor_bytes, current_bit.bytes, previous_bit.bytes)
 
-    def __init__(self, comparison_bit_repository: ComparisonBitRepository) -> None:
+    def __init__(
+        self,
+        comparison_bit_repository: ComparisonBitRepository,
+        comparison_bit_index: Optional[ComparisonBitIndex] = None,
+        compute_executor: Optional[ComputeExecutor] = None,
+    ) -> None:
         self._repository: ComparisonBitRepository = comparison_bit_repository
+        self._index: ComparisonBitIndex = comparison_bit_index or ComparisonBitIndex()
+        self._executor: ComputeExecutor = compute_executor or ComputeExecutor()
+
+    async def save_bit(
+        self,
+        bytes: bytes,
+        timestamp: int,
+        source: str,
+        unit_of_work: Optional[RedisUnitOfWork] = None,
+        frame_format: Optional[FrameFormat] = None,
+    ) -> Bit:
+        frame_format = frame_format or self.frame_format
+        the_bit = await super().save_bit(bytes, timestamp, source, unit_of_work, frame_format)
+        self._index.set_frame_format(source, frame_format)
+        self._index.add(the_bit)
+        return the_bit
+
+    async def get_candidate_bits(self, current_bit: Bit, max_prefix_distance: int = 0) -> List[Bit]:
+        """Comparison values of the past day sharing the exact-match prefix of ``current_bit``.
+
+        A ``max_prefix_distance`` also returns those whose prefix differs in that many bits or less.
+        """
+        return self._index.get_candidate_bits(current_bit, max_prefix_distance)
@@ -0,0 +1,49 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+async def init_compute_executor(
+    policy: str, inline_max_cost: int, process_pool_size: int, process_min_cost: int
+) -> AsyncIterator["ComputeExecutor"]:
+    process_pool = ProcessPoolExecutor(max_workers=process_pool_size) if process_pool_size > 0 else None
+    yield ComputeExecutor(policy, inline_max_cost, process_pool, process_min_cost)
+    if process_pool is not None:
+        process_pool.shutdown(wait=True, cancel_futures=True)
+
+
+class ComputeExecutor:
+    """Runs CPU-bound work inline, on the default thread pool or in a process pool, by its estimated ``cost``.
+
+    A thread hop costs more than xor-ing two frames or scoring a hundred candidates (see
+    ``test_compute_executor_benchmarks``), so the ``auto`` policy runs such work inline and only offloads
+    larger batches. Batches of at least ``process_min_cost`` go to the process pool, when there is one, to use
+    more than one core. ``inline`` and ``thread`` pin every call to one place.
+    """
+
+    policies = ("auto", "inline", "thread")
+
+    def __init__(
+        self,
+        policy: str = "auto",
+        inline_max_cost: int = 100,
+        process_pool: Optional[ProcessPoolExecutor] = None,
+        process_min_cost: int = 10000,
+    ) -> None:
+        if policy not in self.policies:
+            raise ValueError(f"Unknown compute policy {policy}. Known policies {self.policies}")
+        self._policy: str = policy
+        self._inline_max_cost: int = inline_max_cost
+        self._process_pool: Optional[ProcessPoolExecutor] = process_pool
+        self._process_min_cost: int = process_min_cost
+
+    async def run(self, function: Callable[..., T], *args, cost: int = 0) -> T:
+        """Run ``function(*args)``; with a process pool, ``function`` and ``args`` must be picklable."""
+        if self._policy == "inline" or (self._policy == "auto" and cost <= self._inline_max_cost):
+            return function(*args)
+        if self._process_pool is not None and cost >= self._process_min_cost:
+            return await asyncio.get_running_loop().run_in_executor(self._process_pool, partial(function, *args))
+        return await asyncio.to_thread(function, *args)
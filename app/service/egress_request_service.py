@@ -1,15 +1,56 @@
 import logging
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 
 import aiohttp
 
-from ..models import ReportInfo
+from ..models import ReportInfo, SourceState
+from .metrics_service import MetricsService
+
+
+async def init_http_session(
+    limit: int,
+    limit_per_host: int,
+    keepalive_timeout: float,
+    dns_cache_ttl: int,
+    total_timeout: float,
+    connect_timeout: float,
+) -> AsyncIterator[aiohttp.ClientSession]:
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        use_dns_cache=True,
+        ttl_dns_cache=dns_cache_ttl,
+    )
+    session = aiohttp.ClientSession(
+        connector=connector, timeout=aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+    )
+    yield session
+    await session.close()
 
 
 class EgressRequestService:
+    handoff_timeout_seconds = 60  # a day of comparison values is far larger than a report
+
+    def __init__(
+        self, http_session: Optional[aiohttp.ClientSession] = None, metrics_service: Optional[MetricsService] = None
+    ) -> None:
+        """Requests go through ``http_session`` when given, otherwise through a new session per request."""
+        self._http_session: Optional[aiohttp.ClientSession] = http_session
+        self._metrics_service: Optional[MetricsService] = metrics_service
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[aiohttp.ClientSession]:
+        if self._http_session is not None:
+            yield self._http_session
+        else:
+            async with aiohttp.ClientSession() as session:
+                yield session
+
     async def fetch_current_bytes(self, url: str) -> Optional[bytes]:
         try:
-            async with aiohttp.ClientSession() as session:
+            async with self._session() as session:
                 async with session.get(url) as response:
                     if response.status == 200:
                         return await response.read()
@@ -18,15 +59,40 @@ class EgressRequestService:
         except Exception as e:
             logging.critical(f"Failed to retrieve byte data: Error: {e}")
 
-    async def send_report(self, url: str, report_info: ReportInfo) -> None:
+    async def post_report(self, url: str, report_info: ReportInfo) -> bool:
+        """Post ``report_info`` to ``url`` once; whether the reporting service accepted it."""
         try:
-            async with aiohttp.ClientSession() as session:
+            async with self._session() as session:
                 async with session.post(
                     url, json=report_info.model_dump(), headers={"Content-Type": "application/json"}
                 ) as response:
                     if response.status == 200:
                         logging.info(f"Report sent successfully: {report_info}")
-                    else:
-                        raise ValueError(f"Failed to send report. Status code: {response.status}")
+                        return True
+                    raise ValueError(f"Failed to send report. Status code: {response.status}")
+        except Exception as e:
+            logging.warning(f"Failed to send report. Error: {e}")
+        return False
+
+    async def send_report(self, url: str, report_info: ReportInfo) -> None:
+        if not await self.post_report(url, report_info):
+            logging.critical(f"Failed to send report: {report_info}")
+            if self._metrics_service is not None:
+                self._metrics_service.count_report_failure(report_info.channel)
+
+    async def send_source_state(self, url: str, state: SourceState) -> bool:
+        """Hand ``state`` off to the member at base ``url``; whether it was accepted."""
+        try:
+            async with self._session() as session:
+                async with session.post(
+                    f"{url}/shards/handoff",
+                    data=state.model_dump_json(),
+                    headers={"Content-Type": "application/json"},
+                    timeout=aiohttp.ClientTimeout(total=self.handoff_timeout_seconds),
+                ) as response:
+                    if response.status == 200:
+                        return True
+                    raise ValueError(f"Failed to hand off source state. Status code: {response.status}")
         except Exception as e:
-            logging.critical(f"Failed to send report. Status code: {e}")
+            logging.critical(f"Failed to hand off source state. Error: {e}")
+        return False
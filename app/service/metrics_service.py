@@ -0,0 +1,128 @@
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+
+class MetricsService:
+    """Per-stage tick latencies and pipeline failure counters of every source, in Prometheus text format.
+
+    A stage shared by a batch of sources, e.g. one Redis round trip, is observed once for each of them.
+    """
+
+    content_type = CONTENT_TYPE_LATEST
+    stage_buckets = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+    lag_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, registry: Optional[CollectorRegistry] = None) -> None:
+        self.registry: CollectorRegistry = registry or CollectorRegistry()
+        self._stage_seconds = Histogram(
+            "tick_stage_seconds",
+            "Latency of each stage of a tick",
+            ["stage", "source"],
+            buckets=self.stage_buckets,
+            registry=self.registry,
+        )
+        self._dropped_frames = Counter(
+            "dropped_frames", "Ticks without a frame from the source", ["source"], registry=self.registry
+        )
+        self._broken_chains = Counter(
+            "broken_chains",
+            "Ticks missing the previous bit, or a full window of scores, to chain onto",
+            ["source", "link"],
+            registry=self.registry,
+        )
+        self._report_failures = Counter(
+            "report_failures", "Reports the reporting service did not accept", ["source"], registry=self.registry
+        )
+
+        self._report_retries = Counter(
+            "report_retries", "Report deliveries retried after a failure", ["source"], registry=self.registry
+        )
+        self._skipped_reports = Counter(
+            "skipped_reports",
+            "Reports not sent as their matches were already delivered",
+            ["source"],
+            registry=self.registry,
+        )
+        self._report_queue_depth = Gauge(
+            "report_queue_depth", "Reports queued or being delivered", registry=self.registry
+        )
+        self._report_lag_seconds = Histogram(
+            "report_delivery_lag_seconds",
+            "Time from queueing a report to its delivery",
+            ["source"],
+            buckets=self.lag_buckets,
+            registry=self.registry,
+        )
+        self._coalesced_ticks = Counter(
+            "coalesced_ticks",
+            "Ticks answered by a running tick of the same second, or from the cache",
+            ["source", "by"],
+            registry=self.registry,
+        )
+        self._skipped_ticks = Counter(
+            "skipped_ticks",
+            "Scheduled ticks skipped as the previous tick of the source was still running",
+            ["source"],
+            registry=self.registry,
+        )
+        self._evaluated_candidates = Counter(
+            "evaluated_candidates",
+            "Candidates and pi notation scores checked against the threshold of their source",
+            ["source", "stage"],
+            registry=self.registry,
+        )
+        self._pruned_candidates = Counter(
+            "pruned_candidates",
+            "Candidates and pi notation scores dropped as unable to be reported",
+            ["source", "stage"],
+            registry=self.registry,
+        )
+
+    def observe_stage(self, stage: str, seconds: float, sources: Iterable[str]) -> None:
+        for source in sources:
+            self._stage_seconds.labels(stage, source).observe(seconds)
+
+    @contextmanager
+    def time_stage(self, stage: str, *sources: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - start, sources)
+
+    def count_dropped_frame(self, source: str) -> None:
+        self._dropped_frames.labels(source).inc()
+
+    def count_broken_chain(self, source: str, link: str) -> None:
+        self._broken_chains.labels(source, link).inc()
+
+    def count_report_failure(self, source: str) -> None:
+        self._report_failures.labels(source).inc()
+
+    def count_report_retry(self, source: str) -> None:
+        self._report_retries.labels(source).inc()
+
+    def count_skipped_report(self, source: str) -> None:
+        self._skipped_reports.labels(source).inc()
+
+    def set_report_queue_depth(self, depth: int) -> None:
+        self._report_queue_depth.set(depth)
+
+    def observe_report_lag(self, source: str, seconds: float) -> None:
+        self._report_lag_seconds.labels(source).observe(seconds)
+
+    def count_coalesced_tick(self, source: str, by: str) -> None:
+        self._coalesced_ticks.labels(source, by).inc()
+
+    def count_skipped_tick(self, source: str) -> None:
+        self._skipped_ticks.labels(source).inc()
+
+    def count_pruning(self, source: str, stage: str, evaluated: int, pruned: int) -> None:
+        self._evaluated_candidates.labels(source, stage).inc(evaluated)
+        self._pruned_candidates.labels(source, stage).inc(pruned)
+
+    def export(self) -> bytes:
+        return generate_latest(self.registry)
@@ -1,8 +1,11 @@
-import asyncio
-from typing import List
+import heapq
+from typing import List, Optional
 
 from ..models import Score
+from ..repository.match_tracker import MatchTracker
 from ..repository.pi_notation_score_repository import PiNotationScoreRepository
+from ..repository.pi_notation_score_write_buffer import PiNotationScoreWriteBuffer
+from .compute_executor import ComputeExecutor
 
 
 def compute_pi_notation_score(scores: List[Score]) -> float:
@@ -16,23 +19,64 @@ def compute_pi_notation_score(scores: List[Score]) -> float:
 class PiNotationScoreService:
     match_times_length = 10
 
-    @staticmethod
-    async def compute_pi_notation_score(scores: List[Score]) -> float:
-        return await asyncio.to_thread(compute_pi_notation_score, scores)
+    async def compute_pi_notation_score(self, scores: List[Score]) -> float:
+        return await self._executor.run(compute_pi_notation_score, scores)
 
-    def __init__(self, pi_notation_score_repository: PiNotationScoreRepository) -> None:
+    def __init__(
+        self,
+        pi_notation_score_repository: PiNotationScoreRepository,
+        match_tracker: Optional[MatchTracker] = None,
+        write_buffer: Optional[PiNotationScoreWriteBuffer] = None,
+        compute_executor: Optional[ComputeExecutor] = None,
+    ) -> None:
+        """``match_tracker`` answers matches from memory, ``write_buffer`` moves Firestore writes off the request."""
         self._repository: PiNotationScoreRepository = pi_notation_score_repository
+        self._match_tracker: Optional[MatchTracker] = match_tracker
+        self._write_buffer: Optional[PiNotationScoreWriteBuffer] = write_buffer
+        self._executor: ComputeExecutor = compute_executor or ComputeExecutor()
 
-    async def save_score(self, score: float, timestamp: int, source: str) -> Score:
-        the_score = Score(score=score, timestamp=timestamp, source=source)
-        await self._repository.add(the_score)
+    async def save_score(
+        self, score: float, timestamp: int, source: str, matched_timestamp: Optional[int] = None
+    ) -> Score:
+        the_score = Score(score=score, timestamp=timestamp, source=source, matched_timestamp=matched_timestamp)
+        if self._match_tracker is not None:
+            self._match_tracker.add(the_score)
+        if self._write_buffer is not None:
+            await self._write_buffer.add(the_score)
+        else:
+            await self._repository.add(the_score)
         return the_score
 
+    @classmethod
+    def get_best_scores(cls, scores: List[Score], threshold: float) -> List[Score]:
+        """The ``match_times_length`` best of one second's ``scores`` above ``threshold``, ordered like ``MatchTracker``.
+
+        The other scores of the second expire together with these, so they can never be reported.
+        """
+        return heapq.nsmallest(
+            cls.match_times_length,
+            (score for score in scores if score.score > threshold),
+            key=MatchTracker.sort_key,
+        )
+
     async def remove_expired_pi_notation_scores(self, source: str, previous_day_timestamp: int) -> None:
-        await self._repository.delete_scores_before_timestamp(source, previous_day_timestamp)
+        if self._match_tracker is not None:
+            self._match_tracker.remove_before_timestamp(source, previous_day_timestamp)
+        if self._write_buffer is not None:
+            self._write_buffer.expire(source, previous_day_timestamp)
+        else:
+            await self._repository.delete_scores_before_timestamp(source, previous_day_timestamp)
 
     async def get_match_times(self, threshold: float, source: int) -> List[int]:
-        match_scores: List[Score] = await self._repository.get_scores_larger_than_threshold(
-            threshold, source, self.match_times_length
-        )
-        return [match_score.timestamp for match_score in match_scores]
+        if self._match_tracker is None:
+            match_scores: List[Score] = await self._repository.get_scores_larger_than_threshold(
+                threshold, source, self.match_times_length
+            )
+        else:
+            match_scores = self._match_tracker.get_scores_larger_than_threshold(
+                threshold, source, self.match_times_length
+            )
+        return [
+            match_score.timestamp if match_score.matched_timestamp is None else match_score.matched_timestamp
+            for match_score in match_scores
+        ]
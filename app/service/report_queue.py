@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from ..models import ReportInfo
+from .egress_request_service import EgressRequestService
+from .metrics_service import MetricsService
+
+
+class ReportQueue:
+    """Bounded background delivery of reports, so a tick returns as soon as its matches are computed.
+
+    At most ``max_size`` reports are queued or being delivered; ``put`` waits for room, which pushes back on the
+    ticks when the reporting services fall behind. Each ``reporting_url`` gets at most
+    ``max_concurrency_per_destination`` deliveries at once, and a failed delivery is retried up to
+    ``max_attempts`` times with full-jitter exponential backoff. With ``skip_unchanged``, a report is dropped when
+    its ``match_times`` are those last delivered for its channel to the same destination.
+    """
+
+    backoff_base_seconds = 0.1
+    backoff_max_seconds = 5
+
+    def __init__(
+        self,
+        egress_request_service: EgressRequestService,
+        metrics_service: Optional[MetricsService] = None,
+        max_size: int = 10000,
+        max_concurrency_per_destination: int = 4,
+        max_attempts: int = 5,
+        skip_unchanged: bool = False,
+        jitter: Callable[[], float] = random.random,
+    ) -> None:
+        self._egress_request_service: EgressRequestService = egress_request_service
+        self._metrics_service: MetricsService = metrics_service or MetricsService()
+        self._capacity = asyncio.Semaphore(max_size)
+        self._max_concurrency_per_destination: int = max_concurrency_per_destination
+        self._max_attempts: int = max_attempts
+        self._skip_unchanged: bool = skip_unchanged
+        self._jitter: Callable[[], float] = jitter
+        self._destinations: Dict[str, asyncio.Semaphore] = {}
+        self._delivered: Dict[Tuple[str, str], List[int]] = {}
+        self._deliveries: Set[asyncio.Task] = set()
+
+    @property
+    def depth(self) -> int:
+        return len(self._deliveries)
+
+    async def put(self, url: str, report_info: ReportInfo) -> None:
+        """Queue ``report_info`` for ``url``, waiting while the queue is full."""
+        await self._capacity.acquire()
+        delivery = asyncio.ensure_future(self._deliver(url, report_info, time.perf_counter()))
+        self._deliveries.add(delivery)
+        self._metrics_service.set_report_queue_depth(self.depth)
+        delivery.add_done_callback(self._finish)
+
+    async def close(self) -> None:
+        """Wait until every queued report is delivered or given up on."""
+        await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+    def _finish(self, delivery: asyncio.Task) -> None:
+        self._deliveries.discard(delivery)
+        self._capacity.release()
+        self._metrics_service.set_report_queue_depth(self.depth)
+
+    async def _deliver(self, url: str, report_info: ReportInfo, queued_at: float) -> None:
+        destination = self._destinations.setdefault(url, asyncio.Semaphore(self._max_concurrency_per_destination))
+        key = (url, report_info.channel)
+        for attempt in range(self._max_attempts):
+            async with destination:
+                if self._skip_unchanged and self._delivered.get(key) == report_info.match_times:
+                    self._metrics_service.count_skipped_report(report_info.channel)
+                    return
+                if await self._egress_request_service.post_report(url, report_info):
+                    self._delivered[key] = report_info.match_times
+                    self._metrics_service.observe_report_lag(report_info.channel, time.perf_counter() - queued_at)
+                    return
+            if attempt + 1 < self._max_attempts:
+                self._metrics_service.count_report_retry(report_info.channel)
+                backoff = min(self.backoff_max_seconds, self.backoff_base_seconds * 2**attempt)
+                await asyncio.sleep(self._jitter() * backoff)
+        logging.critical(f"Gave up sending report after {self._max_attempts} attempts: {report_info}")
+        self._metrics_service.count_report_failure(report_info.channel)
+
+
+async def init_report_queue(
+    egress_request_service: EgressRequestService,
+    metrics_service: MetricsService,
+    max_size: int,
+    max_concurrency_per_destination: int,
+    max_attempts: int,
+    skip_unchanged: bool,
+) -> AsyncIterator[ReportQueue]:
+    report_queue = ReportQueue(
+        egress_request_service, metrics_service, max_size, max_concurrency_per_destination, max_attempts, skip_unchanged
+    )
+    yield report_queue
+    await report_queue.close()
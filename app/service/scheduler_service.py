@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from ..models import ReportInfo, ReportRequestBody
+from ..repository.source_registry import SourceRegistry
+from .metrics_service import MetricsService
+
+Tick = Callable[[ReportRequestBody], Awaitable[ReportInfo]]
+
+
+class SchedulerService:
+    """Ticks every registered source on each second boundary.
+
+    The next boundary is recomputed from the wall clock on every cycle, so a slow cycle never shifts the
+    following ones. At most ``max_concurrency`` ticks run at once, and a source whose previous tick is still
+    running skips the current second, counted in ``skipped_ticks_total``.
+    """
+
+    interval_seconds = 1
+
+    def __init__(
+        self, source_registry: SourceRegistry, max_concurrency: int, metrics_service: Optional[MetricsService] = None
+    ) -> None:
+        self._registry: SourceRegistry = source_registry
+        self._metrics_service: MetricsService = metrics_service or MetricsService()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._running: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, tick: Tick) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run(tick))
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    async def _run(self, tick: Tick) -> None:
+        last_boundary = None
+        while True:
+            now = time.time()
+            boundary = math.floor(now / self.interval_seconds + 1) * self.interval_seconds
+            if boundary == last_boundary:  # woke up early, the boundary was already ticked
+                boundary += self.interval_seconds
+            await asyncio.sleep(boundary - now)
+            last_boundary = boundary
+            for request_body in self._registry.get_all():
+                if request_body.source in self._running:
+                    self._metrics_service.count_skipped_tick(request_body.source)
+                    logging.warning(f"Skipped tick of {request_body.source}: previous tick still running")
+                    continue
+                self._running[request_body.source] = asyncio.ensure_future(self._tick(tick, request_body))
+
+    async def _tick(self, tick: Tick, request_body: ReportRequestBody) -> None:
+        try:
+            async with self._semaphore:
+                await tick(request_body)
+        except Exception as e:
+            logging.critical(f"Failed to tick {request_body.source}: Error: {e}")
+        finally:
+            self._running.pop(request_body.source, None)
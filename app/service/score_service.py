@@ -1,11 +1,15 @@
-import asyncio
-from typing import List
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
+import numpy as np
 from bitarray import bitarray
 
-from ..models import Bit, Score
-from ..repository import NotFoundError
+from ..models import Bit, FrameFormat, Score
+from ..repository.packed_score_repository import PackedScoreRepository
+from ..repository.redis_unit_of_work import RedisUnitOfWork
 from ..repository.score_repository import ScoreRepository
+from ..repository.score_window import ScoreWindow
+from .compute_executor import ComputeExecutor
 
 
 def bytes_to_bitarray(the_bytes: bytes) -> bitarray:
@@ -21,55 +25,227 @@ def compute_score(current: bitarray, previous: bitarray, first_n: int, total_n:
 
     score = 0.0
     for i in range(total_n - first_n):
-        score += (1024 - i) / 1024 * (current[i + first_n] == previous[i + first_n])
+        score += (total_n - i) / total_n * (current[i + first_n] == previous[i + first_n])
     return score
 
 
+@lru_cache(maxsize=None)
+def bit_weights(first_n: int, total_n: int) -> np.ndarray:
+    """Weight of every bit after the prefix, in units of 1/total_n.
+
+    The weights are integers summing to less than 2**24 for frames of up to 4096 bits, so float32 matrix
+    products of them are exact and go through BLAS.
+    """
+    return (total_n - np.arange(total_n - first_n)).astype(np.float32)
+
+
+def bits_to_matrix(bits: List[Bit]) -> np.ndarray:
+    if not bits:
+        return np.empty((0, 0), dtype=np.uint8)
+    return np.frombuffer(b"".join(bit.bytes for bit in bits), dtype=np.uint8).reshape(len(bits), -1)
+
+
+chunk_count = 6  # bound checks over the tail, chunks are wider for wider frames
+
+
+def max_score(first_n: int, total_n: int) -> float:
+    """Score of two values equal on every bit."""
+    return float(bit_weights(first_n, total_n).sum(dtype=np.float64) / total_n)
+
+
+def compute_scores(
+    current: bytes,
+    candidates: np.ndarray,
+    first_n: int,
+    total_n: int,
+    floor: Optional[float] = None,
+    max_prefix_distance: int = 0,
+) -> np.ndarray:
+    """Batched ``compute_score`` of one value against an N x (total_n / 8) byte matrix of candidates.
+
+    With a ``floor``, the tail is compared in ``chunk_count`` chunks, heaviest first, and a candidate is
+    dropped with a score of 0 as soon as its partial score plus the weight left after the chunk cannot exceed it.
+    With a ``max_prefix_distance``, candidates whose prefix differs in that many bits or less are scored on
+    their tail too.
+    """
+    prefix_length = first_n // 8
+    current_array = np.frombuffer(current, dtype=np.uint8)
+    if max_prefix_distance:
+        prefix_distances = np.unpackbits(candidates[:, :prefix_length] ^ current_array[:prefix_length], axis=1)
+        prefix_matches = prefix_distances.sum(axis=1) <= max_prefix_distance
+    else:
+        word = np.uint64 if prefix_length % 8 == 0 else np.uint8
+        prefix_matches = (candidates[:, :prefix_length].view(word) == current_array[:prefix_length].view(word)).all(
+            axis=1
+        )
+
+    scores = np.zeros(len(candidates))
+    matched_rows = np.flatnonzero(prefix_matches)
+    if not matched_rows.size:
+        return scores
+    weights = bit_weights(first_n, total_n)
+    if floor is None:
+        equal_bits = np.unpackbits(~(candidates[matched_rows, prefix_length:] ^ current_array[prefix_length:]), axis=1)
+        scores[matched_rows] = equal_bits @ weights
+        scores[matched_rows] /= total_n
+        return scores
+
+    # weight of the tail from each byte on
+    remaining_weights = np.append(np.cumsum(weights[::-1], dtype=np.float64)[::-1][::8], 0)
+    tail_length = len(weights) // 8
+    chunk_length = -(-tail_length // chunk_count)
+    partial_scores = np.zeros(len(matched_rows))
+    alive = np.arange(len(matched_rows))
+    for start in range(0, tail_length, chunk_length):
+        end = min(start + chunk_length, tail_length)
+        columns = slice(prefix_length + start, prefix_length + end)
+        equal_bits = np.unpackbits(~(candidates[matched_rows[alive], columns] ^ current_array[columns]), axis=1)
+        partial_scores[alive] += equal_bits @ weights[start * 8 : end * 8]
+        alive = alive[partial_scores[alive] + remaining_weights[end] > floor * total_n]
+        if not alive.size:
+            break
+    scores[matched_rows[alive]] = partial_scores[alive] / total_n
+    return scores
+
+
+def compute_scores_many(
+    batches: List[Tuple[bytes, np.ndarray]],
+    first_n: int,
+    total_n: int,
+    floors: Optional[List[Optional[float]]] = None,
+    max_prefix_distances: Optional[List[int]] = None,
+    bit_lengths: Optional[List[Tuple[int, int]]] = None,
+) -> List[List[float]]:
+    """``compute_scores`` of every batch, with the ``(first_n, total_n)`` of its ``bit_lengths`` when given."""
+    floors = floors or [None] * len(batches)
+    max_prefix_distances = max_prefix_distances or [0] * len(batches)
+    bit_lengths = bit_lengths or [(first_n, total_n)] * len(batches)
+    return [
+        compute_scores(current, candidates, *the_bit_lengths, floor, max_prefix_distance).tolist()
+        if len(candidates)
+        else []
+        for (current, candidates), floor, max_prefix_distance, the_bit_lengths in zip(
+            batches, floors, max_prefix_distances, bit_lengths, strict=True
+        )
+    ]
+
+
 class ScoreService:
     timestamp_interval = 1  # one second
-    first_n_bits_to_compare = 256
-    total_bits = 1024
+    frame_format = FrameFormat()
     previous_n = 4  # previous number of score to be consider
 
-    @staticmethod
-    async def compute_score(current_bit: Bit, previous_bit: Bit) -> float:
-        current_bit_array, previous_bit_array = await asyncio.gather(
-            asyncio.to_thread(bytes_to_bitarray, current_bit.bytes),
-            asyncio.to_thread(bytes_to_bitarray, previous_bit.bytes),
+    def __init__(
+        self,
+        score_repository: Optional[ScoreRepository] = None,
+        score_window: Optional[ScoreWindow] = None,
+        compute_executor: Optional[ComputeExecutor] = None,
+    ) -> None:
+        self._repository: Optional[ScoreRepository] = score_repository
+        self._window: ScoreWindow = score_window or ScoreWindow()
+        self._executor: ComputeExecutor = compute_executor or ComputeExecutor()
+
+    async def compute_score(self, current_bit: Bit, previous_bit: Bit) -> float:
+        (score,) = await self.compute_scores(current_bit, [previous_bit])
+        return score
+
+    async def compute_scores(self, current_bit: Bit, candidate_bits: List[Bit]) -> List[float]:
+        (scores,) = await self.compute_scores_many([(current_bit, candidate_bits)])
+        return scores
+
+    async def compute_scores_many(
+        self,
+        batches: List[Tuple[Bit, List[Bit]]],
+        cutoffs: Optional[List[Optional[float]]] = None,
+        max_prefix_distances: Optional[List[int]] = None,
+        frame_formats: Optional[List[FrameFormat]] = None,
+    ) -> List[List[float]]:
+        """Scores of several current bits against their own candidates, computed in a single executor call.
+
+        With a ``cutoff`` for a batch, candidates are pruned to a score of 0 once no pi notation score built on
+        them can exceed it, see ``get_score_floor``. A ``max_prefix_distance`` tolerates as many flipped bits in
+        the exact-match prefix. Batches are scored with their ``frame_format``, ``frame_format`` by default.
+        """
+        frame_formats = frame_formats or [self.frame_format] * len(batches)
+        # in candidates of the default width, wider frames take longer to score
+        cost = sum(
+            len(candidate_bits) * frame_format.frame_bits // self.frame_format.frame_bits
+            for (_, candidate_bits), frame_format in zip(batches, frame_formats, strict=True)
         )
-        return await asyncio.to_thread(
-            compute_score,
-            current_bit_array,
-            previous_bit_array,
-            ScoreService.first_n_bits_to_compare,
-            ScoreService.total_bits,
+        if not cost:
+            return [[] for _ in batches]
+        return await self._executor.run(
+            compute_scores_many,
+            [(current_bit.bytes, bits_to_matrix(candidate_bits)) for current_bit, candidate_bits in batches],
+            self.frame_format.prefix_bits,
+            self.frame_format.frame_bits,
+            None
+            if cutoffs is None
+            else [
+                None if cutoff is None else self.get_score_floor(cutoff, frame_format)
+                for cutoff, frame_format in zip(cutoffs, frame_formats, strict=True)
+            ],
+            max_prefix_distances,
+            [(frame_format.prefix_bits, frame_format.frame_bits) for frame_format in frame_formats],
+            cost=cost,
         )
 
-    def __init__(self, score_repository: ScoreRepository) -> None:
-        self._repository: ScoreRepository = score_repository
-
-    async def save_score(self, score: float, timestamp: int, source: str) -> Score:
-        the_score = Score(score=score, timestamp=timestamp, source=source)
-        await self._repository.add(the_score)
-        return the_score
-
-    async def previous_4_scores_exists(self, current_score: Score) -> bool:
-        try:
-            await self.get_previous_4_scores(current_score)
-        except NotFoundError:
-            return False
-        return True
-
-    async def get_previous_4_scores(self, current_score: Score) -> List[Score]:
-        earliest_timestamp = current_score.timestamp - self.previous_n * self.timestamp_interval
-
-        return await asyncio.gather(
-            *(
-                self._repository.get_score_by_timestamp_and_source(timestamp, current_score.source)
-                for timestamp in range(
-                    earliest_timestamp,
-                    current_score.timestamp,
-                    self.timestamp_interval,
-                )
-            )
+    @classmethod
+    def get_score_floor(cls, cutoff: float, frame_format: Optional[FrameFormat] = None) -> float:
+        """Largest score whose pi notation scores cannot exceed ``cutoff``, even if the other 4 scores are perfect."""
+        frame_format = frame_format or cls.frame_format
+        return cutoff / max_score(frame_format.prefix_bits, frame_format.frame_bits) ** cls.previous_n
+
+    async def save_scores(
+        self,
+        scores: List[float],
+        timestamp: int,
+        source: str,
+        matched_timestamps: List[int],
+        unit_of_work: Optional[RedisUnitOfWork] = None,
+    ) -> List[Score]:
+        """Add the score vector of ``timestamp`` to the window, and to the score repository only when one is set."""
+        the_scores = [
+            Score(score=score, timestamp=timestamp, source=source, matched_timestamp=matched_timestamp)
+            for score, matched_timestamp in zip(scores, matched_timestamps, strict=True)
+        ]
+        if self._repository is not None:
+            await self._repository.add_many(the_scores, unit_of_work)
+        self._window.add(
+            source, timestamp, {timestamp - the_score.matched_timestamp: the_score.score for the_score in the_scores}
         )
+        return the_scores
+
+    def has_full_window(self, timestamp: int, source: str) -> bool:
+        return self._window.is_complete(source, timestamp)
+
+    async def restore_window(self, timestamp: int, source: str) -> bool:
+        """Fill the seconds missing from the window of ``source`` with the stored score vectors, in one range read.
+
+        Only packed score vectors can be read by range, with other score repositories the window is left as is.
+        Returns whether the window is complete up to ``timestamp``.
+        """
+        if self._window.is_complete(source, timestamp) or not isinstance(self._repository, PackedScoreRepository):
+            return self._window.is_complete(source, timestamp)
+        vectors = dict(self._window.export_source(source))
+        stored_scores = await self._repository.get_scores_between_timestamps(
+            timestamp - self.previous_n * self.timestamp_interval, timestamp, source
+        )
+        for the_timestamp, the_scores in stored_scores.items():
+            vectors.setdefault(
+                the_timestamp,
+                {
+                    the_timestamp - the_score.matched_timestamp: the_score.score
+                    for the_score in the_scores
+                    if the_score.matched_timestamp is not None
+                },
+            )
+        self._window.import_source(source, sorted(vectors.items()))
+        return self._window.is_complete(source, timestamp)
+
+    def get_rolling_pi_notation_scores(self, timestamp: int, source: str) -> List[Score]:
+        """S_{t,d} of every diagonal whose last 5 scores, up to ``timestamp``, are in the window."""
+        return [
+            Score(score=product, timestamp=timestamp, source=source, matched_timestamp=timestamp - lag)
+            for lag, product in self._window.get_products(source, timestamp).items()
+        ]
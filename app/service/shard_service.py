@@ -0,0 +1,62 @@
+import bisect
+import hashlib
+from typing import Dict, List, Tuple
+
+
+def parse_members(members: str) -> Dict[str, str]:
+    """Parse ``"id=url,id=url"`` into member ids and their base URLs."""
+    parsed: Dict[str, str] = {}
+    for member in filter(None, (member.strip() for member in members.split(","))):
+        member_id, separator, url = member.partition("=")
+        if not separator or not member_id or not url:
+            raise ValueError(f"Incorrect shard member {member}. Correct format id=url")
+        parsed[member_id] = url.rstrip("/")
+    return parsed
+
+
+class ShardService:
+    """Consistent hashing of sources onto the members (workers or pods) that own their in-memory state.
+
+    Every member is placed ``virtual_nodes`` times on a hash ring, so a membership change only moves the
+    sources of the ring arcs that changed hands. Without members, this member owns every source.
+    """
+
+    virtual_nodes = 64
+
+    def __init__(self, member_id: str, members: Dict[str, str]) -> None:
+        self.member_id: str = member_id
+        self._members: Dict[str, str] = {}
+        self._ring: List[Tuple[int, str]] = []
+        self.set_members(members)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._members)
+
+    def get_members(self) -> Dict[str, str]:
+        return dict(self._members)
+
+    def set_members(self, members: Dict[str, str]) -> None:
+        if members and self.member_id not in members:
+            raise ValueError(f"Member {self.member_id} is missing from the shard members")
+        self._members = dict(members)
+        self._ring = sorted(
+            (self._hash(f"{member_id}#{node}"), member_id)
+            for member_id in self._members
+            for node in range(self.virtual_nodes)
+        )
+
+    def get_owner(self, source: str) -> Tuple[str, str]:
+        """Id and base URL of the member owning ``source``."""
+        if not self._ring:
+            return self.member_id, ""
+        index = bisect.bisect(self._ring, (self._hash(source), "")) % len(self._ring)
+        member_id = self._ring[index][1]
+        return member_id, self._members[member_id]
+
+    def is_owner(self, source: str) -> bool:
+        return self.get_owner(source)[0] == self.member_id
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional
+
+from ..models import SourceState
+from ..repository.source_state_snapshot import SourceStateSnapshot
+from .source_state_service import SourceStateService
+
+
+class SnapshotService:
+    """Saves the in-memory state of every source to a snapshot every ``interval_seconds``, and restores it on startup.
+
+    A restarted member then answers from its day of comparison values and its matches right away, and gets full
+    pi notation scores back as soon as its score window is full again, instead of after a day.
+    """
+
+    def __init__(
+        self, source_state_service: SourceStateService, snapshot: SourceStateSnapshot, interval_seconds: float
+    ) -> None:
+        self._source_state_service: SourceStateService = source_state_service
+        self._snapshot: SourceStateSnapshot = snapshot
+        self._interval_seconds: float = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def save(self) -> List[str]:
+        """Snapshot every source and return them; the file is written off the event loop."""
+        states: List[SourceState] = []
+        for source in sorted(self._source_state_service.get_sources()):
+            states.append(self._source_state_service.export_source(source))
+            await asyncio.sleep(0)  # let ticks run between two large sources
+        await asyncio.to_thread(self._snapshot.save, states)
+        return [state.source for state in states]
+
+    async def load(self) -> List[str]:
+        """Restore every source of the snapshot and return them."""
+        states: List[SourceState] = await asyncio.to_thread(self._snapshot.load)
+        for state in states:
+            self._source_state_service.import_source(state)
+            await asyncio.sleep(0)
+        return [state.source for state in states]
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """Stop the background loop and take a last snapshot."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.save()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval_seconds)
+            try:
+                await self.save()
+            except Exception as e:
+                logging.critical(f"Failed to snapshot source states: Error: {e}")
+
+
+async def init_snapshot_service(
+    source_state_service: SourceStateService, path: str, interval_seconds: float
+) -> AsyncIterator[SnapshotService]:
+    """Restore the snapshot at ``path``, or start cold without a readable one, and keep it up to date."""
+    snapshot_service = SnapshotService(source_state_service, SourceStateSnapshot(path), interval_seconds)
+    try:
+        sources = await snapshot_service.load()
+        logging.info(f"Restored {len(sources)} sources from {path}")
+    except (OSError, ValueError) as e:
+        logging.critical(f"Failed to restore source states from {path}, starting cold: Error: {e}")
+    snapshot_service.start()
+    yield snapshot_service
+    await snapshot_service.close()
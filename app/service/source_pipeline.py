@@ -0,0 +1,74 @@
+import inspect
+from typing import Awaitable, Callable, Dict, Union
+
+from aioredis import Redis
+
+from ..models import ReportRequestBody
+from ..repository.redis_unit_of_work import RedisUnitOfWork
+from .bit_service import BitService
+from .comparison_bit_service import ComparisonBitService
+from .egress_request_service import EgressRequestService
+from .metrics_service import MetricsService
+from .pi_notation_score_service import PiNotationScoreService
+from .report_queue import ReportQueue
+from .score_service import ScoreService
+from .tick_coalescer import TickCoalescer
+
+
+class SourcePipeline:
+    """Services of one source and its latest ``request_body``, resolved once instead of on every tick."""
+
+    def __init__(
+        self,
+        request_body: ReportRequestBody,
+        egress_request_service: EgressRequestService,
+        bit_service: BitService,
+        comparison_bit_service: ComparisonBitService,
+        score_service: ScoreService,
+        pi_notation_score_service: PiNotationScoreService,
+        redis: Redis,
+        metrics_service: MetricsService,
+        tick_coalescer: TickCoalescer,
+        report_queue: ReportQueue,
+    ) -> None:
+        self.request_body: ReportRequestBody = request_body
+        self.egress_request_service: EgressRequestService = egress_request_service
+        self.bit_service: BitService = bit_service
+        self.comparison_bit_service: ComparisonBitService = comparison_bit_service
+        self.score_service: ScoreService = score_service
+        self.pi_notation_score_service: PiNotationScoreService = pi_notation_score_service
+        self.metrics_service: MetricsService = metrics_service
+        self.tick_coalescer: TickCoalescer = tick_coalescer
+        self.report_queue: ReportQueue = report_queue
+        self._redis: Redis = redis
+
+    def new_unit_of_work(self) -> RedisUnitOfWork:
+        """A unit of work holds the writes of one tick, so every tick gets its own."""
+        return RedisUnitOfWork(self._redis)
+
+
+PipelineFactory = Callable[..., Union[SourcePipeline, Awaitable[SourcePipeline]]]
+
+
+class SourcePipelines:
+    """The ``SourcePipeline`` of every source, built by ``pipeline_factory`` on the first tick of the source.
+
+    Every tick refreshes the cached ``request_body``, so a changed threshold or URL applies right away.
+    """
+
+    def __init__(self, pipeline_factory: PipelineFactory) -> None:
+        self._pipeline_factory: PipelineFactory = pipeline_factory
+        self._pipelines: Dict[str, SourcePipeline] = {}
+
+    async def get(self, request_body: ReportRequestBody) -> SourcePipeline:
+        pipeline = self._pipelines.get(request_body.source)
+        if pipeline is None:
+            new_pipeline = self._pipeline_factory(request_body=request_body)
+            if inspect.isawaitable(new_pipeline):  # the first call initializes the async resources
+                new_pipeline = await new_pipeline
+            pipeline = self._pipelines.setdefault(request_body.source, new_pipeline)
+        pipeline.request_body = request_body
+        return pipeline
+
+    def remove(self, source: str) -> None:
+        self._pipelines.pop(source, None)
@@ -0,0 +1,101 @@
+import logging
+from typing import List, Optional, Set
+
+from ..models import FrameFormat, SourceState
+from ..repository.comparison_bit_index import ComparisonBitIndex
+from ..repository.match_tracker import MatchTracker
+from ..repository.pi_notation_score_write_buffer import PiNotationScoreWriteBuffer
+from ..repository.score_window import ScoreWindow
+from ..repository.source_registry import SourceRegistry
+from .egress_request_service import EgressRequestService
+from .shard_service import ShardService
+from .source_pipeline import SourcePipelines
+from .tick_coalescer import TickCoalescer
+
+
+class SourceStateService:
+    """Moves the in-memory state of sources (registration, score window, matches, comparison index) between members.
+
+    Removing a source also drops its cached pipeline and ticks, so a source that comes back later starts afresh.
+    """
+
+    def __init__(
+        self,
+        source_registry: SourceRegistry,
+        score_window: ScoreWindow,
+        match_tracker: MatchTracker,
+        comparison_bit_index: ComparisonBitIndex,
+        write_buffer: Optional[PiNotationScoreWriteBuffer] = None,
+        source_pipelines: Optional[SourcePipelines] = None,
+        tick_coalescer: Optional[TickCoalescer] = None,
+    ) -> None:
+        self._registry: SourceRegistry = source_registry
+        self._window: ScoreWindow = score_window
+        self._match_tracker: MatchTracker = match_tracker
+        self._index: ComparisonBitIndex = comparison_bit_index
+        self._write_buffer: Optional[PiNotationScoreWriteBuffer] = write_buffer
+        self._source_pipelines: Optional[SourcePipelines] = source_pipelines
+        self._tick_coalescer: Optional[TickCoalescer] = tick_coalescer
+
+    def get_sources(self) -> Set[str]:
+        return {
+            *(request_body.source for request_body in self._registry.get_all()),
+            *self._window.get_sources(),
+            *self._match_tracker.get_sources(),
+            *self._index.get_sources(),
+        }
+
+    def export_source(self, source: str) -> SourceState:
+        comparison_timestamps, comparison_values = self._index.export_source(source)
+        frame_format = self._index.get_frame_format(source)
+        return SourceState(
+            source=source,
+            request_body=self._registry.get(source),
+            score_vectors=self._window.export_source(source),
+            match_scores=self._match_tracker.export_source(source),
+            comparison_timestamps=comparison_timestamps,
+            comparison_values=comparison_values,
+            frame_bits=frame_format.frame_bits,
+            prefix_bits=frame_format.prefix_bits,
+        )
+
+    def import_source(self, state: SourceState) -> None:
+        if state.request_body is not None:
+            self._registry.register(state.request_body)
+        self._window.import_source(state.source, state.score_vectors)
+        self._match_tracker.import_source(state.source, state.match_scores)
+        self._index.import_source(
+            state.source,
+            state.comparison_timestamps,
+            state.comparison_values,
+            FrameFormat(state.frame_bits, state.prefix_bits),
+        )
+
+    def remove_source(self, source: str) -> None:
+        self._registry.unregister(source)
+        self._window.remove_source(source)
+        self._match_tracker.remove_source(source)
+        self._index.remove_source(source)
+        if self._source_pipelines is not None:
+            self._source_pipelines.remove(source)
+        if self._tick_coalescer is not None:
+            self._tick_coalescer.remove_source(source)
+
+    async def hand_off(self, shard_service: ShardService, egress_request_service: EgressRequestService) -> List[str]:
+        """Send every source this member no longer owns to its owner and return the sources handed off.
+
+        A source whose handoff fails keeps its state here, to be handed off on the next membership change.
+        """
+        if self._write_buffer is not None:
+            await self._write_buffer.flush()
+        handed_off: List[str] = []
+        for source in sorted(self.get_sources()):
+            if shard_service.is_owner(source):
+                continue
+            _, url = shard_service.get_owner(source)
+            if await egress_request_service.send_source_state(url, self.export_source(source)):
+                self.remove_source(source)
+                handed_off.append(source)
+            else:
+                logging.critical(f"Failed to hand off source {source} to {url}")
+        return handed_off
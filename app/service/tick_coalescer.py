@@ -0,0 +1,67 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from ..models import ReportInfo
+from .metrics_service import MetricsService
+
+TickKey = Tuple[str, int]
+
+
+class TickCoalescer:
+    """Single-flight of the ticks of one ``(source, timestamp)``.
+
+    Retries and overlapping scheduler fires land in the same second as the tick they repeat. Callers of a tick
+    already running share its computation, its report and its ``ReportInfo``. Callers arriving up to
+    ``cache_seconds`` after it finished get its ``ReportInfo`` from a cache. Failed ticks are not cached.
+    """
+
+    def __init__(
+        self,
+        cache_seconds: float = 5,
+        metrics_service: Optional[MetricsService] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._cache_seconds: float = cache_seconds
+        self._metrics_service: MetricsService = metrics_service or MetricsService()
+        self._clock: Callable[[], float] = clock
+        self._in_flight: Dict[TickKey, asyncio.Task] = {}
+        self._cache: OrderedDict[TickKey, Tuple[float, ReportInfo]] = OrderedDict()
+
+    async def run(self, source: str, timestamp: int, tick: Callable[[], Awaitable[ReportInfo]]) -> ReportInfo:
+        """The ``ReportInfo`` of ``tick()``, run at most once per ``(source, timestamp)`` at a time."""
+        key = (source, timestamp)
+        self._evict_expired()
+        if key in self._cache:
+            self._metrics_service.count_coalesced_tick(source, "cache")
+            return self._cache[key][1]
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(tick())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda the_task: self._finish(key, the_task))
+        else:
+            self._metrics_service.count_coalesced_tick(source, "in_flight")
+        # a cancelled caller leaves the tick running for the others
+        return await asyncio.shield(task)
+
+    def remove_source(self, source: str) -> None:
+        """Forget the ticks of ``source``; a running one still answers its callers but is not cached."""
+        for key in [key for key in self._in_flight if key[0] == source]:
+            del self._in_flight[key]
+        for key in [key for key in self._cache if key[0] == source]:
+            del self._cache[key]
+
+    def _finish(self, key: TickKey, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is not task:  # the source was removed while the tick was running
+            return
+        del self._in_flight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._cache[key] = (self._clock() + self._cache_seconds, task.result())
+
+    def _evict_expired(self) -> None:
+        now = self._clock()
+        while self._cache and next(iter(self._cache.values()))[0] <= now:
+            self._cache.popitem(last=False)
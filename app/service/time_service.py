@@ -1,5 +1,7 @@
-import asyncio
 import time
+from typing import Optional
+
+from .compute_executor import ComputeExecutor
 
 
 def get_current_timestamp() -> int:
@@ -9,8 +11,11 @@ def get_current_timestamp() -> int:
 class TimeService:
     timestamp_interval = 60 * 60 * 24  # seconds of one day
 
+    def __init__(self, compute_executor: Optional[ComputeExecutor] = None) -> None:
+        self._executor: ComputeExecutor = compute_executor or ComputeExecutor()
+
     async def get_current_timestamp(self) -> int:
-        return await asyncio.to_thread(get_current_timestamp)
+        return await self._executor.run(get_current_timestamp)
 
     async def get_previous_day_timestamp(self) -> int:
         return await self.get_current_timestamp() - self.timestamp_interval
@@ -0,0 +1,18 @@
+from mockfirestore import AsyncMockFirestore
+from mockfirestore.async_transaction import AsyncTransaction
+
+
+class AsyncMockWriteBatch(AsyncTransaction):
+    async def commit(self):
+        self._client.batch_commits += 1
+        await self._begin()
+        return await self._commit()
+
+
+class BatchAsyncMockFirestore(AsyncMockFirestore):
+    """``AsyncMockFirestore`` with ``batch()``, counting the committed batches."""
+
+    batch_commits = 0
+
+    def batch(self) -> AsyncMockWriteBatch:
+        return AsyncMockWriteBatch(self)
@@ -0,0 +1,111 @@
+import json
+
+import numpy as np
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.backfill import iter_report_infos, main
+from app.endpoints import process_many_frames
+from app.models import Score
+from app.repository.bit_repository import BitRepository
+from app.repository.comparison_bit_repository import ComparisonBitRepository
+from app.repository.match_tracker import MatchTracker
+from app.repository.pi_notation_score_repository import PiNotationScoreRepository
+from app.repository.redis_unit_of_work import RedisUnitOfWork
+from app.repository.score_repository import ScoreRepository
+from app.repository.score_window import ScoreWindow
+from app.service.bit_service import BitService
+from app.service.comparison_bit_service import ComparisonBitService
+from app.service.pi_notation_score_service import PiNotationScoreService
+from app.service.score_service import ScoreService
+from app.service.time_service import TimeService
+from app.tests.mock_firestore import BatchAsyncMockFirestore
+
+
+@pytest.mark.asyncio
+async def test_backfill_matches_report_pipeline(tmp_path):
+    rng = np.random.default_rng(0)
+    period = 17
+    base_frames = rng.integers(0, 256, (period, 128), dtype=np.uint8)
+    timestamps = np.array([t for t in range(1, 121) if t not in (50, 51, 90)], dtype=np.int64)
+    frames = base_frames[timestamps % period]
+    # noise after the prefix varies the scores of repeated comparison values
+    noisy = rng.random(len(frames)) < 0.3
+    frames[noisy, 32 + rng.integers(0, 96)] ^= 1
+    frames.tofile(tmp_path / "frames.bin")
+    np.save(tmp_path / "timestamps.npy", timestamps)
+
+    threshold = 1e12
+    main(
+        [
+            str(tmp_path / "frames.bin"),
+            "--source=backfill_channel",
+            f"--threshold={threshold}",
+            f"--timestamps={tmp_path / 'timestamps.npy'}",
+            f"--output={tmp_path / 'reports.jsonl'}",
+        ]
+    )
+    with open(tmp_path / "reports.jsonl") as reports:
+        report_infos = [json.loads(line) for line in reports]
+
+    redis = FakeAsyncRedis()
+    pi_notation_score_service = PiNotationScoreService(
+        PiNotationScoreRepository(BatchAsyncMockFirestore()), match_tracker=MatchTracker()
+    )
+    bit_service = BitService(BitRepository(redis))
+    comparison_bit_service = ComparisonBitService(ComparisonBitRepository(redis))
+    score_service = ScoreService(ScoreRepository(redis), ScoreWindow())
+    expected_report_infos = []
+    for timestamp, frame in zip(timestamps.tolist(), frames, strict=True):
+        await pi_notation_score_service.remove_expired_pi_notation_scores(
+            "backfill_channel", timestamp - TimeService.timestamp_interval
+        )
+        await process_many_frames(
+            current_timestamp=timestamp,
+            sources=["backfill_channel"],
+            current_bytes_values=[frame.tobytes()],
+            bit_service=bit_service,
+            comparison_bit_service=comparison_bit_service,
+            score_service=score_service,
+            pi_notation_score_service=pi_notation_score_service,
+            unit_of_work=RedisUnitOfWork(redis),
+        )
+        expected_report_infos.append(
+            {
+                "channel": "backfill_channel",
+                "time": timestamp,
+                "match_times": await pi_notation_score_service.get_match_times(threshold, "backfill_channel"),
+            }
+        )
+
+    assert expected_report_infos == report_infos
+    assert any(report_info["match_times"] for report_info in report_infos)
+
+
+def test_iter_report_infos_across_day_blocks(monkeypatch):
+    monkeypatch.setattr(TimeService, "timestamp_interval", 7)
+    rng = np.random.default_rng(1)
+    frame_timestamps = np.array([t for t in range(100, 200) if t % 23 not in (5, 6)], dtype=np.int64)
+    timestamps = np.repeat(frame_timestamps, 13)
+    lags = np.tile(np.arange(1, 14), len(frame_timestamps))
+    pi_notation_scores = rng.integers(0, 20, len(timestamps)).astype(float)
+
+    match_tracker = MatchTracker()
+    expected_match_times = []
+    for frame_timestamp in frame_timestamps.tolist():
+        match_tracker.remove_before_timestamp("day_blocks", frame_timestamp - TimeService.timestamp_interval)
+        for index in np.flatnonzero(timestamps == frame_timestamp):
+            match_tracker.add(
+                Score(
+                    score=pi_notation_scores[index],
+                    timestamp=frame_timestamp,
+                    source="day_blocks",
+                    matched_timestamp=int(frame_timestamp - lags[index]),
+                )
+            )
+        expected_match_times.append(
+            [score.matched_timestamp for score in match_tracker.get_scores_larger_than_threshold(5, "day_blocks", 10)]
+        )
+
+    report_infos = iter_report_infos("day_blocks", 5, frame_timestamps, timestamps, lags, pi_notation_scores)
+    assert expected_match_times == [report_info.match_times for report_info in report_infos]
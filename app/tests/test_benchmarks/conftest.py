@@ -0,0 +1,32 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Iterator
+
+import numpy as np
+import pytest
+
+
+class AsyncBenchmark:
+    """Benchmarks coroutine functions, every round running a new coroutine on the same event loop."""
+
+    def __init__(self, benchmark, loop: asyncio.AbstractEventLoop) -> None:
+        self._benchmark = benchmark
+        self._loop = loop
+
+    def run(self, awaitable: Awaitable[Any]) -> Any:
+        """Run untimed setup on the benchmark event loop."""
+        return self._loop.run_until_complete(awaitable)
+
+    def __call__(self, coroutine_function: Callable[[], Awaitable[Any]]) -> Any:
+        return self._benchmark(lambda: self._loop.run_until_complete(coroutine_function()))
+
+
+@pytest.fixture
+def rng() -> np.random.Generator:
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def benchmark_async(benchmark) -> Iterator[AsyncBenchmark]:
+    loop = asyncio.new_event_loop()
+    yield AsyncBenchmark(benchmark, loop)
+    loop.close()
@@ -0,0 +1,45 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.service.comparison_bit_service import xor_bytes
+from app.service.compute_executor import ComputeExecutor
+from app.service.score_service import ScoreService, compute_scores_many
+
+first_n = ScoreService.frame_format.prefix_bits
+total_n = ScoreService.frame_format.frame_bits
+
+
+@pytest.fixture(scope="module")
+def process_pool():
+    with ProcessPoolExecutor(max_workers=1) as process_pool:
+        yield process_pool
+
+
+def compute_executor(policy: str, process_pool: ProcessPoolExecutor) -> ComputeExecutor:
+    if policy == "process":
+        return ComputeExecutor("thread", process_pool=process_pool, process_min_cost=0)
+    return ComputeExecutor(policy)
+
+
+@pytest.mark.parametrize("policy", ["inline", "thread", "process"])
+def test_xor_bytes_hop(benchmark_async, rng, process_pool, policy):
+    """xor-ing two frames is far cheaper than any hop, hence the inline default for small work."""
+    byte1, byte2 = (rng.integers(0, 256, 128, dtype=np.uint8).tobytes() for _ in range(2))
+    executor = compute_executor(policy, process_pool)
+    benchmark_async.run(executor.run(xor_bytes, byte1, byte2))
+    benchmark_async(lambda: executor.run(xor_bytes, byte1, byte2))
+
+
+@pytest.mark.parametrize("candidate_count", [10, 100, 1000, 10000])
+@pytest.mark.parametrize("policy", ["inline", "thread", "process"])
+def test_compute_scores_many_hop(benchmark_async, rng, process_pool, policy, candidate_count):
+    """Where a thread hop pays off sets ``inline_max_cost``; the process pool only adds parallelism across cores."""
+    current = rng.integers(0, 256, total_n // 8, dtype=np.uint8)
+    candidates = rng.integers(0, 256, (candidate_count, total_n // 8), dtype=np.uint8)
+    candidates[:, : first_n // 8] = current[: first_n // 8]
+    batches = [(current.tobytes(), candidates)]
+    executor = compute_executor(policy, process_pool)
+    benchmark_async.run(executor.run(compute_scores_many, batches, first_n, total_n))
+    benchmark_async(lambda: executor.run(compute_scores_many, batches, first_n, total_n, cost=candidate_count))
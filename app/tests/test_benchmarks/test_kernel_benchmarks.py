@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+
+from app.models import Bit, FrameFormat, Score
+from app.repository.comparison_bit_index import ComparisonBitIndex
+from app.repository.match_tracker import MatchTracker
+from app.repository.score_window import ScoreWindow
+from app.service.comparison_bit_service import xor_bytes
+from app.service.pi_notation_score_service import compute_pi_notation_score
+from app.service.score_service import ScoreService, bits_to_matrix, bytes_to_bitarray, compute_score, compute_scores
+
+first_n = ScoreService.frame_format.prefix_bits
+total_n = ScoreService.frame_format.frame_bits
+
+
+def random_bytes(rng: np.random.Generator, count: int = 1) -> np.ndarray:
+    return rng.integers(0, 256, (count, total_n // 8), dtype=np.uint8)
+
+
+def test_bytes_to_bitarray(benchmark, rng):
+    the_bytes = random_bytes(rng)[0].tobytes()
+    benchmark(bytes_to_bitarray, the_bytes)
+
+
+def test_xor_bytes(benchmark, rng):
+    byte1, byte2 = (the_bytes.tobytes() for the_bytes in random_bytes(rng, 2))
+    benchmark(xor_bytes, byte1, byte2)
+
+
+def test_compute_score(benchmark, rng):
+    current = random_bytes(rng)[0]
+    previous = current.copy()
+    previous[first_n // 8 :] = random_bytes(rng)[0][first_n // 8 :]
+    # a shared prefix makes the loop walk every bit
+    benchmark(
+        compute_score, bytes_to_bitarray(current.tobytes()), bytes_to_bitarray(previous.tobytes()), first_n, total_n
+    )
+
+
+def test_compute_scores_one_candidate(benchmark, rng):
+    current = random_bytes(rng)[0]
+    candidates = random_bytes(rng, 1)
+    candidates[:, : first_n // 8] = current[: first_n // 8]
+    benchmark(compute_scores, current.tobytes(), candidates, first_n, total_n)
+
+
+def test_compute_scores_thousand_candidates(benchmark, rng):
+    current = random_bytes(rng)[0]
+    candidates = random_bytes(rng, 1000)
+    candidates[::2, : first_n // 8] = current[: first_n // 8]
+    benchmark(compute_scores, current.tobytes(), candidates, first_n, total_n)
+
+
+@pytest.mark.parametrize("frame_bits", [1024, 2048, 4096])
+def test_compute_scores_frame_bits(benchmark, rng, frame_bits):
+    current = rng.integers(0, 256, frame_bits // 8, dtype=np.uint8)
+    candidates = rng.integers(0, 256, (1000, frame_bits // 8), dtype=np.uint8)
+    candidates[::2, : first_n // 8] = current[: first_n // 8]
+    benchmark(compute_scores, current.tobytes(), candidates, first_n, frame_bits)
+
+
+@pytest.mark.parametrize("frame_bits", [1024, 2048, 4096])
+def test_tick_frame_bits(benchmark, rng, frame_bits):
+    """CPU work of one tick: xor, candidate lookup and pruned scoring against a day of 3600 comparison values."""
+    frame_format = FrameFormat(frame_bits, first_n)
+    comparison_bit_index = ComparisonBitIndex()
+    comparison_bit_index.set_frame_format("benchmark", frame_format)
+    values = rng.integers(0, 256, (3600, frame_format.byte_length), dtype=np.uint8)
+    values[::10, : first_n // 8] = 0  # one value in ten shares its prefix with the current one
+    for timestamp, value in enumerate(values):
+        comparison_bit_index.add(Bit(bytes=value.tobytes(), timestamp=timestamp, source="benchmark"))
+    current_frame, previous_frame = (the_bytes.tobytes() for the_bytes in values[:2])
+    floor = ScoreService.get_score_floor(100, frame_format)
+
+    def tick():
+        comparison_value = bytes(first_n // 8) + xor_bytes(current_frame, previous_frame)[first_n // 8 :]
+        current_bit = Bit(bytes=comparison_value, timestamp=len(values), source="benchmark")
+        candidate_bits = comparison_bit_index.get_candidate_bits(current_bit)
+        return compute_scores(comparison_value, bits_to_matrix(candidate_bits), first_n, frame_bits, floor)
+
+    benchmark(tick)
+
+
+def test_bits_to_matrix(benchmark, rng):
+    bits = [
+        Bit(bytes=the_bytes.tobytes(), timestamp=i, source="benchmark")
+        for i, the_bytes in enumerate(random_bytes(rng, 1000))
+    ]
+    benchmark(bits_to_matrix, bits)
+
+
+def test_compute_pi_notation_score(benchmark, rng):
+    scores = [Score(score=score, timestamp=i, source="benchmark") for i, score in enumerate(rng.random(5).tolist())]
+    benchmark(compute_pi_notation_score, scores)
+
+
+def test_score_window_add(benchmark, rng):
+    score_window = ScoreWindow()
+    lags = rng.choice(ComparisonBitIndex.expiration_seconds, 1000, replace=False).tolist()
+    for timestamp in range(1, ScoreWindow.window_length):
+        score_window.add("benchmark", timestamp, dict(zip(lags, rng.random(len(lags)).tolist(), strict=True)))
+    scores = dict(zip(lags, rng.random(len(lags)).tolist(), strict=True))
+    benchmark(score_window.add, "benchmark", ScoreWindow.window_length, scores)
+
+
+def test_score_window_get_products(benchmark, rng):
+    score_window = ScoreWindow()
+    lags = rng.choice(ComparisonBitIndex.expiration_seconds, 1000, replace=False).tolist()
+    for timestamp in range(1, ScoreWindow.window_length + 1):
+        score_window.add("benchmark", timestamp, dict(zip(lags, rng.random(len(lags)).tolist(), strict=True)))
+    benchmark(score_window.get_products, "benchmark", ScoreWindow.window_length)
+
+
+def test_comparison_bit_index_get_candidate_bits(benchmark, rng):
+    comparison_bit_index = ComparisonBitIndex()
+    values = random_bytes(rng, 3600)
+    # one value in ten shares its prefix with the current one
+    values[::10, : first_n // 8] = values[0, : first_n // 8]
+    for timestamp, value in enumerate(values):
+        comparison_bit_index.add(Bit(bytes=value.tobytes(), timestamp=timestamp, source="benchmark"))
+    current_bit = Bit(bytes=values[0].tobytes(), timestamp=len(values), source="benchmark")
+    benchmark(comparison_bit_index.get_candidate_bits, current_bit)
+
+
+def test_match_tracker_get_scores_larger_than_threshold(benchmark, rng):
+    match_tracker = MatchTracker()
+    for timestamp, score in enumerate(rng.random(10000).tolist()):
+        match_tracker.add(Score(score=score, timestamp=timestamp, source="benchmark", matched_timestamp=timestamp - 1))
+    benchmark(match_tracker.get_scores_larger_than_threshold, 0.5, "benchmark", 10)
+
+
+def test_match_tracker_add_and_expire(benchmark, rng):
+    """One second of a day-long window: a new score is added and the oldest one expires."""
+    match_tracker = MatchTracker()
+    for timestamp, score in enumerate(rng.random(ComparisonBitIndex.expiration_seconds).tolist()):
+        match_tracker.add(Score(score=score, timestamp=timestamp, source="benchmark", matched_timestamp=timestamp - 1))
+    timestamps = iter(range(ComparisonBitIndex.expiration_seconds, 10 * ComparisonBitIndex.expiration_seconds))
+
+    def add_and_expire():
+        timestamp = next(timestamps)
+        match_tracker.add(Score(score=0.5, timestamp=timestamp, source="benchmark", matched_timestamp=timestamp - 1))
+        match_tracker.remove_before_timestamp("benchmark", timestamp - ComparisonBitIndex.expiration_seconds)
+
+    benchmark(add_and_expire)
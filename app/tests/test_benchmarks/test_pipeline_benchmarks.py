@@ -0,0 +1,70 @@
+import inspect
+from contextlib import ExitStack
+from typing import Any, Iterator
+
+import pytest
+from dependency_injector import providers
+from fakeredis import FakeAsyncRedis
+
+from app.application import app
+from app.models import ReportRequestBody
+from app.tests.mock_firestore import BatchAsyncMockFirestore
+
+request_body = ReportRequestBody(
+    source="benchmark_pipeline_channel", source_url="http://fake.url", threshold=100, reporting_url="http://fake.url"
+)
+
+
+async def resolve(provider: providers.Provider) -> Any:
+    resolved = provider()
+    return await resolved if inspect.isawaitable(resolved) else resolved
+
+
+@pytest.fixture
+def container(benchmark_async) -> Iterator[Any]:
+    container = app.container
+    redis = FakeAsyncRedis()
+    with ExitStack() as overrides:
+        for provider, override in (
+            (container.redis_pool, redis),
+            (container.binary_redis_pool, redis),
+            (container.firestore_db, BatchAsyncMockFirestore()),
+        ):
+            overrides.enter_context(provider.override(override))
+        yield container
+        container.source_pipelines().remove(request_body.source)
+        benchmark_async.run(container.shutdown_resources())
+
+
+def test_report_dependencies_per_request(benchmark_async, container):
+    """What ``/report`` resolved on every call before ``SourcePipeline``."""
+    dependencies = (
+        container.shard_service,
+        container.time_service,
+        container.egress_request_service,
+        container.bit_service,
+        container.comparison_bit_service,
+        container.score_service,
+        container.pi_notation_score_service,
+        container.redis_unit_of_work,
+        container.metrics_service,
+        container.tick_coalescer,
+        container.report_queue,
+    )
+
+    async def resolve_dependencies():
+        return [await resolve(dependency) for dependency in dependencies]
+
+    benchmark_async(resolve_dependencies)
+
+
+def test_report_dependencies_with_source_pipeline(benchmark_async, container):
+    """What ``/report`` resolves on every call with a ``SourcePipeline``."""
+
+    async def resolve_dependencies():
+        source_pipelines = await resolve(container.source_pipelines)
+        dependencies = [await resolve(container.shard_service), await resolve(container.time_service)]
+        pipeline = await source_pipelines.get(request_body)
+        return dependencies + [pipeline, pipeline.new_unit_of_work()]
+
+    benchmark_async(resolve_dependencies)
@@ -0,0 +1,91 @@
+from typing import List
+
+import numpy as np
+from fakeredis import FakeAsyncRedis
+
+from app.models import Bit, Score
+from app.repository.bit_repository import BitRepository
+from app.repository.blob_comparison_bit_repository import BlobComparisonBitRepository
+from app.repository.comparison_bit_index import ComparisonBitIndex
+from app.repository.packed_score_repository import PackedScoreRepository
+from app.repository.pi_notation_score_repository import PiNotationScoreRepository
+from app.repository.redis_unit_of_work import RedisUnitOfWork
+from app.repository.score_repository import ScoreRepository
+from app.tests.mock_firestore import BatchAsyncMockFirestore
+
+
+def random_bit(rng: np.random.Generator, timestamp: int) -> Bit:
+    return Bit(bytes=rng.integers(0, 256, 128, dtype=np.uint8).tobytes(), timestamp=timestamp, source="benchmark")
+
+
+def random_scores(rng: np.random.Generator, timestamp: int, count: int) -> List[Score]:
+    return [
+        Score(score=score, timestamp=timestamp, source="benchmark", matched_timestamp=timestamp - lag)
+        for lag, score in enumerate(rng.random(count).tolist(), start=1)
+    ]
+
+
+def test_bit_repository_round_trip(benchmark_async, rng):
+    bit_repository = BitRepository(FakeAsyncRedis())
+    the_bit = random_bit(rng, 1)
+
+    async def round_trip():
+        await bit_repository.add(the_bit)
+        return await bit_repository.get_bit_by_timestamp_and_source(the_bit.timestamp, the_bit.source)
+
+    assert the_bit == benchmark_async(round_trip)
+
+
+def test_score_repository_add_many(benchmark_async, rng):
+    redis = FakeAsyncRedis()
+    score_repository = ScoreRepository(redis)
+    scores = random_scores(rng, 100, 100)
+
+    async def add_many():
+        unit_of_work = RedisUnitOfWork(redis)
+        await score_repository.add_many(scores, unit_of_work)
+        await unit_of_work.commit()
+
+    benchmark_async(add_many)
+
+
+def test_packed_score_repository_add_many(benchmark_async, rng):
+    packed_score_repository = PackedScoreRepository(FakeAsyncRedis())
+    scores = random_scores(rng, 100, 100)
+    benchmark_async(lambda: packed_score_repository.add_many(scores))
+
+
+def test_blob_comparison_bit_repository_get_hour(benchmark_async, rng):
+    blob_comparison_bit_repository = BlobComparisonBitRepository(FakeAsyncRedis())
+    for timestamp in range(3600):
+        benchmark_async.run(blob_comparison_bit_repository.add(random_bit(rng, timestamp)))
+
+    bits = benchmark_async(lambda: blob_comparison_bit_repository.get_bits_between_timestamps(0, 3600, "benchmark"))
+    assert 3600 == len(bits)
+
+
+def test_pi_notation_score_repository_add_many(benchmark_async, rng):
+    pi_notation_score_repository = PiNotationScoreRepository(BatchAsyncMockFirestore())
+    scores = random_scores(rng, 100, 100)
+    benchmark_async(lambda: pi_notation_score_repository.add_many(scores))
+
+
+def test_pi_notation_score_repository_get_scores_larger_than_threshold(benchmark_async, rng):
+    pi_notation_score_repository = PiNotationScoreRepository(BatchAsyncMockFirestore())
+    for timestamp in range(100):
+        benchmark_async.run(pi_notation_score_repository.add_many(random_scores(rng, timestamp, 10)))
+
+    scores = benchmark_async(
+        lambda: pi_notation_score_repository.get_scores_larger_than_threshold(0.5, "benchmark", 10)
+    )
+    assert 10 == len(scores)
+
+
+def test_comparison_bit_index_get_candidate_bits_within_prefix_distance(benchmark, rng):
+    comparison_bit_index = ComparisonBitIndex()
+    for timestamp in range(ComparisonBitIndex.expiration_seconds):
+        comparison_bit_index.add(random_bit(rng, timestamp))
+    current_bit = random_bit(rng, ComparisonBitIndex.expiration_seconds)
+    comparison_bit_index.get_candidate_bits(current_bit, 3)  # builds the block indexes
+
+    assert [] == benchmark(comparison_bit_index.get_candidate_bits, current_bit, 3)
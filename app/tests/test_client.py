@@ -1,15 +1,49 @@
+import base64
 from unittest import mock
 
 import pytest
 from aioresponses import aioresponses
 from fakeredis import FakeAsyncRedis
+from fastapi import WebSocketDisconnect, status
 from fastapi.testclient import TestClient
-from mockfirestore import AsyncMockFirestore
 
 from app.application import app
+from app.endpoints import process_bits_and_scores, process_many_frames
+from app.models import ReportRequestBody
 from app.repository.bit_repository import BitRepository
+from app.repository.comparison_bit_repository import ComparisonBitRepository
 from app.repository.pi_notation_score_repository import PiNotationScoreRepository
+from app.repository.redis_unit_of_work import RedisUnitOfWork
+from app.repository.score_repository import ScoreRepository
+from app.service.bit_service import BitService
+from app.service.comparison_bit_service import ComparisonBitService
+from app.service.egress_request_service import EgressRequestService
+from app.service.metrics_service import MetricsService
+from app.service.pi_notation_score_service import PiNotationScoreService
+from app.service.score_service import ScoreService
+from app.service.shard_service import ShardService
+from app.service.tick_coalescer import TickCoalescer
 from app.service.time_service import TimeService
+from app.tests.mock_firestore import BatchAsyncMockFirestore
+
+
+class RoundTripCountingRedis(FakeAsyncRedis):
+    round_trips = 0
+
+    async def execute_command(self, *args, **options):
+        self.round_trips += 1
+        return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipeline = super().pipeline(transaction, shard_hint)
+        execute = pipeline.execute
+
+        async def counted_execute(raise_on_error=True):
+            self.round_trips += 1
+            return await execute(raise_on_error)
+
+        pipeline.execute = counted_execute
+        return pipeline
 
 
 @pytest.fixture(scope="module")
@@ -25,7 +59,7 @@ def redis():
 
 @pytest.fixture(scope="module")
 def firestore_db():
-    return AsyncMockFirestore()
+    return BatchAsyncMockFirestore()
 
 
 @pytest.fixture(scope="module")
@@ -41,7 +75,12 @@ def pi_notation_score_repository(firestore_db):
 def test_report_match_times(client, bit_repository, pi_notation_score_repository, redis):
     fake_url = "http://fake.url"
     fake_report_url = "http://fake_report.url"
-    request_body = {"source": "sample_channel", "source_url": fake_url, "threshold": 100, "reporting_url": fake_report_url}
+    request_body = {
+        "source": "sample_channel",
+        "source_url": fake_url,
+        "threshold": 100,
+        "reporting_url": fake_report_url,
+    }
 
     time_service_mock = mock.Mock(spec=TimeService)
     mock_day1_curr_times = [i for i in range(1, 11)]
@@ -51,6 +90,7 @@ def test_report_match_times(client, bit_repository, pi_notation_score_repository
 
     with (
         app.container.redis_pool.override(redis),
+        app.container.binary_redis_pool.override(redis),
         app.container.bit_repository.override(bit_repository),
         app.container.pi_notation_score_repository.override(pi_notation_score_repository),
     ):
@@ -69,3 +109,321 @@ def test_report_match_times(client, bit_repository, pi_notation_score_repository
                 assert all(isinstance(item, int) for item in data.get("match_times"))
                 if i >= 15:
                     assert data.get("match_times")
+
+
+def test_report_match_times_wide_frames(client, bit_repository, pi_notation_score_repository, redis):
+    fake_url = "http://fake_wide.url"
+    request_body = {
+        "source": "wide_channel",
+        "source_url": fake_url,
+        "threshold": 100,
+        "reporting_url": "http://fake_report.url",
+        "frame_bits": 4096,
+        "prefix_bits": 512,
+    }
+    assert 422 == client.post("/report", json={**request_body, "prefix_bits": 4096}).status_code
+
+    with (
+        app.container.redis_pool.override(redis),
+        app.container.binary_redis_pool.override(redis),
+        app.container.bit_repository.override(bit_repository),
+        app.container.pi_notation_score_repository.override(pi_notation_score_repository),
+    ):
+        for timestamp in range(1, 11):
+            time_service_mock = mock.Mock(spec=TimeService)
+            time_service_mock.get_current_timestamp.return_value = timestamp
+            time_service_mock.get_previous_day_timestamp.return_value = 0
+            with aioresponses() as mock_external_server, app.container.time_service.override(time_service_mock):
+                mock_external_server.get(fake_url, body=(1).to_bytes(512, byteorder="big"), status=200)
+                response = client.post("/report", json=request_body)
+                assert response.status_code == 200
+        # a frame of the default width is refused
+        time_service_mock.get_current_timestamp.return_value = 11
+        with aioresponses() as mock_external_server, app.container.time_service.override(time_service_mock):
+            mock_external_server.get(fake_url, body=(1).to_bytes(128, byteorder="big"), status=200)
+            with pytest.raises(ValueError, match="Incorrect byte length 128. Correct byte length 512"):
+                client.post("/report", json=request_body)
+    assert response.json()["match_times"]
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_process_bits_and_scores_round_trips(firestore_db):
+    fake_url = "http://fake_round_trips.url"
+    request_body = ReportRequestBody(
+        source="round_trips_channel", source_url=fake_url, threshold=100, reporting_url="http://fake_report.url"
+    )
+    counting_redis = RoundTripCountingRedis()
+    round_trips_per_tick = []
+    for timestamp in range(1, 11):
+        round_trips = counting_redis.round_trips
+        with aioresponses() as mock_external_server:
+            mock_external_server.get(fake_url, body=(1).to_bytes(128, byteorder="big"), status=200)
+            await process_bits_and_scores(
+                current_timestamp=timestamp,
+                request_body=request_body,
+                egress_request_service=EgressRequestService(),
+                bit_service=BitService(BitRepository(counting_redis)),
+                comparison_bit_service=ComparisonBitService(ComparisonBitRepository(counting_redis)),
+                score_service=ScoreService(ScoreRepository(counting_redis)),
+                pi_notation_score_service=PiNotationScoreService(PiNotationScoreRepository(firestore_db)),
+                unit_of_work=RedisUnitOfWork(counting_redis),
+            )
+        round_trips_per_tick.append(counting_redis.round_trips - round_trips)
+
+    # the first tick has no previous bit, every later one writes all its scores in the second round trip
+    assert [1] + [2] * 9 == round_trips_per_tick
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_process_many_frames_isolates_errors(firestore_db):
+    sources = ["isolated_channel", "failing_candidates_channel", "failing_score_channel"]
+    redis = FakeAsyncRedis()
+    comparison_bit_service = ComparisonBitService(ComparisonBitRepository(redis))
+    score_service = ScoreService()
+    get_candidate_bits = comparison_bit_service.get_candidate_bits
+    compute_scores_many = score_service.compute_scores_many
+
+    async def failing_get_candidate_bits(bit, max_prefix_distance=0):
+        if bit.source == sources[1]:
+            raise RuntimeError("candidates")
+        return await get_candidate_bits(bit, max_prefix_distance)
+
+    async def failing_compute_scores_many(batches, *args, **kwargs):
+        if any(current_bit.source == sources[2] for current_bit, _ in batches):
+            raise RuntimeError("score")
+        return await compute_scores_many(batches, *args, **kwargs)
+
+    with (
+        mock.patch.object(comparison_bit_service, "get_candidate_bits", failing_get_candidate_bits),
+        mock.patch.object(score_service, "compute_scores_many", failing_compute_scores_many),
+    ):
+        for timestamp in range(1, 8):
+            errors = await process_many_frames(
+                current_timestamp=timestamp,
+                sources=sources,
+                current_bytes_values=[(1).to_bytes(128, byteorder="big")] * len(sources),
+                bit_service=BitService(BitRepository(redis)),
+                comparison_bit_service=comparison_bit_service,
+                score_service=score_service,
+                pi_notation_score_service=PiNotationScoreService(PiNotationScoreRepository(firestore_db)),
+                unit_of_work=RedisUnitOfWork(redis),
+            )
+            if timestamp > 1:
+                assert [None, "candidates", "score"] == [error and str(error) for error in errors]
+    assert score_service.has_full_window(7, sources[0])
+
+
+def test_sources(client):
+    request_body = {
+        "source": "registered_channel",
+        "source_url": "http://fake.url",
+        "threshold": 100,
+        "reporting_url": "http://fake_report.url",
+    }
+    registered_body = {**request_body, "max_prefix_distance": 0, "frame_bits": 1024, "prefix_bits": 256}
+    assert 200 == client.post("/sources", json=request_body).status_code
+    assert [registered_body] == client.get("/sources").json()
+    assert registered_body == client.delete("/sources/registered_channel").json()
+    assert [] == client.get("/sources").json()
+    assert 404 == client.delete("/sources/registered_channel").status_code
+
+
+def test_report_many_match_times(client, bit_repository, pi_notation_score_repository, redis):
+    fake_report_url = "http://fake_report.url"
+    sources = [
+        {
+            "source": f"batch_channel_{i}",
+            "source_url": f"http://fake_batch_{i}.url",
+            "threshold": 100,
+            "reporting_url": fake_report_url,
+        }
+        for i in range(3)
+    ]
+    request_body = {"sources": sources + [sources[0]]}
+
+    with (
+        app.container.redis_pool.override(redis),
+        app.container.binary_redis_pool.override(redis),
+        app.container.bit_repository.override(bit_repository),
+        app.container.pi_notation_score_repository.override(pi_notation_score_repository),
+    ):
+        for timestamp in range(1, 11):
+            time_service_mock = mock.Mock(spec=TimeService)
+            time_service_mock.get_current_timestamp.return_value = timestamp
+            time_service_mock.get_previous_day_timestamp.return_value = 0
+            with aioresponses() as mock_external_server, app.container.time_service.override(time_service_mock):
+                for source in sources[:2]:
+                    mock_external_server.get(source["source_url"], body=(1).to_bytes(128, byteorder="big"), status=200)
+                mock_external_server.get(sources[2]["source_url"], body=b"\x01", status=200)
+                response = client.post("/report/batch", json=request_body)
+            assert response.status_code == 200
+            data = response.json()
+            assert [source["source"] for source in request_body["sources"]] == [item["source"] for item in data]
+            for item in data[:2]:
+                assert item["error"] is None
+                assert timestamp == item["report_info"]["time"]
+            # a malformed frame and a duplicate source fail alone
+            assert data[2]["report_info"] is None and data[2]["error"]
+            assert data[3]["report_info"] is None and "Duplicate" in data[3]["error"]
+        assert data[0]["report_info"]["match_times"]
+
+
+def test_ingest_frames(client, bit_repository, pi_notation_score_repository, redis):
+    frame = (1).to_bytes(128, byteorder="big")
+    with (
+        app.container.redis_pool.override(redis),
+        app.container.binary_redis_pool.override(redis),
+        app.container.bit_repository.override(bit_repository),
+        app.container.pi_notation_score_repository.override(pi_notation_score_repository),
+        aioresponses() as mock_external_server,
+        client.websocket_connect(
+            "/ingest/streamed_channel?threshold=100&reporting_url=http://fake_report.url"
+        ) as websocket,
+    ):
+        mock_external_server.post("http://fake_report.url", status=200, repeat=True)
+        # one message may carry several records
+        websocket.send_bytes(b"".join(BitService.timestamp_header.pack(timestamp) + frame for timestamp in range(1, 6)))
+        for timestamp in range(6, 11):
+            websocket.send_bytes(BitService.timestamp_header.pack(timestamp) + frame)
+        reports = [websocket.receive_json() for _ in range(10)]
+        assert list(range(1, 11)) == [report["time"] for report in reports]
+        assert all("streamed_channel" == report["channel"] for report in reports)
+        assert reports[-1]["match_times"]
+
+        websocket.send_bytes(frame)
+        with pytest.raises(WebSocketDisconnect) as disconnect:
+            websocket.receive_json()
+        assert status.WS_1007_INVALID_FRAME_PAYLOAD_DATA == disconnect.value.code
+
+    with (
+        app.container.redis_pool.override(redis),
+        app.container.binary_redis_pool.override(redis),
+        app.container.bit_repository.override(bit_repository),
+        app.container.pi_notation_score_repository.override(pi_notation_score_repository),
+        aioresponses() as mock_external_server,
+        client.websocket_connect(
+            "/ingest/streamed_channel?threshold=100&reporting_url=http://fake_report.url"
+        ) as websocket,
+    ):
+        mock_external_server.post("http://fake_report.url", status=200, repeat=True)
+        # a repeated second is refused, it would drop the newer seconds of the score window
+        websocket.send_bytes(b"".join(BitService.timestamp_header.pack(timestamp) + frame for timestamp in (11, 11)))
+        assert 11 == websocket.receive_json()["time"]
+        with pytest.raises(WebSocketDisconnect) as disconnect:
+            websocket.receive_json()
+        assert status.WS_1007_INVALID_FRAME_PAYLOAD_DATA == disconnect.value.code
+        assert "not after 11" in disconnect.value.reason
+
+    # a failing tick closes the socket with an internal error instead of raising
+    with (
+        app.container.redis_pool.override(redis),
+        app.container.binary_redis_pool.override(redis),
+        app.container.bit_repository.override(bit_repository),
+        app.container.pi_notation_score_repository.override(pi_notation_score_repository),
+        mock.patch.object(PiNotationScoreService, "get_match_times", side_effect=RuntimeError("unavailable")),
+        client.websocket_connect(
+            "/ingest/failing_channel?threshold=100&reporting_url=http://fake_report.url"
+        ) as websocket,
+    ):
+        websocket.send_bytes(BitService.timestamp_header.pack(1) + frame)
+        with pytest.raises(WebSocketDisconnect) as disconnect:
+            websocket.receive_json()
+        assert status.WS_1011_INTERNAL_ERROR == disconnect.value.code
+        assert "unavailable" in disconnect.value.reason
+
+    with (
+        pytest.raises(WebSocketDisconnect) as disconnect,
+        client.websocket_connect(
+            "/ingest/streamed_channel?threshold=100&reporting_url=http://fake_report.url&frame_bits=2048&prefix_bits=2048"
+        ),
+    ):
+        pass
+    assert status.WS_1008_POLICY_VIOLATION == disconnect.value.code
+
+
+def test_metrics(client, bit_repository, pi_notation_score_repository, redis):
+    fake_url = "http://fake_metrics.url"
+    request_body = {
+        "source": "metrics_channel",
+        "source_url": fake_url,
+        "threshold": 100,
+        "reporting_url": "http://fake_report.url",
+    }
+    metrics_service = MetricsService()
+
+    # the coalescer is a singleton built with the metrics service of the container, so it is replaced too
+    with (
+        app.container.metrics_service.override(metrics_service),
+        app.container.tick_coalescer.override(TickCoalescer(metrics_service=metrics_service)),
+        app.container.redis_pool.override(redis),
+        app.container.binary_redis_pool.override(redis),
+        app.container.bit_repository.override(bit_repository),
+        app.container.pi_notation_score_repository.override(pi_notation_score_repository),
+    ):
+        # the first tick has no previous bit to chain onto, the last one has no frame
+        for timestamp in range(1, 5):
+            time_service_mock = mock.Mock(spec=TimeService)
+            time_service_mock.get_current_timestamp.return_value = timestamp
+            time_service_mock.get_previous_day_timestamp.return_value = 0
+            with aioresponses() as mock_external_server, app.container.time_service.override(time_service_mock):
+                if timestamp < 4:
+                    mock_external_server.get(fake_url, body=(1).to_bytes(128, byteorder="big"), status=200)
+                else:
+                    mock_external_server.get(fake_url, status=500)
+                assert 200 == client.post("/report", json=request_body).status_code
+        # a retry of the last second is answered from the cache of the coalescer
+        with app.container.time_service.override(time_service_mock):
+            assert 4 == client.post("/report", json=request_body).json()["time"]
+
+        response = client.get("/metrics")
+    assert 200 == response.status_code
+    assert response.headers["content-type"].startswith("text/plain")
+    metrics = response.text
+    for stage in ("fetch", "bit_round_trip", "comparison", "score", "score_round_trip", "expire", "report"):
+        assert f'tick_stage_seconds_count{{source="metrics_channel",stage="{stage}"}}' in metrics
+    assert 'tick_stage_seconds_count{source="metrics_channel",stage="tick"} 4.0' in metrics
+    assert 'broken_chains_total{link="previous_bit",source="metrics_channel"} 1.0' in metrics
+    assert 'dropped_frames_total{source="metrics_channel"} 1.0' in metrics
+    assert 'coalesced_ticks_total{by="cache",source="metrics_channel"} 1.0' in metrics
+    assert "sample_channel" not in metrics
+
+
+def test_shards(client, pi_notation_score_repository, redis):
+    members = {"a": "http://a:8000", "b": "http://b:8000"}
+    shard_service = ShardService("a", members)
+    source = next(f"sharded_channel_{i}" for i in range(100) if not shard_service.is_owner(f"sharded_channel_{i}"))
+    request_body = {
+        "source": source,
+        "source_url": "http://fake.url",
+        "threshold": 100,
+        "reporting_url": "http://fake_report.url",
+    }
+
+    with (
+        app.container.shard_service.override(shard_service),
+        app.container.redis_pool.override(redis),
+        app.container.binary_redis_pool.override(redis),
+        app.container.pi_notation_score_repository.override(pi_notation_score_repository),
+    ):
+        assert {"source": source, "member_id": "b", "url": "http://b:8000"} == client.get(
+            f"/shards/owner/{source}"
+        ).json()
+        response = client.post("/report", json=request_body, follow_redirects=False)
+        assert 307 == response.status_code
+        assert "http://b:8000/report" == response.headers["location"]
+        assert "b" == response.headers["x-shard-owner"]
+        assert 307 == client.post("/sources", json=request_body, follow_redirects=False).status_code
+
+        # the owner side of a handoff
+        state = {
+            "source": source,
+            "request_body": request_body,
+            "comparison_timestamps": [1],
+            "comparison_values": base64.b64encode(bytes(128)).decode(),
+        }
+        assert 200 == client.post("/shards/handoff", json=state).status_code
+        assert {**request_body, "max_prefix_distance": 0, "frame_bits": 1024, "prefix_bits": 256} in client.get(
+            "/sources"
+        ).json()
+        assert 422 == client.put("/shards/members", json={"members": {"b": "http://b:8000"}}).status_code
+    client.delete(f"/sources/{source}")
@@ -0,0 +1,55 @@
+import tracemalloc
+from typing import Callable, List, Optional
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from app.models import ReportRequestBody, Score
+from app.repository.comparison_bit_index import ComparisonBitIndex
+
+
+class PydanticScore(BaseModel):
+    """``Score`` as it was before it became a slotted dataclass."""
+
+    score: float
+    timestamp: int
+    source: str
+    matched_timestamp: Optional[int] = None
+
+
+def allocated_bytes(build: Callable[[], List]) -> int:
+    """Bytes still allocated by the records ``build`` returns."""
+    tracemalloc.start()
+    try:
+        records = build()
+        allocated = tracemalloc.get_traced_memory()[0]
+        del records
+        return allocated
+    finally:
+        tracemalloc.stop()
+
+
+def test_score_allocations():
+    the_source = "test_score_allocations"
+    count = 10000
+    scores_bytes = allocated_bytes(
+        lambda: [Score(score=1.5, timestamp=i, source=the_source, matched_timestamp=i - 1) for i in range(count)]
+    )
+    pydantic_scores_bytes = allocated_bytes(
+        lambda: [
+            PydanticScore(score=1.5, timestamp=i, source=the_source, matched_timestamp=i - 1) for i in range(count)
+        ]
+    )
+    assert not hasattr(Score(score=1.5, timestamp=1, source=the_source), "__dict__")
+    assert scores_bytes < pydantic_scores_bytes / 2
+
+
+def test_report_request_body_max_prefix_distance():
+    request_body = {"source": "a", "source_url": "http://a", "threshold": 1, "reporting_url": "http://b"}
+    max_prefix_distance = ComparisonBitIndex.max_prefix_distance
+    assert (
+        max_prefix_distance
+        == ReportRequestBody(**request_body, max_prefix_distance=max_prefix_distance).max_prefix_distance
+    )
+    with pytest.raises(ValidationError):
+        ReportRequestBody(**request_body, max_prefix_distance=max_prefix_distance + 1)
@@ -0,0 +1,54 @@
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.models import Bit
+from app.repository import NotFoundError
+from app.repository.blob_comparison_bit_repository import BlobComparisonBitRepository
+
+
+@pytest.fixture(scope="module")
+def redis():
+    return FakeAsyncRedis()
+
+
+@pytest.fixture(scope="module")
+def blob_comparison_bit_repository(redis):
+    return BlobComparisonBitRepository(redis=redis)
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_blob_comparison_bit_repository(blob_comparison_bit_repository: BlobComparisonBitRepository):
+    the_source = "test_blob_comparison_bit_repository"
+    one_day = 60 * 60 * 24
+    the_bits = [
+        Bit(bytes=bytes([timestamp % 256]) * 128, timestamp=timestamp, source=the_source)
+        for timestamp in range(one_day - 2, one_day + 3)
+    ]
+    for the_bit in the_bits:
+        await blob_comparison_bit_repository.add(the_bit)
+
+    assert the_bits[0] == await blob_comparison_bit_repository.get_bit_by_timestamp_and_source(one_day - 2, the_source)
+    with pytest.raises(NotFoundError):
+        await blob_comparison_bit_repository.get_bit_by_timestamp_and_source(one_day - 3, the_source)
+    with pytest.raises(NotFoundError):
+        await blob_comparison_bit_repository.get_bit_by_timestamp_and_source(2, the_source)
+
+    # the range wraps around the end of the blob
+    assert the_bits[1:] == await blob_comparison_bit_repository.get_bits_between_timestamps(
+        one_day - 1, one_day + 3, the_source
+    )
+    assert [] == await blob_comparison_bit_repository.get_bits_between_timestamps(1, 1, the_source)
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_blob_comparison_bit_repository_frame_width(blob_comparison_bit_repository: BlobComparisonBitRepository):
+    the_source = "test_blob_comparison_bit_repository_frame_width"
+    narrow_bit = Bit(bytes=bytes([1]) * 128, timestamp=1, source=the_source)
+    wide_bits = [Bit(bytes=bytes([timestamp]) * 512, timestamp=timestamp, source=the_source) for timestamp in (1, 2)]
+    for the_bit in [narrow_bit, *wide_bits]:
+        await blob_comparison_bit_repository.add(the_bit)
+
+    # every width has its own blob, with slots of its size
+    assert narrow_bit == await blob_comparison_bit_repository.get_bit_by_timestamp_and_source(1, the_source)
+    assert wide_bits[0] == await blob_comparison_bit_repository.get_bit_by_timestamp_and_source(1, the_source, 512)
+    assert wide_bits == await blob_comparison_bit_repository.get_bits_between_timestamps(1, 3, the_source, 512)
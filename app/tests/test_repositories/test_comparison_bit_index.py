@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from app.models import Bit, FrameFormat
+from app.repository.comparison_bit_index import ComparisonBitIndex
+
+
+@pytest.fixture(scope="module")
+def comparison_bit_index():
+    return ComparisonBitIndex()
+
+
+def test_comparison_bit_index(comparison_bit_index: ComparisonBitIndex):
+    the_source = "test_comparison_bit_index"
+    one_day = 60 * 60 * 24
+    the_bytes = (1).to_bytes(128, byteorder="big")
+    other_prefix_bytes = (1).to_bytes(1, byteorder="big") + bytes(127)
+
+    first_bit = Bit(bytes=the_bytes, timestamp=1, source=the_source)
+    other_prefix_bit = Bit(bytes=other_prefix_bytes, timestamp=2, source=the_source)
+    comparison_bit_index.add(first_bit)
+    comparison_bit_index.add(other_prefix_bit)
+
+    current_bit = Bit(bytes=the_bytes, timestamp=1 + one_day, source=the_source)
+    assert [first_bit] == comparison_bit_index.get_candidate_bits(current_bit)
+    assert [] == comparison_bit_index.get_candidate_bits(Bit(bytes=the_bytes, timestamp=1, source="other_source"))
+
+    comparison_bit_index.add(current_bit)
+    assert [first_bit] == comparison_bit_index.get_candidate_bits(current_bit)
+    assert 2 == comparison_bit_index.bucket_size(current_bit)
+
+    next_bit = Bit(bytes=the_bytes, timestamp=2 + one_day, source=the_source)
+    comparison_bit_index.add(next_bit)
+    assert [current_bit] == comparison_bit_index.get_candidate_bits(next_bit)
+    assert 2 == comparison_bit_index.bucket_size(next_bit)
+    assert 1 == comparison_bit_index.bucket_size(other_prefix_bit)
+
+    comparison_bit_index.add(Bit(bytes=the_bytes, timestamp=3 + one_day, source=the_source))
+    assert 0 == comparison_bit_index.bucket_size(other_prefix_bit)
+
+
+def test_comparison_bit_index_slots():
+    the_source = "test_comparison_bit_index_slots"
+    comparison_bit_index = ComparisonBitIndex()
+    bits = [Bit(bytes=bytes([timestamp]) * 128, timestamp=timestamp, source=the_source) for timestamp in (10, 20)]
+    for bit in bits:
+        comparison_bit_index.add(bit)
+    # the slot of a value is shared with the values a day apart from it, an older one is ignored
+    comparison_bit_index.add(Bit(bytes=bytes(128), timestamp=10 - ComparisonBitIndex.slot_count, source=the_source))
+    assert ([10, 20], bits[0].bytes + bits[1].bytes) == comparison_bit_index.export_source(the_source)
+
+    # after a gap of more than a day, every slot is evicted at once
+    current_bit = Bit(bytes=bytes([10]) * 128, timestamp=30 + 2 * ComparisonBitIndex.slot_count, source=the_source)
+    comparison_bit_index.add(current_bit)
+    assert ([current_bit.timestamp], current_bit.bytes) == comparison_bit_index.export_source(the_source)
+    assert [] == comparison_bit_index.get_candidate_bits(current_bit)
+
+
+def test_comparison_bit_index_prefix_distance():
+    the_source = "test_comparison_bit_index_prefix_distance"
+    comparison_bit_index = ComparisonBitIndex()
+    rng = np.random.default_rng(0)
+    current_bytes = rng.integers(0, 256, 128, dtype=np.uint8)
+    bits = []
+    for timestamp, distance in enumerate([0, 1, 3, 7, 8, 40], start=1):
+        the_bytes = current_bytes.copy()
+        flipped_bits = rng.choice(256, distance, replace=False)
+        np.bitwise_xor.at(the_bytes, flipped_bits // 8, (128 >> (flipped_bits % 8)).astype(np.uint8))
+        bits.append(Bit(bytes=the_bytes.tobytes(), timestamp=timestamp, source=the_source))
+        comparison_bit_index.add(bits[-1])
+
+    current_bit = Bit(bytes=current_bytes.tobytes(), timestamp=100, source=the_source)
+    assert bits[:1] == comparison_bit_index.get_candidate_bits(current_bit)
+    assert bits[:3] == sorted(comparison_bit_index.get_candidate_bits(current_bit, 3), key=lambda bit: bit.timestamp)
+    # the block indexes follow the values added and evicted after they are built
+    comparison_bit_index.add(Bit(bytes=bits[1].bytes, timestamp=99, source=the_source))
+    comparison_bit_index.evict_before_timestamp(the_source, 3)
+    assert [3, 4, 99] == sorted(bit.timestamp for bit in comparison_bit_index.get_candidate_bits(current_bit, 7))
+    with pytest.raises(ValueError):
+        comparison_bit_index.get_candidate_bits(current_bit, 8)
+
+
+def test_comparison_bit_index_frame_format():
+    the_source = "test_comparison_bit_index_frame_format"
+    frame_format = FrameFormat(2048, 512)
+    comparison_bit_index = ComparisonBitIndex()
+    comparison_bit_index.set_frame_format(the_source, frame_format)
+    current_bytes = np.random.default_rng(0).integers(0, 256, frame_format.byte_length, dtype=np.uint8)
+    same_prefix_bytes, other_prefix_bytes = current_bytes.copy(), current_bytes.copy()
+    same_prefix_bytes[frame_format.prefix_byte_length :] ^= 1
+    other_prefix_bytes[40] ^= 1  # past the default prefix of 32 bytes, within the one of 64
+    bits = [
+        Bit(bytes=the_bytes.tobytes(), timestamp=timestamp, source=the_source)
+        for timestamp, the_bytes in enumerate([same_prefix_bytes, other_prefix_bytes], start=1)
+    ]
+    for bit in bits:
+        comparison_bit_index.add(bit)
+
+    current_bit = Bit(bytes=current_bytes.tobytes(), timestamp=3, source=the_source)
+    assert bits[:1] == comparison_bit_index.get_candidate_bits(current_bit)
+    assert bits == sorted(comparison_bit_index.get_candidate_bits(current_bit, 1), key=lambda bit: bit.timestamp)
+
+    restored_index = ComparisonBitIndex()
+    restored_index.import_source(the_source, *comparison_bit_index.export_source(the_source), frame_format)
+    assert frame_format == restored_index.get_frame_format(the_source)
+    assert bits[:1] == restored_index.get_candidate_bits(current_bit)
+
+    # values of another format are never compared with the new ones
+    comparison_bit_index.set_frame_format(the_source, frame_format)
+    assert bits[:1] == comparison_bit_index.get_candidate_bits(current_bit)
+    comparison_bit_index.set_frame_format(the_source, FrameFormat(2048, 256))
+    assert [] == comparison_bit_index.get_candidate_bits(current_bit)
@@ -1,6 +1,7 @@
 import pytest
 from fakeredis import FakeAsyncRedis
 
+from app.application import app
 from app.models import Bit
 from app.repository.comparison_bit_repository import ComparisonBitRepository
 
@@ -24,3 +25,22 @@ async def test_comparison_bit_repository(comparison_bit_repository: ComparisonBi
     assert the_comparison_bit == await comparison_bit_repository.get_bit_by_timestamp_and_source(
         1, "test_comparison_bit_repository"
     )
+
+
+@pytest.mark.asyncio(scope="module")
+@pytest.mark.parametrize("backend", ["redis", "blob"])
+async def test_comparison_bit_repository_binary_pool(backend: str):
+    """Comparison values are raw bytes, so every backend must use the bytes-mode pool, not the decoding one."""
+    the_comparison_bit = Bit(
+        bytes=bytes([0xFF]) * 128, timestamp=1, source="test_comparison_bit_repository_binary_pool"
+    )
+    with (
+        app.container.config.comparison_bit_backend.override(backend),
+        app.container.redis_pool.override(FakeAsyncRedis(decode_responses=True)),
+        app.container.binary_redis_pool.override(FakeAsyncRedis()),
+    ):
+        comparison_bit_repository = app.container.comparison_bit_repository()
+        await comparison_bit_repository.add(the_comparison_bit)
+        assert the_comparison_bit == await comparison_bit_repository.get_bit_by_timestamp_and_source(
+            1, the_comparison_bit.source
+        )
@@ -0,0 +1,33 @@
+import pytest
+
+from app.models import Score
+from app.repository.match_tracker import MatchTracker
+
+
+@pytest.fixture(scope="module")
+def match_tracker():
+    return MatchTracker()
+
+
+def test_match_tracker(match_tracker: MatchTracker):
+    the_source = "test_match_tracker"
+    the_scores = [
+        Score(score=timestamp % 4, timestamp=timestamp, source=the_source, matched_timestamp=timestamp - 100)
+        for timestamp in range(1, 13)
+    ]
+    for the_score in the_scores:
+        match_tracker.add(the_score)
+    match_tracker.add(the_scores[0])
+
+    # ordered by score then timestamp, both descending
+    assert [11, 7, 3, 10] == [
+        score.timestamp for score in match_tracker.get_scores_larger_than_threshold(1, the_source, 4)
+    ]
+    assert [the_scores[10]] == match_tracker.get_scores_larger_than_threshold(2, the_source, 1)
+    assert [] == match_tracker.get_scores_larger_than_threshold(3, the_source, 10)
+    assert [] == match_tracker.get_scores_larger_than_threshold(0, "other_source", 10)
+
+    match_tracker.remove_before_timestamp(the_source, 7)
+    assert [11, 10] == [score.timestamp for score in match_tracker.get_scores_larger_than_threshold(1, the_source, 4)]
+    match_tracker.remove_before_timestamp(the_source, 12)
+    assert [] == match_tracker.get_scores_larger_than_threshold(-1, the_source, 10)
@@ -0,0 +1,47 @@
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.models import Score
+from app.repository import NotFoundError
+from app.repository.packed_score_repository import PackedScoreRepository
+
+
+@pytest.fixture(scope="module")
+def redis():
+    return FakeAsyncRedis()
+
+
+@pytest.fixture(scope="module")
+def packed_score_repository(redis):
+    return PackedScoreRepository(redis=redis)
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_packed_score_repository(packed_score_repository: PackedScoreRepository):
+    the_source = "test_packed_score_repository"
+    the_scores = [
+        Score(
+            score=sum((1024 - i) / 1024 for i in range(768 - lag)),
+            timestamp=10,
+            source=the_source,
+            matched_timestamp=10 - lag,
+        )
+        for lag in range(1, 4)
+    ]
+    await packed_score_repository.add_many(the_scores)
+    assert the_scores == await packed_score_repository.get_scores_by_timestamp_and_source(10, the_source)
+    assert the_scores[1] == await packed_score_repository.get_score_by_timestamp_and_source(10, the_source, 8)
+
+    the_score = Score(score=1, timestamp=11, source=the_source)
+    await packed_score_repository.add(the_score)
+    assert the_score == await packed_score_repository.get_score_by_timestamp_and_source(11, the_source)
+    with pytest.raises(NotFoundError):
+        await packed_score_repository.get_score_by_timestamp_and_source(11, the_source, 1)
+
+    # like add_many, add replaces the scores stored for the second
+    await packed_score_repository.add(the_score)
+    assert [the_score] == await packed_score_repository.get_scores_by_timestamp_and_source(11, the_source)
+
+    assert {10: the_scores, 11: [the_score]} == await packed_score_repository.get_scores_between_timestamps(
+        9, 12, the_source
+    )
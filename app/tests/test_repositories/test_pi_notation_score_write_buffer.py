@@ -0,0 +1,64 @@
+from unittest import mock
+
+import pytest
+
+from app.models import Score
+from app.repository.pi_notation_score_repository import PiNotationScoreRepository
+from app.repository.pi_notation_score_write_buffer import PiNotationScoreWriteBuffer
+from app.tests.mock_firestore import BatchAsyncMockFirestore
+
+
+@pytest.fixture(scope="module")
+def firestore_db():
+    return BatchAsyncMockFirestore()
+
+
+@pytest.fixture(scope="module")
+def pi_notation_score_write_buffer(firestore_db):
+    return PiNotationScoreWriteBuffer(PiNotationScoreRepository(firestore_db=firestore_db))
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_pi_notation_score_write_buffer(
+    pi_notation_score_write_buffer: PiNotationScoreWriteBuffer, firestore_db: BatchAsyncMockFirestore
+):
+    the_source = "test_pi_notation_score_write_buffer"
+    score_count = PiNotationScoreRepository.max_batch_size * 2 + 1
+
+    async def count_documents() -> int:
+        return len([doc_snapshot async for doc_snapshot in firestore_db.collection(the_source).stream()])
+
+    pi_notation_score_write_buffer.start()
+    for timestamp in range(score_count):
+        await pi_notation_score_write_buffer.add(Score(score=1, timestamp=timestamp, source=the_source))
+    pi_notation_score_write_buffer.expire(the_source, PiNotationScoreRepository.max_batch_size)
+    assert 0 == await count_documents()
+
+    # shutdown writes 3 batches of scores then sweeps 2 batches of expired ones
+    await pi_notation_score_write_buffer.close()
+    assert 5 == firestore_db.batch_commits
+    assert score_count - PiNotationScoreRepository.max_batch_size - 1 == await count_documents()
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_pi_notation_score_write_buffer_max_pending():
+    the_source = "test_pi_notation_score_write_buffer_max_pending"
+    firestore_db = BatchAsyncMockFirestore()
+    repository = PiNotationScoreRepository(firestore_db=firestore_db)
+    write_buffer = PiNotationScoreWriteBuffer(repository, max_pending=3)
+    for timestamp in range(3):
+        await write_buffer.add(Score(score=1, timestamp=timestamp, source=the_source))
+    assert 0 == firestore_db.batch_commits
+
+    # over capacity, a failing write fails the caller and the buffer stays bounded
+    with mock.patch.object(repository, "add_many", side_effect=RuntimeError("unavailable")):
+        for timestamp in range(3, 6):
+            with pytest.raises(RuntimeError):
+                await write_buffer.add(Score(score=1, timestamp=timestamp, source=the_source))
+
+    # once writes succeed again, the buffered scores are flushed inline before the new one is buffered
+    await write_buffer.add(Score(score=1, timestamp=3, source=the_source))
+    assert 1 == firestore_db.batch_commits
+    assert 3 == len([doc_snapshot async for doc_snapshot in firestore_db.collection(the_source).stream()])
+    await write_buffer.close()
+    assert 4 == len([doc_snapshot async for doc_snapshot in firestore_db.collection(the_source).stream()])
@@ -1,4 +1,5 @@
 import asyncio
+from dataclasses import asdict
 
 import pytest
 from mockfirestore import AsyncMockFirestore
@@ -24,7 +25,7 @@ async def test_pi_notation_score_repository(
     the_score = Score(score=1, timestamp=10, source="test_pi_notation_score_repository")
     await pi_notation_score_repository.add(the_score)
     doc_snapshot = await firestore_db.collection(the_score.source).document(str(the_score.timestamp)).get()
-    assert doc_snapshot.to_dict() == the_score.model_dump()
+    assert doc_snapshot.to_dict() == asdict(the_score)
 
     await asyncio.gather(
         *(
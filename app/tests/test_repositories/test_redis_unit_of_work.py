@@ -0,0 +1,37 @@
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.models import Bit, Score
+from app.repository.bit_repository import BitRepository
+from app.repository.redis_unit_of_work import RedisUnitOfWork
+from app.repository.score_repository import ScoreRepository
+
+
+@pytest.fixture(scope="module")
+def redis():
+    return FakeAsyncRedis()
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_redis_unit_of_work(redis: FakeAsyncRedis):
+    the_source = "test_redis_unit_of_work"
+    bit_repository = BitRepository(redis=redis)
+    score_repository = ScoreRepository(redis=redis)
+    unit_of_work = RedisUnitOfWork(redis)
+
+    the_bit = Bit(bytes=(1).to_bytes(128, byteorder="big"), timestamp=2, source=the_source)
+    the_scores = [Score(score=1, timestamp=2, source=the_source, matched_timestamp=timestamp) for timestamp in (0, 1)]
+    await bit_repository.add(the_bit, unit_of_work)
+    await score_repository.add_many(the_scores, unit_of_work)
+    the_bit_future = bit_repository.queue_get_bit(2, the_source, unit_of_work)
+    missing_bit_future = bit_repository.queue_get_bit(1, the_source, unit_of_work)
+    assert not the_bit_future.done()
+
+    await unit_of_work.commit()
+    assert 1 == unit_of_work.round_trips
+    assert the_bit == await the_bit_future
+    assert None is await missing_bit_future
+    assert the_scores[1] == await score_repository.get_score_by_timestamp_and_source(2, the_source, 1)
+
+    await unit_of_work.commit()
+    assert 1 == unit_of_work.round_trips
@@ -0,0 +1,31 @@
+import pytest
+
+from app.repository.score_window import ScoreWindow
+
+
+@pytest.fixture(scope="module")
+def score_window():
+    return ScoreWindow()
+
+
+def test_score_window(score_window: ScoreWindow):
+    the_source = "test_score_window"
+    for timestamp in range(1, 5):
+        score_window.add(the_source, timestamp, {1: 2, 2: 3, timestamp + 10: 1})
+        assert {} == score_window.get_products(the_source, timestamp)
+
+    # lag 1 and 2 are on every vector, lag 15 only on the current one
+    score_window.add(the_source, 5, {1: 2, 2: 3, 15: 1})
+    assert {1: 32, 2: 243} == score_window.get_products(the_source, 5)
+    assert {} == score_window.get_products("other_source", 5)
+
+    score_window.add(the_source, 6, {1: 2})
+    assert {1: 32} == score_window.get_products(the_source, 6)
+    score_window.add(the_source, 8, {1: 2})
+    assert {} == score_window.get_products(the_source, 8)
+
+    # the last second may be scored again, an earlier one would drop the newer seconds
+    score_window.add(the_source, 8, {1: 3})
+    with pytest.raises(ValueError):
+        score_window.add(the_source, 7, {1: 2})
+    assert [(6, {1: 2}), (8, {1: 3})] == score_window.export_source(the_source)[-2:]
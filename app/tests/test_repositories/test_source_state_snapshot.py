@@ -0,0 +1,33 @@
+import pytest
+
+from app.models import ReportRequestBody, Score, SourceState
+from app.repository.source_state_snapshot import SourceStateSnapshot
+
+
+def test_source_state_snapshot(tmp_path):
+    snapshot = SourceStateSnapshot(str(tmp_path / "snapshot.bin"))
+    assert [] == snapshot.load()
+
+    states = [
+        SourceState(
+            source="snapshot_channel",
+            request_body=ReportRequestBody(
+                source="snapshot_channel", source_url="http://fake.url", threshold=1, reporting_url="http://fake.url"
+            ),
+            score_vectors=[(4, {1: 0.5}), (5, {1: 2.0, 3: 1.0})],
+            match_scores=[Score(score=3, timestamp=5, source="snapshot_channel", matched_timestamp=4)],
+            comparison_timestamps=[1, 2],
+            comparison_values=bytes([1]) * 128 + bytes([2]) * 128,
+        ),
+        SourceState(source="empty_channel"),
+    ]
+    snapshot.save(states)
+    assert states == snapshot.load()
+    assert not (tmp_path / "snapshot.bin.tmp").exists()
+
+    (tmp_path / "snapshot.bin").write_bytes((tmp_path / "snapshot.bin").read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        snapshot.load()
+    (tmp_path / "snapshot.bin").write_bytes(b"not a snapshot")
+    with pytest.raises(ValueError):
+        snapshot.load()
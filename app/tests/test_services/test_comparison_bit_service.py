@@ -36,3 +36,6 @@ async def test_comparison_bit_service(comparison_bit_service: ComparisonBitServi
     )
     assert await comparison_bit_service.previous_bit_exists(current_comparison_bit)
     assert previous_comparison_bit == await comparison_bit_service.get_previous_bit(current_comparison_bit)
+
+    candidate_bits = await comparison_bit_service.get_candidate_bits(current_comparison_bit)
+    assert [previous_comparison_bit] == candidate_bits
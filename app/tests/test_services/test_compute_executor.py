@@ -0,0 +1,44 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.service.compute_executor import ComputeExecutor, init_compute_executor
+from app.service.score_service import compute_scores, compute_scores_many
+
+
+def current_thread_name() -> str:
+    return threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_compute_executor_policies():
+    main_thread = current_thread_name()
+    auto = ComputeExecutor(inline_max_cost=10)
+    assert main_thread == await auto.run(current_thread_name, cost=10)
+    assert main_thread != await auto.run(current_thread_name, cost=11)
+    assert main_thread == await ComputeExecutor("inline").run(current_thread_name, cost=10**9)
+    assert main_thread != await ComputeExecutor("thread").run(current_thread_name)
+    with pytest.raises(ValueError):
+        ComputeExecutor("gpu")
+
+
+@pytest.mark.asyncio
+async def test_compute_executor_process_pool():
+    rng = np.random.default_rng(0)
+    current = rng.integers(0, 256, 128, dtype=np.uint8)
+    candidates = rng.integers(0, 256, (4, 128), dtype=np.uint8)
+    candidates[:2, :32] = current[:32]
+    batches = [(current.tobytes(), candidates)]
+    expected_scores = [compute_scores(current.tobytes(), candidates, 256, 1024).tolist()]
+
+    with ProcessPoolExecutor(max_workers=1) as process_pool:
+        compute_executor = ComputeExecutor(process_pool=process_pool, inline_max_cost=0, process_min_cost=4)
+        assert expected_scores == await compute_executor.run(compute_scores_many, batches, 256, 1024, cost=4)
+
+    resource = init_compute_executor("auto", 100, 1, 4)
+    compute_executor = await resource.__anext__()
+    assert expected_scores == await compute_executor.run(compute_scores_many, batches, 256, 1024, cost=4)
+    with pytest.raises(StopAsyncIteration):
+        await resource.__anext__()
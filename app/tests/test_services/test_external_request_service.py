@@ -4,7 +4,8 @@ import pytest
 from aioresponses import aioresponses
 
 from app.models import ReportInfo
-from app.service.egress_request_service import EgressRequestService
+from app.service.egress_request_service import EgressRequestService, init_http_session
+from app.service.metrics_service import MetricsService
 
 
 @pytest.fixture(scope="module")
@@ -38,3 +39,53 @@ async def test_send_report(egress_request_service: EgressRequestService, caplog)
         mock.post(fake_url, status=200)
         await egress_request_service.send_report(fake_url, fake_report)
     assert "Report sent successfully" in caplog.text
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_shared_http_session(caplog):
+    caplog.set_level(logging.NOTSET)
+    fake_url = "http://fake_shared_session.url"
+    http_session_resource = init_http_session(
+        limit=10, limit_per_host=2, keepalive_timeout=30, dns_cache_ttl=300, total_timeout=2, connect_timeout=1
+    )
+    http_session = await http_session_resource.__anext__()
+    egress_request_service = EgressRequestService(http_session)
+    with aioresponses() as mock:
+        mock.get(fake_url, body=b"first", status=200)
+        mock.get(fake_url, body=b"second", status=200)
+        mock.post(fake_url, status=200)
+        assert b"first" == await egress_request_service.fetch_current_bytes(fake_url)
+        assert b"second" == await egress_request_service.fetch_current_bytes(fake_url)
+        await egress_request_service.send_report(fake_url, ReportInfo(channel="c", time=0, match_times=[]))
+    assert "Report sent successfully" in caplog.text
+    assert not http_session.closed
+    assert 2 == http_session.connector.limit_per_host
+
+    with pytest.raises(StopAsyncIteration):
+        await http_session_resource.__anext__()
+    assert http_session.closed
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_send_report_counts_failures():
+    metrics_service = MetricsService()
+    egress_request_service = EgressRequestService(metrics_service=metrics_service)
+    fake_url = "http://fake_report.url"
+    fake_report = ReportInfo(channel="c", time=0, match_times=[])
+    with aioresponses() as mock:
+        mock.post(fake_url, status=500)
+        mock.post(fake_url, status=200)
+        await egress_request_service.send_report(fake_url, fake_report)
+        await egress_request_service.send_report(fake_url, fake_report)
+    assert 1 == metrics_service.registry.get_sample_value("report_failures_total", {"source": "c"})
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_post_report(egress_request_service: EgressRequestService):
+    fake_url = "http://fake_post_report.url"
+    fake_report = ReportInfo(channel="c", time=0, match_times=[])
+    with aioresponses() as mock:
+        mock.post(fake_url, status=500)
+        mock.post(fake_url, status=200)
+        assert not await egress_request_service.post_report(fake_url, fake_report)
+        assert await egress_request_service.post_report(fake_url, fake_report)
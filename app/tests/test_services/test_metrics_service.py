@@ -0,0 +1,25 @@
+from app.service.metrics_service import MetricsService
+
+
+def test_metrics_service():
+    metrics_service = MetricsService()
+    with metrics_service.time_stage("score", "a", "b"):
+        pass
+    metrics_service.observe_stage("fetch", 0.3, ["a"])
+    metrics_service.count_dropped_frame("a")
+    metrics_service.count_broken_chain("a", "previous_bit")
+    metrics_service.count_broken_chain("a", "previous_bit")
+    metrics_service.count_pruning("a", "score", 10, 7)
+    metrics_service.count_skipped_tick("a")
+
+    registry = metrics_service.registry
+    assert 1 == registry.get_sample_value("tick_stage_seconds_count", {"stage": "score", "source": "a"})
+    assert 1 == registry.get_sample_value("tick_stage_seconds_count", {"stage": "score", "source": "b"})
+    assert 0 == registry.get_sample_value("tick_stage_seconds_bucket", {"stage": "fetch", "source": "a", "le": "0.25"})
+    assert 1 == registry.get_sample_value("tick_stage_seconds_bucket", {"stage": "fetch", "source": "a", "le": "0.5"})
+    assert 1 == registry.get_sample_value("dropped_frames_total", {"source": "a"})
+    assert 2 == registry.get_sample_value("broken_chains_total", {"source": "a", "link": "previous_bit"})
+    assert 10 == registry.get_sample_value("evaluated_candidates_total", {"source": "a", "stage": "score"})
+    assert 7 == registry.get_sample_value("pruned_candidates_total", {"source": "a", "stage": "score"})
+    assert 1 == registry.get_sample_value("skipped_ticks_total", {"source": "a"})
+    assert b"# TYPE tick_stage_seconds histogram" in metrics_service.export()
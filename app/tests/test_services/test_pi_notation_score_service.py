@@ -4,8 +4,11 @@ import pytest
 from mockfirestore import AsyncMockFirestore
 
 from app.models import Score
+from app.repository.match_tracker import MatchTracker
 from app.repository.pi_notation_score_repository import PiNotationScoreRepository
+from app.repository.pi_notation_score_write_buffer import PiNotationScoreWriteBuffer
 from app.service.pi_notation_score_service import PiNotationScoreService
+from app.tests.mock_firestore import BatchAsyncMockFirestore
 
 
 @pytest.fixture(scope="module")
@@ -38,3 +41,37 @@ async def test_pi_notation_score_service(pi_notation_score_service: PiNotationSc
     assert [match_time1, match_time2] == await PiNotationScoreService(repository_mock).get_match_times(
         1, "test_pi_notation_score_service"
     )
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_pi_notation_score_service_with_match_tracker():
+    the_source = "test_pi_notation_score_service_with_match_tracker"
+    firestore_db = BatchAsyncMockFirestore()
+    write_buffer = PiNotationScoreWriteBuffer(PiNotationScoreRepository(firestore_db))
+    pi_notation_score_service = PiNotationScoreService(
+        PiNotationScoreRepository(firestore_db), MatchTracker(), write_buffer
+    )
+    for timestamp in range(1, 4):
+        await pi_notation_score_service.save_score(timestamp, timestamp, the_source, timestamp - 100)
+    assert [-97, -98] == await pi_notation_score_service.get_match_times(1, the_source)
+    assert [] == [doc_snapshot async for doc_snapshot in firestore_db.collection(the_source).stream()]
+
+    await write_buffer.flush()
+    assert 1 == firestore_db.batch_commits
+
+    await pi_notation_score_service.remove_expired_pi_notation_scores(the_source, 2)
+    assert [-97] == await pi_notation_score_service.get_match_times(1, the_source)
+    assert 3 == len([doc_snapshot async for doc_snapshot in firestore_db.collection(the_source).stream()])
+
+    await write_buffer.sweep()
+    assert 2 == firestore_db.batch_commits
+    assert ["3--97"] == [doc_snapshot.id async for doc_snapshot in firestore_db.collection(the_source).stream()]
+
+
+def test_get_best_scores():
+    the_source = "test_get_best_scores"
+    scores = [
+        Score(score=lag % 4, timestamp=100, source=the_source, matched_timestamp=100 - lag) for lag in range(1, 30)
+    ]
+    best_scores = PiNotationScoreService.get_best_scores(scores, 1)
+    assert [73, 77, 81, 85, 89, 93, 97, 74, 78, 82] == [score.matched_timestamp for score in best_scores]
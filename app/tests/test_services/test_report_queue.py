@@ -0,0 +1,89 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from app.models import ReportInfo
+from app.service.egress_request_service import EgressRequestService
+from app.service.metrics_service import MetricsService
+from app.service.report_queue import ReportQueue
+
+
+@pytest.mark.asyncio
+async def test_report_queue():
+    metrics_service = MetricsService()
+    egress_request_service = mock.AsyncMock(spec=EgressRequestService)
+    accepted = asyncio.Event()
+    in_flight = []
+    max_in_flight = []
+
+    async def post_report(url: str, report_info: ReportInfo) -> bool:
+        in_flight.append(url)
+        max_in_flight.append(in_flight.count(url))
+        await accepted.wait()
+        in_flight.remove(url)
+        return True
+
+    egress_request_service.post_report.side_effect = post_report
+    report_queue = ReportQueue(
+        egress_request_service, metrics_service, max_size=3, max_concurrency_per_destination=1, jitter=lambda: 0
+    )
+    for time in range(3):
+        await report_queue.put("http://a", ReportInfo(channel="queued_channel", time=time, match_times=[]))
+    assert 3 == report_queue.depth
+    assert 3 == metrics_service.registry.get_sample_value("report_queue_depth")
+
+    # a full queue holds the next report back until a delivery is done
+    put = asyncio.ensure_future(
+        report_queue.put("http://b", ReportInfo(channel="queued_channel", time=3, match_times=[]))
+    )
+    await asyncio.sleep(0)
+    assert not put.done()
+    accepted.set()
+    await put
+    await report_queue.close()
+    assert 0 == report_queue.depth
+    assert 4 == egress_request_service.post_report.await_count
+    assert 1 == max(max_in_flight)
+    assert 4 == metrics_service.registry.get_sample_value(
+        "report_delivery_lag_seconds_count", {"source": "queued_channel"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_report_queue_retries():
+    the_source = "retried_channel"
+    metrics_service = MetricsService()
+    egress_request_service = mock.AsyncMock(spec=EgressRequestService)
+    egress_request_service.post_report.side_effect = [False, False, True] + [False] * 3
+    report_queue = ReportQueue(egress_request_service, metrics_service, max_attempts=3, jitter=lambda: 0)
+
+    await report_queue.put("http://a", ReportInfo(channel=the_source, time=1, match_times=[1]))
+    await report_queue.close()
+    await report_queue.put("http://a", ReportInfo(channel=the_source, time=2, match_times=[2]))
+    await report_queue.close()
+    registry = metrics_service.registry
+    assert 6 == egress_request_service.post_report.await_count
+    assert 4 == registry.get_sample_value("report_retries_total", {"source": the_source})
+    assert 1 == registry.get_sample_value("report_failures_total", {"source": the_source})
+    assert 1 == registry.get_sample_value("report_delivery_lag_seconds_count", {"source": the_source})
+
+
+@pytest.mark.asyncio
+async def test_report_queue_skip_unchanged():
+    the_source = "unchanged_channel"
+    metrics_service = MetricsService()
+    egress_request_service = mock.AsyncMock(spec=EgressRequestService)
+    egress_request_service.post_report.return_value = True
+    report_queue = ReportQueue(egress_request_service, metrics_service, skip_unchanged=True)
+
+    for time, match_times, url in [
+        (1, [1], "http://a"),
+        (2, [1], "http://a"),
+        (3, [1], "http://b"),
+        (4, [1, 2], "http://a"),
+    ]:
+        await report_queue.put(url, ReportInfo(channel=the_source, time=time, match_times=match_times))
+        await report_queue.close()
+    assert [1, 3, 4] == [call.args[1].time for call in egress_request_service.post_report.await_args_list]
+    assert 1 == metrics_service.registry.get_sample_value("skipped_reports_total", {"source": the_source})
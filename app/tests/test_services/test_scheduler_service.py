@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from app.models import ReportInfo, ReportRequestBody
+from app.repository.source_registry import SourceRegistry
+from app.service.metrics_service import MetricsService
+from app.service.scheduler_service import SchedulerService
+
+
+class FastSchedulerService(SchedulerService):
+    interval_seconds = 0.05
+
+
+@pytest.fixture(scope="module")
+def source_registry():
+    return SourceRegistry()
+
+
+@pytest.fixture(scope="module")
+def metrics_service():
+    return MetricsService()
+
+
+@pytest.fixture(scope="module")
+def scheduler_service(source_registry, metrics_service):
+    return FastSchedulerService(source_registry=source_registry, max_concurrency=10, metrics_service=metrics_service)
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_scheduler_service(
+    scheduler_service: SchedulerService, source_registry: SourceRegistry, metrics_service: MetricsService
+):
+    ticks = {"fast": 0, "slow": 0}
+
+    async def tick(request_body: ReportRequestBody) -> ReportInfo:
+        ticks[request_body.source] += 1
+        if request_body.source == "slow":
+            await asyncio.sleep(FastSchedulerService.interval_seconds * 3.5)
+        return ReportInfo(channel=request_body.source, time=0, match_times=[])
+
+    for source in ticks:
+        source_registry.register(
+            ReportRequestBody(source=source, source_url="http://fake.url", threshold=0, reporting_url="http://fake.url")
+        )
+    scheduler_service.start(tick)
+    await asyncio.sleep(FastSchedulerService.interval_seconds * 10.5)
+    await scheduler_service.close()
+
+    assert 8 <= ticks["fast"] <= 11
+    assert 2 <= ticks["slow"] <= 3
+    registry = metrics_service.registry
+    assert registry.get_sample_value("skipped_ticks_total", {"source": "slow"}) >= 5
+    assert registry.get_sample_value("skipped_ticks_total", {"source": "fast"}) is None
@@ -1,9 +1,11 @@
+import numpy as np
 import pytest
 from fakeredis import FakeAsyncRedis
 
-from app.models import Bit, Score
+from app.models import Bit, FrameFormat, Score
+from app.repository.packed_score_repository import PackedScoreRepository
 from app.repository.score_repository import ScoreRepository
-from app.service.score_service import ScoreService
+from app.service.score_service import ScoreService, bytes_to_bitarray, compute_score, compute_scores, max_score
 
 
 @pytest.fixture(scope="module")
@@ -25,16 +27,155 @@ def score_service(score_repository):
 async def test_score_service(score_service: ScoreService):
     the_bit = Bit(bytes=(1).to_bytes(128, byteorder="big"), timestamp=1, source="test_score_service")
     assert await score_service.compute_score(the_bit, the_bit) == sum((1024 - i) / 1024 for i in range(768))
-    the_score = await score_service.save_score(1, 5, "test_score_service")
-    assert Score(score=1, timestamp=5, source="test_score_service") == the_score
-    the_previous_score1 = await score_service.save_score(1, 4, "test_score_service")
-    the_previous_score2 = await score_service.save_score(1, 3, "test_score_service")
-    the_previous_score3 = await score_service.save_score(1, 2, "test_score_service")
-    assert not await score_service.previous_4_scores_exists(the_score)
-    the_previous_score4 = await score_service.save_score(1, 1, "test_score_service")
-    assert await score_service.previous_4_scores_exists(the_score)
-    previous_n_scores = await score_service.get_previous_4_scores(the_score)
-    assert the_previous_score1 in previous_n_scores
-    assert the_previous_score2 in previous_n_scores
-    assert the_previous_score3 in previous_n_scores
-    assert the_previous_score4 in previous_n_scores
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_save_scores_without_repository():
+    score_service = ScoreService()
+    the_source = "test_save_scores_without_repository"
+    for timestamp in range(10, 15):
+        await score_service.save_scores([2], timestamp, the_source, [timestamp - 1])
+
+    assert [Score(score=32, timestamp=14, source=the_source, matched_timestamp=13)] == (
+        score_service.get_rolling_pi_notation_scores(14, the_source)
+    )
+
+
+@pytest.mark.parametrize("frame_format", [FrameFormat(), FrameFormat(2048, 512), FrameFormat(4096, 256)])
+def test_compute_scores_matches_compute_score(frame_format: FrameFormat):
+    first_n = frame_format.prefix_bits
+    total_n = frame_format.frame_bits
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        current = rng.integers(0, 256, total_n // 8, dtype=np.uint8)
+        candidates = rng.integers(0, 256, (32, total_n // 8), dtype=np.uint8)
+        # most random candidates miss the prefix, so share it with half of them and flip bits in some of those
+        candidates[::2, : first_n // 8] = current[: first_n // 8]
+        flipped_bits = rng.integers(0, first_n, 4)
+        candidates[::8, flipped_bits // 8] ^= (128 >> (flipped_bits % 8)).astype(np.uint8)
+        candidates[1] = current
+
+        scores = compute_scores(current.tobytes(), candidates, first_n, total_n)
+        expected_scores = [
+            compute_score(
+                bytes_to_bitarray(current.tobytes()), bytes_to_bitarray(candidate.tobytes()), first_n, total_n
+            )
+            for candidate in candidates
+        ]
+        assert expected_scores == scores.tolist()
+
+
+@pytest.mark.parametrize("frame_format", [FrameFormat(), FrameFormat(2048, 512), FrameFormat(4096, 256)])
+def test_compute_scores_with_floor(frame_format: FrameFormat):
+    first_n = frame_format.prefix_bits
+    total_n = frame_format.frame_bits
+    rng = np.random.default_rng(0)
+    current = rng.integers(0, 256, total_n // 8, dtype=np.uint8)
+    candidates = np.tile(current, (64, 1))
+    # flip more and more of the tail, from its lightest bytes, so the scores spread around the floor
+    for row, candidate in enumerate(candidates):
+        candidate[total_n // 8 - row :] ^= rng.integers(1, 256, row, dtype=np.uint8)
+    candidates[::5, 0] ^= 1
+
+    scores = compute_scores(current.tobytes(), candidates, first_n, total_n)
+    floor = float(np.median(scores))
+    pruned_scores = compute_scores(current.tobytes(), candidates, first_n, total_n, floor)
+    assert np.where(scores > floor, scores, 0).tolist() == pruned_scores.tolist()
+    assert 0 < np.count_nonzero(pruned_scores) < np.count_nonzero(scores)
+
+
+def test_compute_scores_with_prefix_distance():
+    first_n = ScoreService.frame_format.prefix_bits
+    total_n = ScoreService.frame_format.frame_bits
+    rng = np.random.default_rng(0)
+    current = rng.integers(0, 256, total_n // 8, dtype=np.uint8)
+    candidates = rng.integers(0, 256, (8, total_n // 8), dtype=np.uint8)
+    candidates[:, : first_n // 8] = current[: first_n // 8]
+    for row, candidate in enumerate(candidates):
+        candidate[:row] ^= 1  # one flipped prefix bit in each of the first ``row`` bytes
+
+    exact_scores = compute_scores(current.tobytes(), candidates, first_n, total_n)
+    scores = compute_scores(current.tobytes(), candidates, first_n, total_n, max_prefix_distance=3)
+    assert [exact_scores[0]] + [0] * 7 == exact_scores.tolist()
+    tail_scores = compute_scores(
+        current.tobytes(),
+        np.hstack([np.tile(current[: first_n // 8], (8, 1)), candidates[:, first_n // 8 :]]),
+        first_n,
+        total_n,
+    )
+    assert tail_scores[:4].tolist() + [0] * 4 == scores.tolist()
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_compute_scores_many_frame_formats(score_service: ScoreService):
+    rng = np.random.default_rng(0)
+    frame_formats = [FrameFormat(), FrameFormat(4096, 512)]
+    values = [
+        rng.integers(0, 256, frame_format.byte_length, dtype=np.uint8).tobytes() for frame_format in frame_formats
+    ]
+    # every value is scored against itself, at the width of its own frame format
+    batches = [
+        (
+            Bit(bytes=value, timestamp=2, source="test_frame_formats"),
+            [Bit(bytes=value, timestamp=1, source="test_frame_formats")],
+        )
+        for value in values
+    ]
+
+    scores = await score_service.compute_scores_many(batches, frame_formats=frame_formats)
+    assert [[max_score(frame_format.prefix_bits, frame_format.frame_bits)] for frame_format in frame_formats] == scores
+    assert 100 == pytest.approx(
+        ScoreService.get_score_floor(100, frame_formats[1]) * max_score(512, 4096) ** ScoreService.previous_n
+    )
+
+
+def test_score_floor():
+    first_n = ScoreService.frame_format.prefix_bits
+    total_n = ScoreService.frame_format.frame_bits
+    floor = ScoreService.get_score_floor(100)
+    assert 100 == pytest.approx(floor * max_score(first_n, total_n) ** ScoreService.previous_n)
+    the_bytes = (1).to_bytes(128, byteorder="big")
+    assert (
+        max_score(first_n, total_n)
+        == compute_scores(the_bytes, np.frombuffer(the_bytes, np.uint8)[None], first_n, total_n)[0]
+    )
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_rolling_pi_notation_scores(score_service: ScoreService, score_repository: ScoreRepository):
+    the_source = "test_rolling_pi_notation_scores"
+    for timestamp in range(10, 15):
+        the_scores = await score_service.save_scores([2, 3], timestamp, the_source, [timestamp - 1, timestamp - 2])
+        assert [timestamp - 1, timestamp - 2] == [the_score.matched_timestamp for the_score in the_scores]
+
+    assert [
+        Score(score=32, timestamp=14, source=the_source, matched_timestamp=13),
+        Score(score=243, timestamp=14, source=the_source, matched_timestamp=12),
+    ] == score_service.get_rolling_pi_notation_scores(14, the_source)
+    # with a score repository, every saved score is written to Redis too
+    assert Score(score=2, timestamp=13, source=the_source, matched_timestamp=12) == (
+        await score_repository.get_score_by_timestamp_and_source(13, the_source, 12)
+    )
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_restore_window(score_service: ScoreService):
+    the_source = "test_restore_window"
+    packed_score_repository = PackedScoreRepository(FakeAsyncRedis())
+    before_restart = ScoreService(packed_score_repository)
+    for timestamp in range(10, 14):
+        await before_restart.save_scores([2, 3], timestamp, the_source, [timestamp - 1, timestamp - 2])
+
+    # a restarted member reads the previous 4 seconds of its window back in one range read
+    after_restart = ScoreService(packed_score_repository)
+    await after_restart.save_scores([2, 3], 14, the_source, [13, 12])
+    assert not after_restart.has_full_window(14, the_source)
+    assert await after_restart.restore_window(14, the_source)
+    assert [
+        Score(score=32, timestamp=14, source=the_source, matched_timestamp=13),
+        Score(score=243, timestamp=14, source=the_source, matched_timestamp=12),
+    ] == after_restart.get_rolling_pi_notation_scores(14, the_source)
+
+    # scores stored one key per score cannot be read by range
+    await score_service.save_scores([2], 14, the_source, [13])
+    assert not await score_service.restore_window(14, the_source)
@@ -0,0 +1,35 @@
+import pytest
+
+from app.service.shard_service import ShardService, parse_members
+
+
+def test_parse_members():
+    assert {"a": "http://a:8000", "b": "http://b:8000"} == parse_members(" a=http://a:8000/, b=http://b:8000")
+    assert {} == parse_members("")
+    with pytest.raises(ValueError):
+        parse_members("http://a:8000")
+
+
+def test_shard_service():
+    sources = [f"channel_{i}" for i in range(1000)]
+    assert ShardService("local", {}).is_owner("channel_0")
+
+    members = {f"pod_{i}": f"http://pod_{i}" for i in range(4)}
+    shard_services = [ShardService(member_id, members) for member_id in members]
+    owners = {source: shard_services[0].get_owner(source)[0] for source in sources}
+    # every member agrees, and each owns a fair share
+    for shard_service in shard_services:
+        assert [owners[source] == shard_service.member_id for source in sources] == [
+            shard_service.is_owner(source) for source in sources
+        ]
+        assert 150 < sum(owner == shard_service.member_id for owner in owners.values()) < 350
+
+    # a new member only takes sources over, it never moves them between the old ones
+    shard_services[0].set_members({**members, "pod_4": "http://pod_4"})
+    moved = [source for source in sources if shard_services[0].get_owner(source)[0] != owners[source]]
+    assert 100 < len(moved) < 300
+    assert all("pod_4" == shard_services[0].get_owner(source)[0] for source in moved)
+    assert ("pod_4", "http://pod_4") == shard_services[0].get_owner(moved[0])
+
+    with pytest.raises(ValueError):
+        shard_services[0].set_members({"pod_4": "http://pod_4"})
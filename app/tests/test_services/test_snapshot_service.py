@@ -0,0 +1,42 @@
+import pytest
+
+from app.models import Bit, Score
+from app.repository.comparison_bit_index import ComparisonBitIndex
+from app.repository.match_tracker import MatchTracker
+from app.repository.score_window import ScoreWindow
+from app.repository.source_registry import SourceRegistry
+from app.repository.source_state_snapshot import SourceStateSnapshot
+from app.service.snapshot_service import SnapshotService, init_snapshot_service
+from app.service.source_state_service import SourceStateService
+
+
+def source_state_service() -> SourceStateService:
+    return SourceStateService(SourceRegistry(), ScoreWindow(), MatchTracker(), ComparisonBitIndex())
+
+
+@pytest.mark.asyncio
+async def test_snapshot_service(tmp_path):
+    the_source = "snapshot_channel"
+    path = str(tmp_path / "snapshot.bin")
+    before_restart = source_state_service()
+    for timestamp in range(1, 6):
+        before_restart._window.add(the_source, timestamp, {1: 1.0, 2: 2.0})
+        before_restart._index.add(Bit(bytes=bytes([timestamp]) * 128, timestamp=timestamp, source=the_source))
+        before_restart._match_tracker.add(
+            Score(score=timestamp, timestamp=timestamp, source=the_source, matched_timestamp=0)
+        )
+    assert [the_source] == await SnapshotService(before_restart, SourceStateSnapshot(path), 60).save()
+
+    after_restart = source_state_service()
+    init = init_snapshot_service(after_restart, path, 60)
+    snapshot_service = await init.__anext__()
+    assert before_restart.export_source(the_source) == after_restart.export_source(the_source)
+    assert {1: 1.0, 2: 32.0} == after_restart._window.get_products(the_source, 5)
+
+    # the last ticks before shutdown are in the next snapshot
+    after_restart._index.add(Bit(bytes=bytes([6]) * 128, timestamp=6, source=the_source))
+    with pytest.raises(StopAsyncIteration):
+        await init.__anext__()
+    assert snapshot_service._task is None
+    (state,) = SourceStateSnapshot(path).load()
+    assert [1, 2, 3, 4, 5, 6] == state.comparison_timestamps
@@ -0,0 +1,24 @@
+from unittest import mock
+
+import pytest
+
+from app.models import ReportRequestBody
+from app.service.source_pipeline import SourcePipeline, SourcePipelines
+
+
+@pytest.mark.asyncio
+async def test_source_pipelines():
+    request_body = ReportRequestBody(
+        source="pipeline_channel", source_url="http://fake.url", threshold=1, reporting_url="http://fake.url"
+    )
+    pipeline_factory = mock.AsyncMock(side_effect=lambda request_body: mock.Mock(spec=SourcePipeline))
+    source_pipelines = SourcePipelines(pipeline_factory)
+
+    pipeline = await source_pipelines.get(request_body)
+    assert pipeline is await source_pipelines.get(request_body.model_copy(update={"threshold": 2}))
+    assert 2 == pipeline.request_body.threshold
+    assert 1 == pipeline_factory.await_count
+
+    source_pipelines.remove(request_body.source)
+    assert pipeline is not await source_pipelines.get(request_body)
+    assert 2 == pipeline_factory.await_count
@@ -0,0 +1,82 @@
+from unittest import mock
+
+import pytest
+
+from app.models import Bit, ReportRequestBody, Score, SourceState
+from app.repository.comparison_bit_index import ComparisonBitIndex
+from app.repository.match_tracker import MatchTracker
+from app.repository.score_window import ScoreWindow
+from app.repository.source_registry import SourceRegistry
+from app.service.egress_request_service import EgressRequestService
+from app.service.shard_service import ShardService
+from app.service.source_pipeline import SourcePipelines
+from app.service.source_state_service import SourceStateService
+from app.service.tick_coalescer import TickCoalescer
+
+
+def source_state_service() -> SourceStateService:
+    return SourceStateService(SourceRegistry(), ScoreWindow(), MatchTracker(), ComparisonBitIndex())
+
+
+@pytest.mark.asyncio
+async def test_source_state_service():
+    sender = source_state_service()
+    request_body = ReportRequestBody(
+        source="handoff_channel",
+        source_url="http://fake.url",
+        threshold=1,
+        reporting_url="http://fake_report.url",
+        frame_bits=2048,
+        prefix_bits=512,
+    )
+    sender._registry.register(request_body)
+    sender._index.set_frame_format("handoff_channel", request_body.frame_format)
+    for timestamp in range(1, 6):
+        sender._window.add("handoff_channel", timestamp, {1: 1.0, 2: 2.0})
+        sender._index.add(Bit(bytes=bytes([timestamp]) * 256, timestamp=timestamp, source="handoff_channel"))
+        sender._match_tracker.add(
+            Score(score=timestamp, timestamp=timestamp, source="handoff_channel", matched_timestamp=0)
+        )
+    sender._index.add(Bit(bytes=b"\x00" * 128, timestamp=1, source="other_channel"))
+    assert {"handoff_channel", "other_channel"} == sender.get_sources()
+
+    state = sender.export_source("handoff_channel")
+    receiver = source_state_service()
+    receiver.import_source(SourceState.model_validate_json(state.model_dump_json()))
+    assert state == receiver.export_source("handoff_channel")
+    assert request_body == receiver._registry.get("handoff_channel")
+    assert request_body.frame_format == receiver._index.get_frame_format("handoff_channel")
+    assert {1: 1.0, 2: 32.0} == receiver._window.get_products("handoff_channel", 5)
+    assert [0, 0] == [
+        score.matched_timestamp
+        for score in receiver._match_tracker.get_scores_larger_than_threshold(3, "handoff_channel", 10)
+    ]
+
+    # only the sources owned elsewhere are handed off, and only dropped once accepted
+    shard_service = mock.Mock(spec=ShardService)
+    shard_service.is_owner.side_effect = lambda source: source == "other_channel"
+    shard_service.get_owner.return_value = ("b", "http://b")
+    egress_request_service = mock.AsyncMock(spec=EgressRequestService)
+    egress_request_service.send_source_state.return_value = False
+    assert [] == await sender.hand_off(shard_service, egress_request_service)
+    assert {"handoff_channel", "other_channel"} == sender.get_sources()
+    egress_request_service.send_source_state.return_value = True
+    assert ["handoff_channel"] == await sender.hand_off(shard_service, egress_request_service)
+    assert {"other_channel"} == sender.get_sources()
+    egress_request_service.send_source_state.assert_awaited_with("http://b", state)
+
+    # the handed-off source leaves no cached pipeline or tick behind
+    source_pipelines = mock.Mock(spec=SourcePipelines)
+    tick_coalescer = mock.Mock(spec=TickCoalescer)
+    remover = SourceStateService(
+        SourceRegistry(),
+        ScoreWindow(),
+        MatchTracker(),
+        ComparisonBitIndex(),
+        source_pipelines=source_pipelines,
+        tick_coalescer=tick_coalescer,
+    )
+    remover.import_source(state)
+    assert ["handoff_channel"] == await remover.hand_off(shard_service, egress_request_service)
+    source_pipelines.remove.assert_called_once_with("handoff_channel")
+    tick_coalescer.remove_source.assert_called_once_with("handoff_channel")
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from app.models import ReportInfo
+from app.service.metrics_service import MetricsService
+from app.service.tick_coalescer import TickCoalescer
+
+
+@pytest.mark.asyncio
+async def test_tick_coalescer():
+    now = [0.0]
+    metrics_service = MetricsService()
+    tick_coalescer = TickCoalescer(cache_seconds=5, metrics_service=metrics_service, clock=lambda: now[0])
+    calls = []
+    release = asyncio.Event()
+
+    async def tick() -> ReportInfo:
+        calls.append(1)
+        await release.wait()
+        return ReportInfo(channel="coalesced_channel", time=1, match_times=[len(calls)])
+
+    leader = asyncio.ensure_future(tick_coalescer.run("coalesced_channel", 1, tick))
+    followers = [asyncio.ensure_future(tick_coalescer.run("coalesced_channel", 1, tick)) for _ in range(2)]
+    other_second = asyncio.ensure_future(tick_coalescer.run("coalesced_channel", 2, tick))
+    await asyncio.sleep(0)
+    leader.cancel()  # the tick keeps running for the other callers
+    release.set()
+    report_infos = await asyncio.gather(*followers)
+    assert [1, 1] == [report_info.match_times[0] for report_info in report_infos]
+    assert 2 == (await other_second).match_times[0]
+    assert 2 == len(calls)
+
+    now[0] = 4.9
+    assert 1 == (await tick_coalescer.run("coalesced_channel", 1, tick)).match_times[0]
+    assert 2 == len(calls)
+    now[0] = 5.1
+    assert 3 == (await tick_coalescer.run("coalesced_channel", 1, tick)).match_times[0]
+
+    registry = metrics_service.registry
+    assert 2 == registry.get_sample_value("coalesced_ticks_total", {"source": "coalesced_channel", "by": "in_flight"})
+    assert 1 == registry.get_sample_value("coalesced_ticks_total", {"source": "coalesced_channel", "by": "cache"})
+
+
+@pytest.mark.asyncio
+async def test_tick_coalescer_failure():
+    tick_coalescer = TickCoalescer()
+    calls = []
+
+    async def tick() -> ReportInfo:
+        calls.append(1)
+        await asyncio.sleep(0)
+        raise ValueError("Failed tick")
+
+    results = await asyncio.gather(
+        tick_coalescer.run("failing_channel", 1, tick),
+        tick_coalescer.run("failing_channel", 1, tick),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert 1 == len(calls)
+    with pytest.raises(ValueError):
+        await tick_coalescer.run("failing_channel", 1, tick)
+    assert 2 == len(calls)
+
+
+@pytest.mark.asyncio
+async def test_tick_coalescer_remove_source():
+    tick_coalescer = TickCoalescer()
+    calls = []
+    release = asyncio.Event()
+
+    async def tick() -> ReportInfo:
+        calls.append(1)
+        await release.wait()
+        return ReportInfo(channel="removed_channel", time=1, match_times=[len(calls)])
+
+    release.set()
+    await tick_coalescer.run("removed_channel", 1, tick)
+    await tick_coalescer.run("kept_channel", 1, tick)
+    release.clear()
+    running = asyncio.ensure_future(tick_coalescer.run("removed_channel", 2, tick))
+    await asyncio.sleep(0)
+    tick_coalescer.remove_source("removed_channel")
+    release.set()
+    assert 3 == (await running).match_times[0]  # the running tick still answers but is not cached
+    assert 4 == (await tick_coalescer.run("removed_channel", 1, tick)).match_times[0]
+    assert 5 == (await tick_coalescer.run("removed_channel", 2, tick)).match_times[0]
+    assert 2 == (await tick_coalescer.run("kept_channel", 1, tick)).match_times[0]
+    assert 5 == len(calls)